@@ -0,0 +1,116 @@
+import gzip
+import json
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Callable, Dict, List, Tuple, Optional
+
+from music_manager.cache.page_cache import PageMode
+
+LOG = logging.getLogger(__name__)
+CASSETTE_VERSION = 1
+
+
+class CassetteMissError(Exception):
+    pass
+
+
+class CassetteMode(Enum):
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+class Cassette:
+    """
+    Records the content of every page a run loads (HTTP fetches, JS renders, Selenium page sources,
+    youtube-dl video infos) to a gzipped JSON Lines file, and replays them later without any network access.
+    Recorded pages of the same URL and mode are replayed in the order they were recorded,
+    the last one is repeated if a page is loaded more times than it was recorded.
+    Loading a page that is not in the cassette raises CassetteMissError.
+    """
+    _instance = None
+
+    def __init__(self, path: str, mode: CassetteMode):
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._pages: Dict[Tuple[str, str], List[str]] = {}
+        self._replay_positions: Dict[Tuple[str, str], int] = {}
+        self._file = None
+        self.stats: Dict[str, int] = {"recorded": 0, "replayed": 0}
+        if mode == CassetteMode.RECORD:
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+            self._write({"version": CASSETTE_VERSION, "created_at": time.time()})
+        else:
+            self._load()
+
+    @classmethod
+    def configure(cls, cassette: Optional["Cassette"]):
+        if cls._instance:
+            cls._instance.close()
+        cls._instance = cassette
+        if cassette:
+            LOG.info("Using cassette in %s mode: %s", cassette.mode.value, cassette.path)
+
+    @classmethod
+    def get_instance(cls) -> Optional["Cassette"]:
+        return cls._instance
+
+    @property
+    def is_replaying(self) -> bool:
+        return self.mode == CassetteMode.REPLAY
+
+    def fetch(self, url: str, mode: PageMode, loader: Callable[[], str]) -> str:
+        key = (mode.value, url)
+        if self.is_replaying:
+            return self._replay(key)
+        content = loader()
+        with self._lock:
+            self._write({"mode": mode.value, "url": url, "content": content})
+            self.stats["recorded"] += 1
+        return content
+
+    def check_network_allowed(self, description: str):
+        """
+        Fails requests that bypass the cassette, so a replayed run can't silently use the network.
+        """
+        if self.is_replaying:
+            raise CassetteMissError("Network access while replaying cassette {}: {}".format(self.path, description))
+
+    def close(self):
+        LOG.info("Cassette stats: %s", self.stats)
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def _replay(self, key) -> str:
+        with self._lock:
+            pages = self._pages.get(key)
+            if not pages:
+                raise CassetteMissError("Page is not in cassette {}: {} {}".format(self.path, key[0], key[1]))
+            pos = self._replay_positions.get(key, 0)
+            self._replay_positions[key] = pos + 1
+            self.stats["replayed"] += 1
+            return pages[min(pos, len(pages) - 1)]
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        # Keeps the records of an interrupted run readable
+        self._file.flush()
+
+    def _load(self):
+        count = 0
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError("Unsupported cassette version: {}".format(header.get("version")))
+            try:
+                for line in f:
+                    record = json.loads(line)
+                    self._pages.setdefault((record["mode"], record["url"]), []).append(record["content"])
+                    count += 1
+            except EOFError:
+                LOG.warning("Cassette was not closed properly, using the %d pages recorded before the end", count)
+        LOG.info("Loaded %d pages of %d URLs from cassette: %s", count, len(self._pages), self.path)
@@ -0,0 +1,160 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Tuple
+
+from music_manager.net.urls import canonicalize_url
+
+LOG = logging.getLogger(__name__)
+DAY_SECS = 24 * 3600
+# Titles and durations of published media rarely change, Facebook posts may be edited
+DEFAULT_METADATA_TTLS_SECS: Dict[str, float] = {
+    "youtube": 30 * DAY_SECS,
+    "soundcloud": 30 * DAY_SECS,
+    "mixcloud": 30 * DAY_SECS,
+    "beatport": 90 * DAY_SECS,
+    "facebook": 1 * DAY_SECS,
+}
+DEFAULT_METADATA_TTL_SECS = 7 * DAY_SECS
+
+
+@dataclass
+class UrlMetadata:
+    url: str
+    provider: str
+    title: str
+    duration_seconds: int
+    entity_type: str
+    stored_at: float
+
+
+class MetadataCache:
+    """
+    Cache of resolved URL metadata, keyed by canonical URL.
+    Entries are stored in a SQLite file that can be shared by concurrent processes,
+    the most recently used entries are also kept in memory.
+    Entries expire after the TTL of their provider.
+    """
+    def __init__(self, db_path: str, ttls: Dict[str, float] = None, default_ttl_secs: float = DEFAULT_METADATA_TTL_SECS,
+                 memory_size: int = 10000):
+        self.db_path = db_path
+        self.ttls = dict(DEFAULT_METADATA_TTLS_SECS if ttls is None else ttls)
+        self.default_ttl_secs = default_ttl_secs
+        self.memory_size = memory_size
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "writes": 0}
+        self._conn = sqlite3.connect(db_path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS url_metadata ("
+                           "key TEXT PRIMARY KEY, "
+                           "url TEXT NOT NULL, "
+                           "provider TEXT NOT NULL, "
+                           "title TEXT, "
+                           "duration_seconds INTEGER, "
+                           "entity_type TEXT NOT NULL, "
+                           "stored_at REAL NOT NULL)")
+
+    def get(self, url: str) -> UrlMetadata or None:
+        key = canonicalize_url(url)
+        with self._lock:
+            metadata = self._memory.get(key)
+            if metadata is not None:
+                if self._is_expired(metadata):
+                    del self._memory[key]
+                    self.stats["expired"] += 1
+                    self.stats["misses"] += 1
+                    return None
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return metadata
+
+            row = self._conn.execute("SELECT url, provider, title, duration_seconds, entity_type, stored_at "
+                                     "FROM url_metadata WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            metadata = UrlMetadata(*row)
+            if self._is_expired(metadata):
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._remember(key, metadata)
+            self.stats["disk_hits"] += 1
+            return metadata
+
+    def put(self, src_url: str, metadata: UrlMetadata):
+        key = canonicalize_url(src_url)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO url_metadata"
+                               "(key, url, provider, title, duration_seconds, entity_type, stored_at) "
+                               "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (key, metadata.url, metadata.provider, metadata.title, metadata.duration_seconds,
+                                metadata.entity_type, metadata.stored_at))
+            self._remember(key, metadata)
+            self.stats["writes"] += 1
+
+    def merge(self, entries: Iterable[Tuple[str, UrlMetadata]]) -> int:
+        """
+        Stores entries of another cache, e.g. from a results bundle. Entries only replace older ones.
+        """
+        merged = 0
+        with self._lock:
+            for src_url, metadata in entries:
+                key = canonicalize_url(src_url)
+                merged += self._conn.execute("INSERT INTO url_metadata"
+                                             "(key, url, provider, title, duration_seconds, entity_type, stored_at) "
+                                             "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                                             "ON CONFLICT(key) DO UPDATE SET url = excluded.url, "
+                                             "provider = excluded.provider, title = excluded.title, "
+                                             "duration_seconds = excluded.duration_seconds, "
+                                             "entity_type = excluded.entity_type, stored_at = excluded.stored_at "
+                                             "WHERE excluded.stored_at > url_metadata.stored_at",
+                                             (key, metadata.url, metadata.provider, metadata.title,
+                                              metadata.duration_seconds, metadata.entity_type,
+                                              metadata.stored_at)).rowcount
+                self._memory.pop(key, None)
+            self.stats["writes"] += merged
+        return merged
+
+    def invalidate(self, url: str):
+        key = canonicalize_url(url)
+        with self._lock:
+            self._memory.pop(key, None)
+            self._conn.execute("DELETE FROM url_metadata WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        deleted = 0
+        with self._lock:
+            for provider, ttl in self.ttls.items():
+                deleted += self._conn.execute("DELETE FROM url_metadata WHERE provider = ? AND stored_at < ?",
+                                              (provider, now - ttl)).rowcount
+            placeholders = ",".join("?" * len(self.ttls))
+            deleted += self._conn.execute("DELETE FROM url_metadata WHERE provider NOT IN ({}) AND stored_at < ?"
+                                          .format(placeholders),
+                                          (*self.ttls.keys(), now - self.default_ttl_secs)).rowcount
+        LOG.info("Purged %d expired entries from metadata cache", deleted)
+        return deleted
+
+    def log_stats(self):
+        LOG.info("Metadata cache stats: %s", self.stats)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_ttl(self, provider: str) -> float:
+        return self.ttls.get(provider, self.default_ttl_secs)
+
+    def _is_expired(self, metadata: UrlMetadata) -> bool:
+        return time.time() - metadata.stored_at > self.get_ttl(metadata.provider)
+
+    def _remember(self, key: str, metadata: UrlMetadata):
+        self._memory[key] = metadata
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
@@ -0,0 +1,135 @@
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import List, Dict
+
+from music_manager.net.urls import canonicalize_url
+
+LOG = logging.getLogger(__name__)
+HOUR_SECS = 3600
+
+
+class FailureReason(Enum):
+    # The provider could not find the media, e.g. a blocked SoundCloud track
+    NOT_FOUND = "not_found"
+    # None of the providers can handle the link
+    UNKNOWN_PROVIDER = "unknown_provider"
+    # A post (e.g. on Facebook) did not contain any links
+    NO_LINKS = "no_links"
+
+
+@dataclass
+class NegativeCacheEntry:
+    url: str
+    reason: FailureReason
+    provider: str
+    failures: int
+    first_failed_at: float
+    last_failed_at: float
+    next_retry_at: float
+
+    @property
+    def is_due(self) -> bool:
+        return time.time() >= self.next_retry_at
+
+
+class NegativeCache:
+    """
+    Remembers links that could not be resolved, so they are not retried in full on every run.
+    A link is retried after a backoff that doubles with every consecutive failure, up to max_backoff_secs.
+    A successful resolution removes the link.
+    """
+    def __init__(self, db_path: str, base_backoff_secs: float = 6 * HOUR_SECS,
+                 max_backoff_secs: float = 30 * 24 * HOUR_SECS):
+        self.db_path = db_path
+        self.base_backoff_secs = base_backoff_secs
+        self.max_backoff_secs = max_backoff_secs
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"skipped": 0, "failures": 0, "recovered": 0}
+        self._conn = sqlite3.connect(db_path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS negative_cache ("
+                           "key TEXT PRIMARY KEY, "
+                           "url TEXT NOT NULL, "
+                           "reason TEXT NOT NULL, "
+                           "provider TEXT, "
+                           "failures INTEGER NOT NULL, "
+                           "first_failed_at REAL NOT NULL, "
+                           "last_failed_at REAL NOT NULL, "
+                           "next_retry_at REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS negative_cache_next_retry ON negative_cache(next_retry_at)")
+
+    def get_backoff_secs(self, failures: int) -> float:
+        return min(self.max_backoff_secs, self.base_backoff_secs * 2 ** (failures - 1))
+
+    def should_skip(self, url: str) -> bool:
+        entry = self.get(url)
+        if entry is None or entry.is_due:
+            return False
+        LOG.info("Skipping link that failed %d times (%s), next retry after %s: %s",
+                 entry.failures, entry.reason.value, time.ctime(entry.next_retry_at), url)
+        with self._lock:
+            self.stats["skipped"] += 1
+        return True
+
+    def get(self, url: str) -> NegativeCacheEntry or None:
+        with self._lock:
+            row = self._conn.execute("SELECT url, reason, provider, failures, first_failed_at, last_failed_at, "
+                                     "next_retry_at FROM negative_cache WHERE key = ?",
+                                     (canonicalize_url(url),)).fetchone()
+        return self._to_entry(row) if row else None
+
+    def record_failure(self, url: str, reason: FailureReason, provider: str = None) -> NegativeCacheEntry:
+        key = canonicalize_url(url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT failures, first_failed_at FROM negative_cache WHERE key = ?",
+                                     (key,)).fetchone()
+            failures, first_failed_at = (row[0] + 1, row[1]) if row else (1, now)
+            next_retry_at = now + self.get_backoff_secs(failures)
+            self._conn.execute("INSERT OR REPLACE INTO negative_cache"
+                               "(key, url, reason, provider, failures, first_failed_at, last_failed_at, next_retry_at) "
+                               "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                               (key, url, reason.value, provider, failures, first_failed_at, now, next_retry_at))
+            self.stats["failures"] += 1
+        LOG.debug("Recorded failure #%d (%s) of link: %s", failures, reason.value, url)
+        return NegativeCacheEntry(url, reason, provider, failures, first_failed_at, now, next_retry_at)
+
+    def record_success(self, url: str):
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM negative_cache WHERE key = ?", (canonicalize_url(url),)).rowcount
+            if deleted:
+                self.stats["recovered"] += 1
+                LOG.info("Previously failing link is resolved now: %s", url)
+
+    def get_due_entries(self, limit: int = None) -> List[NegativeCacheEntry]:
+        query = ("SELECT url, reason, provider, failures, first_failed_at, last_failed_at, next_retry_at "
+                 "FROM negative_cache WHERE next_retry_at <= ? ORDER BY next_retry_at")
+        params = [time.time()]
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._to_entry(row) for row in rows]
+
+    def get_counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT reason, COUNT(*) FROM negative_cache GROUP BY reason").fetchall()
+        return {reason: count for reason, count in rows}
+
+    def log_stats(self):
+        LOG.info("Negative cache stats: %s, entries by reason: %s", self.stats, self.get_counts())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_entry(row) -> NegativeCacheEntry:
+        url, reason, provider, failures, first_failed_at, last_failed_at, next_retry_at = row
+        return NegativeCacheEntry(url, FailureReason(reason), provider, failures, first_failed_at, last_failed_at,
+                                  next_retry_at)
@@ -0,0 +1,91 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Callable, Any, Tuple, Dict
+
+from music_manager.cache.single_flight import SingleFlight
+
+LOG = logging.getLogger(__name__)
+
+
+class PageMode(Enum):
+    PLAIN = "plain"
+    REQUESTS_HTML = "requests-html"
+    SELENIUM = "selenium"
+    YOUTUBE_DL_INFO = "youtube-dl-info"
+    # Final URL of a redirect chain
+    REDIRECT = "redirect"
+
+
+class PageCache:
+    """
+    Short-lived cache of fetched pages (parsed soups, video infos), keyed by mode and URL,
+    so providers looking at the same page several times fetch and parse it only once.
+    Concurrent loads of the same key share a single fetch.
+    Memory is bounded by the total size reported by the loaders, least recently used pages are evicted first.
+    Failed loads are not cached.
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl_secs: float = 600.0):
+        self.max_bytes = max_bytes
+        self.ttl_secs = ttl_secs
+        self._entries: OrderedDict = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        self._single_flight = SingleFlight()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get_or_load(self, url: str, mode: PageMode, loader: Callable[[], Tuple[Any, int]]) -> Any:
+        """
+        loader should return the page and its approximate size in bytes.
+        """
+        key = (mode, url)
+        value = self._get(key)
+        if value is not None:
+            return value
+        return self._single_flight.do(key, lambda: self._load(key, loader))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def _get(self, key) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value, size = entry
+            if time.monotonic() - stored_at > self.ttl_secs:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def _load(self, key, loader: Callable[[], Tuple[Any, int]]) -> Any:
+        # Another thread may have finished loading the same key right before this one got the flight
+        value = self._get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            self.stats["misses"] += 1
+        value, size = loader()
+        if size > self.max_bytes:
+            LOG.debug("Page is too large to cache (%d bytes): %s", size, key[1])
+            return value
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), value, size)
+            self._size_bytes += size
+            while self._size_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.stats["evictions"] += 1
+        return value
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._size_bytes -= size
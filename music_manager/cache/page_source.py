@@ -0,0 +1,23 @@
+from typing import Callable
+
+from music_manager.cache.cassette import Cassette
+from music_manager.cache.page_cache import PageMode
+from music_manager.cache.snapshot_store import SnapshotStore
+
+
+def fetch_page(url: str, mode: PageMode, loader: Callable[[], str]) -> str:
+    """
+    Loads a page with the loader, unless it is replayed from the configured cassette or
+    read from the snapshot store in re-extract mode. Loaded pages are recorded and saved to these if configured.
+    """
+    cassette = Cassette.get_instance()
+    if cassette:
+        loader = _bind(cassette, url, mode, loader)
+    store = SnapshotStore.get_instance()
+    if store:
+        return store.fetch(url, mode, loader)
+    return loader()
+
+
+def _bind(cassette: Cassette, url: str, mode: PageMode, loader: Callable[[], str]) -> Callable[[], str]:
+    return lambda: cassette.fetch(url, mode, loader)
@@ -0,0 +1,131 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import zipfile
+from dataclasses import dataclass, asdict
+from enum import Enum
+from typing import Dict, Any, List, Iterator, Tuple
+
+from music_manager.cache.metadata_cache import MetadataCache, UrlMetadata
+
+LOG = logging.getLogger(__name__)
+BUNDLE_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+ENTITIES_FILE = "entities.jsonl"
+METADATA_FILE = "metadata.jsonl"
+# Long-running commands write a bundle per this many entities, so collected links don't grow without limit
+ROTATING_BUNDLE_MAX_ENTITIES = 10000
+
+
+class ResultSource(Enum):
+    PROVIDER = "provider"
+    METADATA_CACHE = "metadata_cache"
+    NEGATIVE_CACHE = "negative_cache"
+
+
+@dataclass
+class LinkProvenance:
+    link: str
+    src_url: str
+    provider: str
+    source: str
+    resolved_at: float
+
+
+class ResultsBundle:
+    """
+    Collects the links resolved by a run and writes them to a zip file:
+    the resolved entities with the provenance of each link, and the metadata cache entries written by the run.
+    Importing the bundle on another machine pre-warms its metadata cache, so links resolved with an expensive
+    provider setup (e.g. a logged-in browser) are not resolved again.
+    If a maximum number of entities is given, the bundle is rotated: every time the maximum is reached,
+    the collected links are written to a numbered part of the bundle and collecting starts over.
+    """
+    def __init__(self, path: str, command_name: str, link_path: str = None, max_entities: int = None):
+        self.path = path
+        self.command_name = command_name
+        # Symlink updated to point to the latest bundle
+        self.link_path = link_path
+        self.max_entities = max_entities
+        self._lock = threading.Lock()
+        self._entities: List[Dict[str, Any]] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._parts = 0
+
+    def add(self, entity: Dict[str, Any], provenance: LinkProvenance, metadata: UrlMetadata = None):
+        with self._lock:
+            self._entities.append(dict(entity, provenance=asdict(provenance)))
+            if metadata:
+                self._metadata.append(dict(asdict(metadata), link=provenance.link))
+            full = self.max_entities and len(self._entities) >= self.max_entities
+        if full:
+            self.write()
+
+    def write(self) -> str or None:
+        with self._lock:
+            if not self._entities:
+                LOG.info("No links were resolved, results bundle is not written")
+                return None
+            path = self.path
+            if self.max_entities:
+                self._parts += 1
+                root, ext = os.path.splitext(self.path)
+                path = "{}-{}{}".format(root, self._parts, ext)
+            manifest = {
+                "version": BUNDLE_VERSION,
+                "command": self.command_name,
+                "host": socket.gethostname(),
+                "created_at": time.time(),
+                "entities": len(self._entities),
+                "metadata": len(self._metadata),
+            }
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr(MANIFEST_FILE, json.dumps(manifest, indent=2))
+                zf.writestr(ENTITIES_FILE, _to_json_lines(self._entities))
+                zf.writestr(METADATA_FILE, _to_json_lines(self._metadata))
+            os.replace(tmp_path, path)
+            if self.max_entities:
+                self._entities = []
+                self._metadata = []
+        if self.link_path:
+            _update_symlink(path, self.link_path)
+        LOG.info("Written results bundle with %d entities and %d metadata entries: %s",
+                 manifest["entities"], manifest["metadata"], path)
+        return path
+
+
+def read_bundle_metadata(path: str) -> Iterator[Tuple[str, UrlMetadata]]:
+    """
+    Yields (link, metadata) pairs of the metadata cache entries stored in a bundle.
+    """
+    with zipfile.ZipFile(path) as zf:
+        manifest = json.loads(zf.read(MANIFEST_FILE))
+        if manifest.get("version") != BUNDLE_VERSION:
+            raise ValueError("Unsupported results bundle version: {}".format(manifest.get("version")))
+        for line in zf.read(METADATA_FILE).decode("utf-8").splitlines():
+            values = json.loads(line)
+            link = values.pop("link")
+            yield link, UrlMetadata(**values)
+
+
+def import_bundle(path: str, metadata_cache: MetadataCache) -> int:
+    imported = metadata_cache.merge(read_bundle_metadata(path))
+    LOG.info("Imported %d metadata entries from results bundle: %s", imported, path)
+    return imported
+
+
+def _to_json_lines(records: List[Dict[str, Any]]) -> str:
+    return "".join(json.dumps(r) + "\n" for r in records)
+
+
+def _update_symlink(target: str, link_path: str):
+    tmp_link = link_path + ".tmp"
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(target, tmp_link)
+    os.replace(tmp_link, link_path)
@@ -0,0 +1,141 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from typing import Callable, Optional, Dict
+
+from music_manager.cache.page_cache import PageMode
+from music_manager.net.urls import canonicalize_url
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+LOG = logging.getLogger(__name__)
+INDEX_FILE = "index.sqlite"
+OBJECTS_DIR = "objects"
+CODEC_ZSTD = "zstd"
+CODEC_ZLIB = "zlib"
+CODEC_EXTENSIONS = {CODEC_ZSTD: ".zst", CODEC_ZLIB: ".z"}
+
+
+class SnapshotNotFoundError(LookupError):
+    pass
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return zlib.compress(data, 9)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        if not zstandard:
+            raise ValueError("Snapshot is compressed with zstd, but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class SnapshotStore:
+    """
+    Stores every fetched or rendered page, so extraction logic can be run again later without the network.
+    Pages are compressed (zstd if the zstandard package is installed, zlib otherwise) and stored by content hash,
+    so the same page fetched many times is stored once. An index maps (URL, mode) to the snapshots by fetch time.
+    In re-extract mode, pages are only read from the store and missing pages raise SnapshotNotFoundError.
+    """
+    _instance = None
+
+    def __init__(self, root_dir: str, re_extract: bool = False):
+        self.root_dir = root_dir
+        self.re_extract = re_extract
+        self.codec = CODEC_ZSTD if zstandard else CODEC_ZLIB
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"saved": 0, "deduplicated": 0, "loaded": 0, "missing": 0}
+        os.makedirs(os.path.join(root_dir, OBJECTS_DIR), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root_dir, INDEX_FILE), timeout=60, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS snapshots ("
+                           "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                           "key TEXT NOT NULL, "
+                           "url TEXT NOT NULL, "
+                           "mode TEXT NOT NULL, "
+                           "fetched_at REAL NOT NULL, "
+                           "digest TEXT NOT NULL, "
+                           "codec TEXT NOT NULL, "
+                           "size INTEGER NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS snapshots_key ON snapshots(key, mode, fetched_at)")
+
+    @classmethod
+    def configure(cls, store: Optional["SnapshotStore"]):
+        if cls._instance:
+            cls._instance.close()
+        cls._instance = store
+        if store:
+            LOG.info("Using snapshot store at %s, re-extract mode: %s, codec: %s",
+                     store.root_dir, store.re_extract, store.codec)
+
+    @classmethod
+    def get_instance(cls) -> Optional["SnapshotStore"]:
+        return cls._instance
+
+    def fetch(self, url: str, mode: PageMode, loader: Callable[[], str]) -> str:
+        if self.re_extract:
+            content = self.load_latest(url, mode)
+            if content is None:
+                raise SnapshotNotFoundError("No {} snapshot of URL: {}".format(mode.value, url))
+            return content
+        content = loader()
+        self.save(url, mode, content)
+        return content
+
+    def save(self, url: str, mode: PageMode, content: str) -> str:
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._get_object_path(digest, self.codec)
+        if os.path.exists(path):
+            with self._lock:
+                self.stats["deduplicated"] += 1
+        else:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(_compress(data, self.codec))
+            os.replace(tmp_path, path)
+        with self._lock:
+            self._conn.execute("INSERT INTO snapshots(key, url, mode, fetched_at, digest, codec, size) "
+                               "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (canonicalize_url(url), url, mode.value, time.time(), digest, self.codec, len(data)))
+            self.stats["saved"] += 1
+        return digest
+
+    def load_latest(self, url: str, mode: PageMode) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT digest, codec FROM snapshots WHERE key = ? AND mode = ? "
+                                     "ORDER BY fetched_at DESC LIMIT 1",
+                                     (canonicalize_url(url), mode.value)).fetchone()
+            if row is None:
+                self.stats["missing"] += 1
+                return None
+            self.stats["loaded"] += 1
+        digest, codec = row
+        with open(self._get_object_path(digest, codec), "rb") as f:
+            return _decompress(f.read(), codec).decode("utf-8")
+
+    def log_stats(self):
+        LOG.info("Snapshot store stats: %s", self.stats)
+
+    def close(self):
+        self.log_stats()
+        with self._lock:
+            self._conn.close()
+
+    def _get_object_path(self, digest: str, codec: str) -> str:
+        obj_dir = os.path.join(self.root_dir, OBJECTS_DIR, digest[:2])
+        os.makedirs(obj_dir, exist_ok=True)
+        return os.path.join(obj_dir, digest[2:] + CODEC_EXTENSIONS[codec])
@@ -1,32 +1,59 @@
 import logging
+import multiprocessing
 import os
+import re
+import signal
+import sys
+import tempfile
+import time
 from dataclasses import dataclass, field
 from enum import Enum
-from pprint import pformat
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
 
 from googleapiwrapper.google_sheet import GSheetOptions, GSheetWrapper
-from pythoncommons.file_parser.parser_config_reader import GenericLineParserConfig, ParserConfigReader
+from pythoncommons.constants import ExecutionMode
 from pythoncommons.file_utils import FindResultType, FileUtils
+from pythoncommons.logging_setup import SimpleLoggingSetup
 from pythoncommons.project_utils import SimpleProjectUtils
 from pythoncommons.result_printer import BasicResultPrinter
 
 import music_manager.commands.addnewentitiestosheet.parser as p
-from music_manager.commands.addnewentitiestosheet.config import ParserConfig, Fields, Sheet
+from music_manager.commands.addnewentitiestosheet.config import Fields, Sheet
+from music_manager.commands.addnewentitiestosheet.duplicate_detection import DuplicateDetector, InputDuplicateFilter
+from music_manager.commands.addnewentitiestosheet.title_index import DEFAULT_TITLE_SIMILARITY_THRESHOLD
+from music_manager.commands.addnewentitiestosheet.input_index import InputFileIndex
+from music_manager.commands.addnewentitiestosheet.journal import ResultJournal
+from music_manager.commands.addnewentitiestosheet.link_index import LinkIndex
 from music_manager.commands.addnewentitiestosheet.music_entity_creator import MusicEntityCreator, GroupedMusicEntity, \
     MusicEntityType
-from music_manager.commands.addnewentitiestosheet.parser import MusicEntityInputFileParser
-from music_manager.commands_common import CommandType, CommandAbs
-from music_manager.constants import LocalDirs
-from music_manager.contentprovider.beatport import Beatport
-from music_manager.contentprovider.common import JavaScriptRenderer, JSRenderer, HtmlParser
-from music_manager.contentprovider.facebook import Facebook, FacebookLinkParser, FacebookSelenium
-from music_manager.contentprovider.mixcloud import Mixcloud
-from music_manager.contentprovider.soundcloud import SoundCloud
-from music_manager.contentprovider.youtube import Youtube
+from music_manager.commands.addnewentitiestosheet.parser import MusicEntityInputFileParser, parsed_entity_to_dict, \
+    parsed_entity_from_dict, set_src_location, get_src_location
+from music_manager.commands.addnewentitiestosheet.parser_config_cache import ParserConfigCache
+from music_manager.commands.addnewentitiestosheet.pipeline import StreamingPipeline, WriteBehindSink
+from music_manager.commands.addnewentitiestosheet.resolver import ResolverConfig
+from music_manager.commands.addnewentitiestosheet.sheet_reader import PagedSheetReader, GspreadSheetSource, \
+    DEFAULT_PAGE_SIZE, DEFAULT_READ_WORKERS
+from music_manager.commands.addnewentitiestosheet.watcher import InputFileWatcher, FileChange
+from music_manager.commands.addnewentitiestosheet.work_queue import SQLiteWorkQueue, WorkItem, get_worker_name
+from music_manager.commands_common import CommandType, CommandAbs, HttpArguments, ContentProviderArguments, \
+    CacheArguments
+from music_manager.constants import LocalDirs, PROJECT_NAME
+from music_manager.contentprovider.common import JavaScriptRenderer
+from music_manager.contentprovider.facebook import FACEBOOK_URL_FRAGMENT1
+from music_manager.contentprovider.factory import MusicEntityCreatorFactory, SELENIUM_PROFILE_DIR
+from music_manager.library.music_library import MusicLibrary, LibraryEntity, LIBRARY_FILE, get_link_provider
+from music_manager.music_manager_config import MusicManagerConfig
 from music_manager.statistics import RowStats
 
-ROWS_TO_FETCH = 3000
+WORK_QUEUE_FILE = "work_queue.sqlite"
+WATCH_STATE_FILE = "watched_input_files.json"
+PARSER_CONFIG_CACHE_FILE = "parser_config.pickle"
+INPUT_INDEX_FILE = "input_index.sqlite"
+RESULT_JOURNAL_FILE = "result_journal.jsonl"
+LINK_INDEX_FILE = "link_index.bin"
+SHEET_SNAPSHOT_FILE = "sheet_snapshot-{}.json"
+# Duplicate detection only compares titles and links, other columns of the sheets are not read
+SHEET_DEDUP_FIELDS = ["title", "link_1", "link_2", "link_3"]
 
 LOG = logging.getLogger(__name__)
 
@@ -47,6 +74,7 @@ class GSheetUpdate:
     rows: List[Any] = field(default_factory=list)
     data_from_sheet: List[List[str]] = None
     fields_obj: Fields = None
+    sheet_reader: PagedSheetReader = None
 
     @property
     def spreadsheet(self):
@@ -65,11 +93,11 @@ class GSheetUpdate:
             return self.data_from_sheet
 
         if not self.data_from_sheet:
-            self.data_from_sheet = self.gsheet_wrapper.read_data_by_header(ROWS_TO_FETCH, skip_header_row=True)
+            self.data_from_sheet = self.sheet_reader.read(width=max(self.col_indices_by_fields.values()) + 1)
             sheet_ref = self.spreadsheet + "/" + self.worksheet
             LOG.debug("Fetched data from sheet '%s': %s", sheet_ref, self.data_from_sheet)
         else:
-            LOG.warning("Data from sheet is already fetched")
+            LOG.debug("Data from sheet is already fetched")
         return self.data_from_sheet
 
 
@@ -78,9 +106,39 @@ class AddNewMusicEntityCommandConfig:
         self.fb_password = args.fbpwd
         self.fb_username = args.fbuser
         self.fb_redirect_link_limit = args.fb_redirect_link_limit
-        self.js_renderer: JavaScriptRenderer = self._choose_js_renderer(args)
+        self.js_renderer: JavaScriptRenderer = MusicEntityCreatorFactory.choose_js_renderer(args)
         self._validate(args, parser)
         self.duplicate_detection = args.duplicate_detection
+        self.title_similarity_threshold = args.title_similarity_threshold
+        if not 0 <= self.title_similarity_threshold <= 1:
+            raise ValueError("Title similarity threshold should be between 0 and 1, got: {}"
+                             .format(self.title_similarity_threshold))
+        self.resolver_config = ResolverConfig(workers=args.workers,
+                                              link_workers=args.link_workers,
+                                              provider_limits=ResolverConfig.parse_provider_limits(args.provider_concurrency),
+                                              parallel_browser=args.parallel_browser)
+        self.cost_scheduling = not args.no_cost_scheduling
+        self.streaming = args.streaming
+        self.stream_queue_size = args.stream_queue_size
+        self.stream_batch_size = args.stream_batch_size
+        self.queue_workers = args.queue_workers
+        self.work_queue_lease_secs = args.work_queue_lease_secs
+        self.work_queue_file = args.work_queue_file
+        if self.queue_workers and not self.work_queue_file:
+            self.work_queue_file = MusicManagerConfig.get_state_file(WORK_QUEUE_FILE)
+        self.watch = args.watch
+        self.watch_interval_secs = args.watch_interval_secs
+        if self.watch and not self.src_dir:
+            raise ValueError("Watch mode requires a source directory: --src-dir or --use-project-input-files")
+        self.incremental = args.incremental
+        if self.incremental and self.watch:
+            raise ValueError("Watch mode only processes appended lines, it can't be used with --incremental")
+        self.resume = args.resume
+        self.sheet_page_size = args.sheet_page_size
+        self.sheet_read_workers = args.sheet_read_workers
+        self.library = not args.no_library
+        # Concurrently running Chrome instances can't share a profile directory
+        self.selenium_profile = SELENIUM_PROFILE_DIR
 
     def _validate(self, args, parser):
         if args.gsheet and args.gsheet_client_secret is None:
@@ -99,8 +157,24 @@ class AddNewMusicEntityCommandConfig:
 
         # Sanitize Facebook login data
         chars_to_remove = '\'\"'
-        self.fb_username = self.fb_username.lstrip(chars_to_remove).rstrip(chars_to_remove)
-        self.fb_password = self.fb_password.lstrip(chars_to_remove).rstrip(chars_to_remove)
+        if self.has_facebook_credentials:
+            self.fb_username = self.fb_username.lstrip(chars_to_remove).rstrip(chars_to_remove)
+            self.fb_password = self.fb_password.lstrip(chars_to_remove).rstrip(chars_to_remove)
+        elif not MusicEntityCreatorFactory.is_offline(args):
+            # Without credentials the Facebook provider is left out, its links would not be resolved
+            self._validate_no_facebook_links()
+
+    def _validate_no_facebook_links(self):
+        for src_file in self.src_files:
+            with open(src_file) as f:
+                for line_no, line in enumerate(f, 1):
+                    if FACEBOOK_URL_FRAGMENT1 in line:
+                        raise ValueError("Facebook link found in {}:{}, Facebook credentials are required: "
+                                         "--fbuser and --fbpwd".format(src_file, line_no))
+
+    @property
+    def has_facebook_credentials(self):
+        return bool(self.fb_username and self.fb_password)
 
     def _determine_input_files(self, args):
         self.always_use_project_input_files = args.use_project_input_files
@@ -153,18 +227,19 @@ class AddNewMusicEntityCommandConfig:
             f"Source files: {self.src_files}\n"
         )
 
-    @staticmethod
-    def _choose_js_renderer(args) -> JavaScriptRenderer:
-        if hasattr(args, 'use_requests_html_for_js') and args.use_requests_html_for_js:
-            return JavaScriptRenderer.REQUESTS_HTML
-        return JavaScriptRenderer.SELENIUM
 
 
 class AddNewMusicEntityCommand(CommandAbs):
     def __init__(self, args, parser=None):
         super().__init__()
+        self.args = args
         self.config = AddNewMusicEntityCommandConfig(args, parser=parser)
         self.updates = List[GSheetUpdate]
+        self.duplicate_detectors: Dict[MusicEntityType, DuplicateDetector] = {}
+        self.input_index: InputFileIndex = None
+        self.input_filter: InputDuplicateFilter = None
+        self.link_index: LinkIndex = None
+        self.library: MusicLibrary = None
 
     @staticmethod
     def create_parser(subparsers):
@@ -186,24 +261,140 @@ class AddNewMusicEntityCommand(CommandAbs):
                             default=True,
                             help='Whether to detect and not add duplicate items',
                             required=False)
-        parser.add_argument('--fbpwd',
-                            help='Facebook password',
-                            required=True)
-        parser.add_argument('--fbuser',
-                            help='Facebook username',
-                            required=True)
-        parser.add_argument('--use-requests-html-for-js',
+        parser.add_argument('--title-similarity-threshold',
+                            type=float,
+                            default=DEFAULT_TITLE_SIMILARITY_THRESHOLD,
+                            help='Titles with at least this similarity to a title in the sheet are detected as '
+                                 'duplicates, e.g. titles only differing in dashes or brackets. '
+                                 '1 only matches titles differing in case and punctuation, 0 disables it. '
+                                 'Default is {}.'.format(DEFAULT_TITLE_SIMILARITY_THRESHOLD),
+                            required=False)
+        ContentProviderArguments.add_content_provider_arguments(parser, fb_credentials_required=False)
+        parser.add_argument('--workers',
+                            type=int,
+                            default=1,
+                            help='The number of input entities to resolve concurrently. Default is 1 (sequential).',
+                            required=False
+                            )
+        parser.add_argument('--link-workers',
+                            type=int,
+                            default=8,
+                            help='The number of links to resolve concurrently if --workers is greater than 1. '
+                                 'Default is 8.',
+                            required=False
+                            )
+        parser.add_argument('--provider-concurrency',
+                            action='append',
+                            default=[],
+                            metavar='PROVIDER=N',
+                            help='Concurrency limit of a content provider, e.g. youtube=4. Can be repeated.',
+                            required=False
+                            )
+        parser.add_argument('--parallel-browser',
+                            action='store_true',
+                            default=False,
+                            help='Whether to allow browser-bound providers (Facebook) to run concurrently. '
+                                 'By default, they are serialized.',
+                            required=False
+                            )
+        parser.add_argument('--no-cost-scheduling',
                             action='store_true',
                             default=False,
-                            help='Whether to use requests-html library for JS rendering. Otherwise, Selenium will be used.',
+                            help='Resolve input entities in input file order. '
+                                 'By default, entities with cheap links are resolved first '
+                                 'and entities with browser-bound links last.',
                             required=False
                             )
-        parser.add_argument('--fb-redirect-link-limit',
+        parser.add_argument('--streaming',
+                            action='store_true',
+                            default=False,
+                            help='Process input entities as a stream: rows are written in small batches '
+                                 'as entities are resolved, instead of after all links are resolved.',
+                            required=False
+                            )
+        parser.add_argument('--stream-queue-size',
+                            type=int,
+                            default=16,
+                            help='Maximum number of items buffered between two stages in streaming mode. '
+                                 'Default is 16.',
+                            required=False
+                            )
+        parser.add_argument('--stream-batch-size',
+                            type=int,
+                            default=20,
+                            help='Number of rows written to a sheet at once in streaming mode. Default is 20.',
+                            required=False
+                            )
+        parser.add_argument('--queue-workers',
+                            type=int,
+                            default=0,
+                            help='Resolve input entities with this many worker processes through a durable work queue. '
+                                 'An interrupted run continues where it stopped when it is started again. '
+                                 'Default is 0 (no work queue).',
+                            required=False
+                            )
+        parser.add_argument('--work-queue-file',
+                            type=str,
+                            help='SQLite file of the work queue. Default is a file in the project state directory.',
+                            required=False
+                            )
+        parser.add_argument('--work-queue-lease-secs',
+                            type=float,
+                            default=600.0,
+                            help='Work items claimed by a worker are handed out again if not finished within '
+                                 'this many seconds. Default is 600.',
+                            required=False
+                            )
+        parser.add_argument('--watch',
+                            action='store_true',
+                            default=False,
+                            help='Keep running and process lines appended to the input files of the source directory. '
+                                 'The browser, HTTP connections, sheet data and caches are kept between batches.',
+                            required=False
+                            )
+        parser.add_argument('--watch-interval-secs',
                             type=int,
                             default=10,
-                            help='The number of maximum Facebook redirect links to handle per post. Default is 10.',
+                            help='Polling interval of the source directory in watch mode. Default is 10.',
+                            required=False
+                            )
+        parser.add_argument('--incremental',
+                            action='store_true',
+                            default=False,
+                            help='Only parse and resolve input lines that were not processed by previous '
+                                 'incremental runs. Lines are marked as processed once their rows are written.',
                             required=False
                             )
+        parser.add_argument('--resume',
+                            action='store_true',
+                            default=False,
+                            help='Continue an interrupted run: entities resolved by the previous run are read from '
+                                 'the result journal instead of being resolved again. '
+                                 'Runs with --queue-workers continue from the work queue without this flag.',
+                            required=False
+                            )
+        parser.add_argument('--sheet-page-size',
+                            type=int,
+                            default=DEFAULT_PAGE_SIZE,
+                            help='The number of rows read from a sheet with one request. '
+                                 'Default is {}.'.format(DEFAULT_PAGE_SIZE),
+                            required=False
+                            )
+        parser.add_argument('--sheet-read-workers',
+                            type=int,
+                            default=DEFAULT_READ_WORKERS,
+                            help='The number of pages of rows read from a sheet in parallel. '
+                                 'Default is {}.'.format(DEFAULT_READ_WORKERS),
+                            required=False
+                            )
+        parser.add_argument('--no-library',
+                            action='store_true',
+                            default=False,
+                            help='Do not store resolved entities in the local music library',
+                            required=False
+                            )
+        HttpArguments.add_http_arguments(parser)
+        CacheArguments.add_cache_arguments(parser)
 
     @staticmethod
     def execute(args, parser=None):
@@ -212,26 +403,164 @@ class AddNewMusicEntityCommand(CommandAbs):
 
     def run(self, args):
         LOG.info(f"Starting to add new music entities. \n Config: {str(self.config)}")
-        config_reader: ParserConfigReader = ParserConfigReader.read_from_file(filename=self.config.parser_conf_json,
-                                                                              obj_data_class=ParserConfig,
-                                                                              config_type=GenericLineParserConfig)
-        LOG.info("Read project config: %s", pformat(config_reader.config))
-        parser = MusicEntityInputFileParser(config_reader)
+        parser = self._create_input_file_parser()
         sheets = parser.extended_config.parser_settings.sheet_settings.sheets
         # TODO Verify if ONLY ONE sheet object is defined per entity type!
         # TODO Verify if sheet object is defined only once (no duplicate sheet configs)
         gsheet_updates: Dict[MusicEntityType, GSheetUpdate] = self._init_gsheet_updates(sheets, parser.extended_config.fields, args.gsheet_client_secret)
 
-        parsed_objs = []
+        if self.config.library:
+            self.library = MusicLibrary(MusicManagerConfig.get_state_file(LIBRARY_FILE))
+            if self.config.operation_mode == OperationMode.GSHEET:
+                self._import_sheets_to_library(gsheet_updates)
+        if self.config.incremental:
+            self.input_index = InputFileIndex(MusicManagerConfig.get_state_file(INPUT_INDEX_FILE))
+        if self.config.duplicate_detection and self.config.operation_mode == OperationMode.GSHEET:
+            self.link_index = self._create_link_index(gsheet_updates)
+        if self.config.duplicate_detection and not self.config.watch:
+            self.input_filter = self._create_input_duplicate_filter(gsheet_updates)
+        if self.config.queue_workers:
+            self._run_with_work_queue(args, parser, gsheet_updates)
+        elif self.config.watch:
+            self._run_watch(parser, self._create_music_entity_creator(), gsheet_updates)
+        else:
+            self._run_with_journal(parser, gsheet_updates)
+        if self.input_index:
+            # Failed runs don't get here, their lines are processed again by the next run
+            self.input_index.commit()
+            self.input_index.close()
+        if self.link_index:
+            self.link_index.log_stats()
+            self.link_index.save()
+            self.link_index.close()
+        if self.library:
+            self.library.log_stats()
+            self.library.close()
+
+    def _run_with_journal(self, parser: MusicEntityInputFileParser,
+                          gsheet_updates: Dict[MusicEntityType, GSheetUpdate]):
+        """
+        Journals resolved entities, so an interrupted or failed run can be continued with --resume.
+        """
+        journal = ResultJournal(MusicManagerConfig.get_state_file(RESULT_JOURNAL_FILE), resume=self.config.resume)
+        music_entity_creator = self._create_music_entity_creator(journal=journal)
+        # SIGTERM stops the run the same way as Ctrl-C: pending work is cancelled and the journal is closed
+        signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+        try:
+            music_entities: List[GroupedMusicEntity] or None = None
+            try:
+                if self.config.streaming:
+                    self._run_streaming(self._iter_src_files(parser), music_entity_creator, gsheet_updates)
+                else:
+                    music_entities = music_entity_creator.create_music_entities(self._parse_src_files(parser))
+            finally:
+                # Closes the journal and writes the results bundle
+                music_entity_creator.close()
+            if music_entities is not None:
+                self._write_music_entities(music_entities, gsheet_updates)
+        except KeyboardInterrupt:
+            LOG.warning("Run interrupted, %d resolved entities are kept in the journal. "
+                        "Continue the run with --resume: %s", journal.get_count(), journal.path)
+            sys.exit(130)
+        finally:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    def _create_input_file_parser(self) -> MusicEntityInputFileParser:
+        cache = ParserConfigCache(MusicManagerConfig.get_state_file(PARSER_CONFIG_CACHE_FILE))
+        return MusicEntityInputFileParser.create(self.config.parser_conf_json, cache=cache)
+
+    def _iter_src_files(self, parser: MusicEntityInputFileParser) -> Iterator[Any]:
+        parsed_objs = self._iter_new_src_lines(parser) if self.input_index else self._iter_all_src_lines(parser)
+        if not self.input_filter:
+            yield from parsed_objs
+            return
+        # Known entities are dropped before any provider is called
+        yield from self.input_filter.filter(parsed_objs)
+        self.input_filter.log_stats()
+
+    def _iter_new_src_lines(self, parser: MusicEntityInputFileParser) -> Iterator[Any]:
+        for delta in self.input_index.get_new_lines(self.config.src_files):
+            # The parser returns one object per line
+            for obj, line_no in zip(self._parse_lines(parser, delta.lines), delta.line_numbers):
+                set_src_location(obj, delta.path, line_no)
+                yield obj
+
+    def _iter_all_src_lines(self, parser: MusicEntityInputFileParser) -> Iterator[Any]:
         for src_file in self.config.src_files:
-            parsed_objs.extend(parser.parse(src_file))
+            for line_no, obj in enumerate(parser.parse(src_file), 1):
+                set_src_location(obj, src_file, line_no)
+                yield obj
 
-        music_entity_creator = self._create_music_entity_creator()
-        music_entities: List[GroupedMusicEntity] = music_entity_creator.create_music_entities(parsed_objs)
+    @staticmethod
+    def _create_link_index(gsheet_updates: Dict[MusicEntityType, GSheetUpdate]) -> LinkIndex:
+        """
+        Creates the index of the links of every sheet, only rows appended since the last run are indexed.
+        """
+        link_index = LinkIndex(MusicManagerConfig.get_state_file(LINK_INDEX_FILE))
+        for update in gsheet_updates.values():
+            update.fetch_data_from_sheet()
+            objs_from_sheet = DataConverter.convert_rows_to_data(update, update.fields_obj)
+            link_index.sync_sheet(update.sheet.name,
+                                  [MusicEntityCreator.get_links_of_parsed_objs(obj) for obj in objs_from_sheet])
+        return link_index
+
+    def _import_sheets_to_library(self, gsheet_updates: Dict[MusicEntityType, GSheetUpdate]):
+        """
+        Adds the rows of the sheets that are not in the library yet, e.g. rows added by hand or before the library
+        existed.
+        Only rows appended to the sheets since the last import are added.
+        """
+        for update in gsheet_updates.values():
+            update.fetch_data_from_sheet()
+            rows: List[LibraryEntity or None] = []
+            for obj in DataConverter.convert_rows_to_data(update, update.fields_obj):
+                links = MusicEntityCreator.get_links_of_parsed_objs(obj)
+                rows.append(LibraryEntity(obj.title, update.entity_type.value, links,
+                                          provider=get_link_provider(links[0])) if links else None)
+            self.library.import_sheet_rows(update.sheet.name, rows)
+        LOG.info("Imported rows of sheets to the music library: %s", self.library.stats)
+        # Rows are written from parsed input lines, the library doesn't have every column of the sheets
+        unsynced = sum(counts["unsynced"] for counts in self.library.get_counts().values())
+        if unsynced:
+            LOG.warning("%d entities of the music library are not written to any sheet, e.g. entities of dry runs "
+                        "or failed writes. List them with: QUERY --unsynced", unsynced)
+
+    def _add_to_library(self, entities: List[GroupedMusicEntity]) -> List[int]:
+        if not self.library:
+            return []
+        return [e.id for e in self.library.add_all([self._to_library_entity(e) for e in entities])]
+
+    def _mark_synced_in_library(self, library_ids: List[int]):
+        # Rows of dry runs are not written, their entities are synced by a later run
+        if self.library and self.config.operation_mode == OperationMode.GSHEET:
+            self.library.mark_synced(library_ids)
+
+    def _to_library_entity(self, entity: GroupedMusicEntity) -> LibraryEntity:
+        first = entity.entities[0] if entity.entities else None
+        title = getattr(entity.data, "title", None) or (first.title if first else None)
+        links = sorted(entity.links) + MusicEntityCreator.get_links_of_parsed_objs(entity.data)
+        src_file, src_line = get_src_location(entity.data)
+        return LibraryEntity(title, entity.entity_type.value, links,
+                             provider=get_link_provider(links[0]) if links else None,
+                             duration_seconds=first.duration.orig_seconds if first else None,
+                             src_file=src_file,
+                             src_line=src_line)
+
+    @staticmethod
+    def _create_input_duplicate_filter(gsheet_updates: Dict[MusicEntityType, GSheetUpdate]) -> InputDuplicateFilter:
+        objs_from_sheets = []
+        for update in gsheet_updates.values():
+            update.fetch_data_from_sheet()
+            objs_from_sheets.extend(DataConverter.convert_rows_to_data(update, update.fields_obj))
+        return InputDuplicateFilter(objs_from_sheets)
+
+    def _parse_src_files(self, parser: MusicEntityInputFileParser) -> List[Any]:
+        return list(self._iter_src_files(parser))
 
+    def _write_music_entities(self, music_entities: List[GroupedMusicEntity],
+                              gsheet_updates: Dict[MusicEntityType, GSheetUpdate]):
         for me in music_entities:
             me.finalize_and_validate()
-        # TODO Run duplicate detection on parsed_objs OR music_entities before proceeding
 
         entity_types = [e for e in MusicEntityType]
         music_entities_by_type: Dict[MusicEntityType, List[GroupedMusicEntity]] = self._group_music_entities_by_type(music_entities, entity_types)
@@ -249,12 +578,228 @@ class AddNewMusicEntityCommand(CommandAbs):
             objs_from_sheet = DataConverter.convert_rows_to_data(update, update.fields_obj)
             entities: List[GroupedMusicEntity] = music_entities_by_type[update.entity_type]
             if self.config.duplicate_detection:
-                entities = self.filter_duplicates(objs_from_sheet, entities)
+                entities = self.filter_duplicates(objs_from_sheet, entities, self.config.title_similarity_threshold,
+                                                  link_index=self.link_index, sheet_name=update.sheet.name,
+                                                  library=self.library)
 
             update.rows = DataConverter.convert_data_to_rows(entities,
                                                              update.fields_obj,
                                                              update.col_indices_by_fields)
+            library_ids = self._add_to_library(entities)
+            self._update_google_sheet(update)
+            self._mark_synced_in_library(library_ids)
+
+    def _run_with_work_queue(self, args, parser: MusicEntityInputFileParser,
+                             gsheet_updates: Dict[MusicEntityType, GSheetUpdate]):
+        """
+        Enqueues parsed objects into the durable work queue and resolves them with worker processes.
+        Items resolved by a previous, interrupted run are not resolved again.
+        """
+        work_queue = self._create_work_queue()
+        work_queue.enqueue([parsed_entity_to_dict(obj) for obj in self._parse_src_files(parser)])
+        work_queue.expire_stuck_items()
+        LOG.info("Work queue status: %s", work_queue.get_counts())
+
+        if work_queue.has_unfinished_items():
+            self._run_queue_workers(args)
+            LOG.info("Work queue status after running workers: %s", work_queue.get_counts())
+
+        for item_id, payload, error in work_queue.get_failed_items():
+            LOG.error("Failed to resolve work item %d: %s. Error: %s", item_id, payload, error)
+
+        results = work_queue.get_results()
+        music_entities = [GroupedMusicEntity.from_dict(parsed_entity_from_dict(payload), result)
+                          for _, payload, result in results]
+        self._write_music_entities(music_entities, gsheet_updates)
+        work_queue.mark_consumed([item_id for item_id, _, _ in results])
+        work_queue.close()
+
+    def _run_queue_workers(self, args):
+        # Spawned processes don't inherit the Selenium driver, sessions or locks of this process
+        ctx = multiprocessing.get_context("spawn")
+        processes = []
+        for worker_id in range(self.config.queue_workers):
+            process = ctx.Process(target=run_queue_worker,
+                                  args=(args, MusicManagerConfig.PROJECT_OUT_ROOT, worker_id),
+                                  name="music-manager-worker-{}".format(worker_id))
+            process.start()
+            processes.append(process)
+        LOG.info("Started %d worker processes", len(processes))
+        for process in processes:
+            process.join()
+            if process.exitcode != 0:
+                LOG.error("Worker process '%s' exited with code: %s", process.name, process.exitcode)
+
+    def process_work_queue(self, worker_id: int):
+        # Reading the parser config creates the ParsedMusicEntity dataclass, needed to deserialize work items
+        self._create_input_file_parser()
+        self.config.selenium_profile = "{}-{}".format(self.config.selenium_profile, worker_id)
+        # Every worker writes its own results bundle
+        music_entity_creator = self._create_music_entity_creator(results_bundle_suffix="-worker-{}".format(worker_id))
+        work_queue = self._create_work_queue()
+        worker = get_worker_name(worker_id)
+        LOG.info("Worker '%s' started", worker)
+
+        try:
+            while True:
+                items: List[WorkItem] = work_queue.claim(worker, limit=self.config.resolver_config.workers)
+                if not items:
+                    break
+                parsed_objs = [parsed_entity_from_dict(item.payload) for item in items]
+                completed = set()
+                try:
+                    for idx, grouped_entity in music_entity_creator.iter_music_entities(parsed_objs):
+                        work_queue.complete(items[idx].id, grouped_entity.to_dict())
+                        completed.add(idx)
+                except Exception as e:
+                    LOG.exception("Worker '%s' failed to resolve work items", worker)
+                    for idx, item in enumerate(items):
+                        if idx not in completed:
+                            work_queue.fail(item, repr(e))
+            LOG.info("Worker '%s' finished, no more work items", worker)
+        finally:
+            music_entity_creator.close()
+            work_queue.close()
+
+    def _run_watch(self, parser: MusicEntityInputFileParser, music_entity_creator: MusicEntityCreator,
+                   gsheet_updates: Dict[MusicEntityType, GSheetUpdate]):
+        """
+        Watches the source directory and processes lines appended to input files, until interrupted.
+        The browser, HTTP connections, sheet data and caches of this process are reused by every batch.
+        """
+        watcher = InputFileWatcher(self.config.src_dir, MusicManagerConfig.get_state_file(WATCH_STATE_FILE))
+        LOG.info("Watching directory '%s' for new input lines, polling every %d seconds",
+                 self.config.src_dir, self.config.watch_interval_secs)
+        try:
+            while True:
+                changes: List[FileChange] = watcher.poll()
+                if changes:
+                    try:
+                        parsed_objs = [obj for change in changes for obj in self._parse_lines(parser, change.lines)]
+                        LOG.info("Processing %d new entities", len(parsed_objs))
+                        self._run_streaming(parsed_objs, music_entity_creator, gsheet_updates)
+                        watcher.commit()
+                    except Exception:
+                        # Offsets are not committed, the same lines are retried by the next poll
+                        LOG.exception("Failed to process new input lines")
+                else:
+                    # Files touched without new complete lines
+                    watcher.commit()
+                time.sleep(self.config.watch_interval_secs)
+        except KeyboardInterrupt:
+            LOG.info("Stopped watching directory '%s'", self.config.src_dir)
+        finally:
+            music_entity_creator.close()
+
+    @staticmethod
+    def _parse_lines(parser: MusicEntityInputFileParser, lines: List[str]) -> List[Any]:
+        # The line parser works on files
+        fd, tmp_path = tempfile.mkstemp(suffix=".txt")
+        try:
+            with os.fdopen(fd, "w") as f:
+                # Lines are split on newlines, a trailing newline would be parsed as one more, empty line
+                f.write("\n".join(lines))
+            return parser.parse(tmp_path)
+        finally:
+            os.remove(tmp_path)
+
+    def _create_work_queue(self) -> SQLiteWorkQueue:
+        return SQLiteWorkQueue(self.config.work_queue_file, lease_secs=self.config.work_queue_lease_secs)
+
+    def _run_streaming(self, parsed_objs: Iterable[Any], music_entity_creator: MusicEntityCreator,
+                       gsheet_updates: Dict[MusicEntityType, GSheetUpdate]):
+        """
+        Parses, resolves, de-duplicates and converts entities as a stream and writes rows in small batches,
+        so rows of resolved entities are written while other links are still being resolved.
+        """
+        LOG.info("Running in streaming mode. Queue size: %d, write batch size: %d",
+                 self.config.stream_queue_size, self.config.stream_batch_size)
+        # Resolution works on chunks, so the scheduler and the worker pool have enough work to order and parallelize
+        chunk_size = self.config.resolver_config.workers * 4
+        # Detectors are kept on the command, so in watch mode the sheets are only read once.
+        # Entities are only added to them once their rows are written, a failed batch is retried by the next run.
+        duplicate_detectors: Dict[MusicEntityType, DuplicateDetector] = self.duplicate_detectors
+        # Entities of this run that are not written yet, so later entities of the run are checked against them too
+        pending_detectors: Dict[MusicEntityType, DuplicateDetector] = {}
+        row_stats: Dict[MusicEntityType, RowStats] = {}
+
+        def resolve(parsed_objs):
+            for chunk in self._chunks(parsed_objs, chunk_size):
+                for _, grouped_entity in music_entity_creator.iter_music_entities(chunk):
+                    yield grouped_entity
+
+        def route(entities):
+            for entity in entities:
+                entity.finalize_and_validate()
+                if entity.entity_type == MusicEntityType.UNKNOWN:
+                    LOG.error("Unknown entity: %s", entity)
+                elif entity.entity_type == MusicEntityType.NOT_FOUND:
+                    LOG.error("Not found entity: %s", entity)
+                if entity.entity_type in gsheet_updates:
+                    yield gsheet_updates[entity.entity_type], entity
+
+        def dedup(items):
+            for update, entity in items:
+                if not self.config.duplicate_detection:
+                    yield update, entity
+                    continue
+                if update.entity_type not in duplicate_detectors:
+                    update.fetch_data_from_sheet()
+                    objs_from_sheet = DataConverter.convert_rows_to_data(update, update.fields_obj)
+                    duplicate_detectors[update.entity_type] = DuplicateDetector(
+                        objs_from_sheet, self.config.title_similarity_threshold,
+                        link_index=self.link_index, sheet_name=update.sheet.name, library=self.library)
+                if update.entity_type not in pending_detectors:
+                    pending_detectors[update.entity_type] = DuplicateDetector(
+                        [], self.config.title_similarity_threshold)
+                detector = duplicate_detectors[update.entity_type]
+                pending_detector = pending_detectors[update.entity_type]
+                if not detector.is_duplicate(entity) and not pending_detector.is_duplicate(entity):
+                    pending_detector.add(entity)
+                    yield update, entity
+
+        def convert(items):
+            for update, entity in items:
+                if update.entity_type not in row_stats:
+                    row_stats[update.entity_type] = RowStats([f.name for f in update.fields_obj.fields])
+                row, values_by_fields = DataConverter.convert_entity_to_row(entity, update.fields_obj,
+                                                                            update.col_indices_by_fields)
+                row_stats[update.entity_type].update(values_by_fields)
+                library_ids = self._add_to_library([entity])
+                yield update.entity_type, (entity, library_ids, row)
+
+        def write_rows(entity_type: MusicEntityType, items: List[Tuple[GroupedMusicEntity, List[int], List[str]]]):
+            update = gsheet_updates[entity_type]
+            update.rows = [row for _, _, row in items]
             self._update_google_sheet(update)
+            self._mark_synced_in_library([library_id for _, library_ids, _ in items for library_id in library_ids])
+            if entity_type in duplicate_detectors:
+                # Rows are not re-read from the sheet, later runs of watch mode are checked against written entities
+                for entity, _, _ in items:
+                    duplicate_detectors[entity_type].add(entity)
+
+        sink = WriteBehindSink(write_rows, batch_size=self.config.stream_batch_size)
+        pipeline = StreamingPipeline(queue_size=self.config.stream_queue_size)
+        try:
+            pipeline.run(parsed_objs,
+                         [("resolve", resolve), ("route", route), ("dedup", dedup), ("convert", convert)],
+                         sink)
+        finally:
+            for detector in list(duplicate_detectors.values()) + list(pending_detectors.values()):
+                detector.log_stats()
+            for stats in row_stats.values():
+                stats.print_stats()
+
+    @staticmethod
+    def _chunks(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
 
     def _update_google_sheet(self, update):
         if not update.header:
@@ -297,23 +842,46 @@ class AddNewMusicEntityCommand(CommandAbs):
                                   operation_mode=self.config.operation_mode,
                                   col_indices_by_fields=col_indices_by_fields)
             update.fields_obj = fields.get_view_by_field_names(update.sheet.fields)
+            if self.config.operation_mode == OperationMode.GSHEET:
+                update.sheet_reader = self._create_sheet_reader(update, gsheet_client_secret)
             gsheet_updates[sheet.entity_type] = update
 
         return gsheet_updates
 
-    def _create_music_entity_creator(self):
-        content_provider_classes = [Youtube, Facebook, Beatport, SoundCloud, Mixcloud]
-        urls_to_match = [m for cp in content_provider_classes for m in cp.url_matchers()]
-        fb_link_parser = FacebookLinkParser(urls_to_match, self.config.fb_redirect_link_limit)
-        fb_selenium = FacebookSelenium(self.config, fb_link_parser)
-        js_renderer = JSRenderer(self.config.js_renderer, fb_selenium)
-        # TODO dirty hack
-        HtmlParser.js_renderer = js_renderer
-        facebook = Facebook(self.config, js_renderer, fb_selenium, fb_link_parser)
-
-        content_providers = [Youtube(), facebook, Beatport(), SoundCloud(), Mixcloud()]
-        music_entity_creator = MusicEntityCreator(content_providers)
-        return music_entity_creator
+    def _create_sheet_reader(self, update: GSheetUpdate, gsheet_client_secret: str) -> PagedSheetReader:
+        columns: Dict[str, int] = {}
+        for f in update.fields_obj.fields:
+            if f.name in SHEET_DEDUP_FIELDS:
+                col_name = f.entity_field.name_in_sheet
+                columns[col_name] = update.col_indices_by_fields[col_name]
+        source = GspreadSheetSource(gsheet_client_secret, update.sheet.spreadsheet_name, update.sheet.worksheet_name)
+        snapshot_file = SHEET_SNAPSHOT_FILE.format(re.sub(r"\W+", "_", update.sheet.name))
+        return PagedSheetReader(source, columns,
+                                snapshot_path=MusicManagerConfig.get_state_file(snapshot_file),
+                                page_size=self.config.sheet_page_size,
+                                workers=self.config.sheet_read_workers)
+
+    def _create_music_entity_creator(self, results_bundle_suffix: str = "", journal: ResultJournal = None):
+        if not self.config.has_facebook_credentials:
+            LOG.warning("Facebook credentials are not specified, Facebook links won't be resolved")
+        MusicEntityCreatorFactory.configure_network(self.args, self.config.resolver_config)
+        MusicEntityCreatorFactory.configure_page_cache(self.args)
+        MusicEntityCreatorFactory.configure_snapshot_store(self.args)
+        MusicEntityCreatorFactory.configure_cassette(self.args)
+        metadata_cache = MusicEntityCreatorFactory.create_metadata_cache(self.args)
+        negative_cache = MusicEntityCreatorFactory.create_negative_cache(self.args)
+        # Watch mode runs until interrupted
+        results_bundle = MusicEntityCreatorFactory.create_results_bundle(self.args, CommandType.ADD_NEW_MUSIC_ENTITY,
+                                                                         name_suffix=results_bundle_suffix,
+                                                                         rotating=self.config.watch)
+        return MusicEntityCreatorFactory.create(self.config, self.config.resolver_config,
+                                                cost_scheduling=self.config.cost_scheduling,
+                                                include_facebook=self.config.has_facebook_credentials,
+                                                metadata_cache=metadata_cache,
+                                                negative_cache=negative_cache,
+                                                offline=MusicEntityCreatorFactory.is_offline(self.args),
+                                                results_bundle=results_bundle,
+                                                journal=journal)
 
     def update_gsheet(self, update: GSheetUpdate):
         # TODO add back later
@@ -322,32 +890,21 @@ class AddNewMusicEntityCommand(CommandAbs):
 
     @staticmethod
     def filter_duplicates(objs_from_sheet: List[p.ParsedMusicEntity],
-                          entities: List[GroupedMusicEntity]) -> List[GroupedMusicEntity]:
-        if not objs_from_sheet:
+                          entities: List[GroupedMusicEntity],
+                          title_similarity_threshold: float = None,
+                          link_index: LinkIndex = None,
+                          sheet_name: str = None,
+                          library: MusicLibrary = None) -> List[GroupedMusicEntity]:
+        if not objs_from_sheet and not link_index and not library:
             return entities
-
-        titles_from_sheet = set([obj.title for obj in objs_from_sheet])
-        links_from_sheet = set([l for obj in objs_from_sheet for l in MusicEntityCreator.get_links_of_parsed_objs(obj)])
-
-        filtered: List[GroupedMusicEntity] = []
-        duplicate_entities_by_title = []
-        duplicate_entities_by_link = []
-        for entity in entities:
-            if entity.title in titles_from_sheet:
-                LOG.debug("Detected duplicate by title: '%s'", entity.title)
-                duplicate_entities_by_title.append(entity)
-                continue
-
-            intersection = entity.links.intersection(links_from_sheet)
-            if intersection:
-                LOG.debug("Detected duplicate by links: '%s'", intersection)
-                duplicate_entities_by_link.append(entity)
-            else:
-                filtered.append(entity)
-
-        LOG.info("Found %d duplicates by title and %d duplicates by link",
-                 len(duplicate_entities_by_title), len(duplicate_entities_by_link))
-        return filtered
+        detector = DuplicateDetector(objs_from_sheet, title_similarity_threshold,
+                                     link_index=link_index, sheet_name=sheet_name, library=library)
+        entities = detector.filter(entities)
+        if link_index:
+            # Entities are written to the sheet, later sheets of the run are checked against them too
+            for entity in entities:
+                detector.add(entity)
+        return entities
 
     @staticmethod
     def _group_music_entities_by_type(music_entities: List[GroupedMusicEntity], entity_types: List[MusicEntityType]) -> Dict[MusicEntityType, List[GroupedMusicEntity]]:
@@ -377,16 +934,16 @@ class DataConverter:
         field_names = [field.name for field in fields_obj.fields]
         cls.row_stats: RowStats = RowStats(field_names)
         for entity in music_entities:
-            row, values_by_fields = DataConverter._convert_parsed_entity(entity, fields_obj, col_indices_by_sheet_name)
+            row, values_by_fields = DataConverter.convert_entity_to_row(entity, fields_obj, col_indices_by_sheet_name)
             DataConverter.update_row_stats(values_by_fields)
             sheet_list_of_rows.append(row)
         cls.row_stats.print_stats()
         return sheet_list_of_rows
 
     @classmethod
-    def _convert_parsed_entity(cls, entity: GroupedMusicEntity,
-                               fields_obj: Fields,
-                               col_indices_by_sheet_name: Dict[str, int]) -> p.ParsedMusicEntity:
+    def convert_entity_to_row(cls, entity: GroupedMusicEntity,
+                              fields_obj: Fields,
+                              col_indices_by_sheet_name: Dict[str, int]) -> p.ParsedMusicEntity:
         no_of_fields = len(fields_obj.fields)
         row: List[str] = [""] * no_of_fields
         values_by_fields: Dict[str, str] = {}
@@ -419,3 +976,24 @@ class DataConverter:
             obj = fields_obj.create_object_by_matches(obj_type=p.ParsedMusicEntity, matches=matches)
             res.append(obj)
         return res
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt("Received signal {}".format(signum))
+
+
+def run_queue_worker(args, project_out_root: str, worker_id: int):
+    """
+    Entry point of work queue worker processes.
+    """
+    MusicManagerConfig.PROJECT_OUT_ROOT = project_out_root
+    SimpleLoggingSetup.init_logger(
+        project_name=PROJECT_NAME,
+        logger_name_prefix=PROJECT_NAME,
+        execution_mode=ExecutionMode.PRODUCTION,
+        console_debug=args.debug,
+        postfix="{}-worker-{}".format(args.command, worker_id),
+        repos=None,
+    )
+    command = AddNewMusicEntityCommand(args)
+    command.process_work_queue(worker_id)
@@ -37,6 +37,12 @@ class Fields:
     all_fields: Dict[str, EntityField] = field(default_factory=dict)
     dataclass_fields = None
 
+    def __getstate__(self):
+        # Fields of the generated dataclass are not picklable, they are created again by post_init
+        state = dict(self.__dict__)
+        state.pop("dataclass_fields", None)
+        return state
+
     def post_init(self, fields: Dict[str, EntityField]):
         self.all_fields = fields
         self.init_by_fields(fields)
@@ -0,0 +1,166 @@
+import logging
+from typing import List, Set, Iterable, Iterator, Any, Dict
+
+from music_manager.commands.addnewentitiestosheet.link_index import LinkIndex
+from music_manager.commands.addnewentitiestosheet.music_entity_creator import GroupedMusicEntity, MusicEntityCreator
+from music_manager.commands.addnewentitiestosheet.title_index import TitleIndex, TitleMatch
+from music_manager.library.music_library import MusicLibrary
+from music_manager.net.urls import canonicalize_url, canonicalize_urls
+
+LOG = logging.getLogger(__name__)
+
+
+class DuplicateDetector:
+    """
+    Detects music entities that are already present in a sheet, by title or by any of their links.
+    Entities can be added after they are written, so later entities of the same run are checked against them too.
+    If a title similarity threshold is given, titles that only differ in punctuation, case or a few characters
+    are detected as duplicates too.
+    If a link index is given, links are checked against every sheet, not only against the sheet of the entity type.
+    If a music library is given, links of library entities that are synced to a sheet are duplicates too.
+    """
+    def __init__(self, objs_from_sheet: List, title_similarity_threshold: float = None,
+                 link_index: LinkIndex = None, sheet_name: str = None, library: MusicLibrary = None):
+        self.titles: Set[str] = set([obj.title for obj in objs_from_sheet])
+        self.title_index: TitleIndex or None = None
+        if title_similarity_threshold:
+            self.title_index = TitleIndex(title_similarity_threshold)
+            for title in self.titles:
+                if title:
+                    self.title_index.add(title)
+        self.links: Set[str] = set([canonicalize_url(l) for obj in objs_from_sheet
+                                    for l in MusicEntityCreator.get_links_of_parsed_objs(obj)])
+        self.duplicates_by_title: List[GroupedMusicEntity] = []
+        self.duplicates_by_link: List[GroupedMusicEntity] = []
+        self.similar_title_matches: List[TitleMatch] = []
+        self.link_index = link_index
+        self.sheet_name = sheet_name
+        self.library = library
+
+    def is_duplicate(self, entity: GroupedMusicEntity) -> bool:
+        title = self._get_title(entity)
+        if title and title in self.titles:
+            LOG.debug("Detected duplicate by title: '%s'", title)
+            self.duplicates_by_title.append(entity)
+            return True
+
+        match = self.title_index.find(title) if title and self.title_index else None
+        if match:
+            LOG.debug("Detected duplicate by similar title: '%s' ~ '%s'", match.title, match.matched_title)
+            self.duplicates_by_title.append(entity)
+            self.similar_title_matches.append(match)
+            return True
+
+        links = self._get_canonical_links(entity)
+        intersection = links.intersection(self.links)
+        if intersection:
+            LOG.debug("Detected duplicate by links: '%s'", intersection)
+            self.duplicates_by_link.append(entity)
+            return True
+
+        for link in links if self.link_index else []:
+            sheet_name = self.link_index.find(link)
+            if sheet_name:
+                LOG.debug("Detected duplicate by link in sheet '%s': '%s'", sheet_name, link)
+                self.duplicates_by_link.append(entity)
+                return True
+
+        for link in links if self.library else []:
+            library_entity = self.library.find_by_link(link)
+            # Unsynced entities of the library were never written to a sheet
+            if library_entity and library_entity.synced_at:
+                LOG.debug("Detected duplicate by link in the music library: '%s'", link)
+                self.duplicates_by_link.append(entity)
+                return True
+        return False
+
+    def add(self, entity: GroupedMusicEntity):
+        title = self._get_title(entity)
+        if title:
+            self.titles.add(title)
+            if self.title_index:
+                self.title_index.add(title)
+        links = self._get_canonical_links(entity)
+        self.links.update(links)
+        if self.link_index:
+            self.link_index.add_row(self.sheet_name, links)
+
+    def filter(self, entities: List[GroupedMusicEntity]) -> List[GroupedMusicEntity]:
+        filtered = [entity for entity in entities if not self.is_duplicate(entity)]
+        self.log_stats()
+        return filtered
+
+    @staticmethod
+    def _get_title(entity: GroupedMusicEntity) -> str or None:
+        # Rows of the sheet are written from the parsed object, the resolved title is only used if it has none
+        return getattr(entity.data, "title", None) or getattr(entity, "entity_title", None)
+
+    @staticmethod
+    def _get_canonical_links(entity: GroupedMusicEntity) -> Set[str]:
+        return set(canonicalize_urls(entity.links))
+
+    def log_stats(self):
+        LOG.info("Found %d duplicates by title and %d duplicates by link",
+                 len(self.duplicates_by_title), len(self.duplicates_by_link))
+        if self.similar_title_matches:
+            LOG.info("Duplicates by similar title (%d):\n%s", len(self.similar_title_matches),
+                     "\n".join("{:.2f} '{}' ~ '{}'".format(m.similarity, m.title, m.matched_title)
+                               for m in self.similar_title_matches))
+
+
+class InputDuplicateFilter:
+    """
+    Drops parsed objects before their links are resolved, if they are already present in one of the sheets
+    or repeat an earlier object of the same run, by title or by any of their links.
+    Links are compared by canonical URL and titles case-insensitively.
+    """
+    SHEET = "sheet"
+    INPUT = "input"
+
+    def __init__(self, objs_from_sheets: List):
+        # Titles and links mapped to where they were seen first
+        self.titles: Dict[str, str] = {}
+        self.links: Dict[str, str] = {}
+        self.dropped: Dict[str, int] = {self.SHEET: 0, self.INPUT: 0}
+        for obj in objs_from_sheets:
+            self._add(obj, self.SHEET)
+
+    def filter(self, parsed_objs: Iterable[Any]) -> Iterator[Any]:
+        for obj in parsed_objs:
+            seen_in = self._find(obj)
+            if seen_in:
+                self.dropped[seen_in] += 1
+            else:
+                self._add(obj, self.INPUT)
+                yield obj
+
+    def log_stats(self):
+        LOG.info("Dropped input entities before resolution. Already in sheets: %d, repeated in input: %d",
+                 self.dropped[self.SHEET], self.dropped[self.INPUT])
+
+    def _find(self, obj) -> str or None:
+        title = self._normalize_title(obj)
+        if title and title in self.titles:
+            LOG.debug("Dropping input entity, duplicate by title: '%s'", obj.title)
+            return self.titles[title]
+        for link in self._get_canonical_links(obj):
+            if link in self.links:
+                LOG.debug("Dropping input entity, duplicate by link: '%s'", link)
+                return self.links[link]
+        return None
+
+    def _add(self, obj, seen_in: str):
+        title = self._normalize_title(obj)
+        if title:
+            self.titles.setdefault(title, seen_in)
+        for link in self._get_canonical_links(obj):
+            self.links.setdefault(link, seen_in)
+
+    @staticmethod
+    def _normalize_title(obj) -> str or None:
+        title = getattr(obj, "title", None)
+        return title.strip().casefold() if title and title.strip() else None
+
+    @staticmethod
+    def _get_canonical_links(obj) -> Set[str]:
+        return {canonicalize_url(link) for link in MusicEntityCreator.get_links_of_parsed_objs(obj)}
@@ -0,0 +1,144 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Iterable
+
+LOG = logging.getLogger(__name__)
+# Number of fingerprints checked with one query
+LOOKUP_BATCH_SIZE = 500
+
+
+def get_line_fingerprint(line: str) -> int:
+    """
+    64 bit fingerprint of an input line, stored as a signed SQLite integer.
+    Collisions are negligible below billions of lines.
+    """
+    digest = hashlib.blake2b(line.strip().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+@dataclass
+class IndexedFileState:
+    size: int
+    mtime: float
+    content_hash: str
+
+
+@dataclass
+class InputFileDelta:
+    path: str
+    state: IndexedFileState
+    # Lines not processed by previous runs, in file order
+    lines: List[str] = field(default_factory=list)
+    fingerprints: List[int] = field(default_factory=list)
+    # 1-based line numbers of the lines in the file
+    line_numbers: List[int] = field(default_factory=list)
+
+
+class InputFileIndex:
+    """
+    Index of processed input files and lines, so incremental runs only parse and resolve new lines.
+    Files are skipped by size and mtime, or by content hash if they were only touched.
+    Lines of changed files are checked against the fingerprints of processed lines, so lines moved
+    between files or re-ordered are not processed again either.
+    Nothing is marked as processed until commit().
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._pending: List[InputFileDelta] = []
+        self.stats: Dict[str, int] = {"unchanged_files": 0, "touched_files": 0, "changed_files": 0,
+                                      "new_lines": 0, "processed_lines": 0}
+        self._conn = sqlite3.connect(db_path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS input_files ("
+                           "path TEXT PRIMARY KEY, "
+                           "size INTEGER NOT NULL, "
+                           "mtime REAL NOT NULL, "
+                           "content_hash TEXT NOT NULL)")
+        # Integer primary keys are stored in the table b-tree itself, 8 bytes per line plus page overhead
+        self._conn.execute("CREATE TABLE IF NOT EXISTS processed_lines (fingerprint INTEGER PRIMARY KEY)")
+
+    def get_new_lines(self, paths: Iterable[str]) -> List[InputFileDelta]:
+        """
+        Returns the files with lines that were not processed yet. Files without new lines are not returned.
+        """
+        self._pending = []
+        # Lines repeated in the input are only processed once
+        seen_fingerprints = set()
+        for path in paths:
+            delta = self._get_delta(path, seen_fingerprints)
+            if delta:
+                self._pending.append(delta)
+        LOG.info("Input file index stats: %s", self.stats)
+        return [d for d in self._pending if d.lines]
+
+    def commit(self):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for delta in self._pending:
+                    self._conn.execute("INSERT OR REPLACE INTO input_files(path, size, mtime, content_hash) "
+                                       "VALUES (?, ?, ?, ?)",
+                                       (delta.path, delta.state.size, delta.state.mtime, delta.state.content_hash))
+                    self._conn.executemany("INSERT OR IGNORE INTO processed_lines(fingerprint) VALUES (?)",
+                                           [(fp,) for fp in delta.fingerprints])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        LOG.info("Marked %d new lines of %d files as processed",
+                 sum(len(d.fingerprints) for d in self._pending), len(self._pending))
+        self._pending = []
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _get_delta(self, path: str, seen_fingerprints: set) -> InputFileDelta or None:
+        stat = os.stat(path)
+        row = self._conn.execute("SELECT size, mtime, content_hash FROM input_files WHERE path = ?",
+                                 (path,)).fetchone()
+        prev_state = IndexedFileState(*row) if row else None
+        if prev_state and prev_state.size == stat.st_size and prev_state.mtime == stat.st_mtime:
+            self.stats["unchanged_files"] += 1
+            return None
+
+        with open(path, "rb") as f:
+            data = f.read()
+        state = IndexedFileState(stat.st_size, stat.st_mtime, hashlib.blake2b(data).hexdigest())
+        delta = InputFileDelta(path, state)
+        if prev_state and prev_state.content_hash == state.content_hash:
+            self.stats["touched_files"] += 1
+            return delta
+
+        self.stats["changed_files"] += 1
+        numbered_lines = [(no, line) for no, line in enumerate(data.decode("utf-8").splitlines(), 1) if line.strip()]
+        lines = [line for _, line in numbered_lines]
+        fingerprints = [get_line_fingerprint(line) for line in lines]
+        processed = self._get_processed(fingerprints)
+        for (line_no, line), fp in zip(numbered_lines, fingerprints):
+            if fp in processed:
+                self.stats["processed_lines"] += 1
+            elif fp not in seen_fingerprints:
+                seen_fingerprints.add(fp)
+                delta.lines.append(line)
+                delta.fingerprints.append(fp)
+                delta.line_numbers.append(line_no)
+        self.stats["new_lines"] += len(delta.lines)
+        if delta.lines:
+            LOG.info("Found %d new lines in input file: %s", len(delta.lines), path)
+        return delta
+
+    def _get_processed(self, fingerprints: List[int]) -> set:
+        processed = set()
+        unique = list(set(fingerprints))
+        for i in range(0, len(unique), LOOKUP_BATCH_SIZE):
+            batch = unique[i:i + LOOKUP_BATCH_SIZE]
+            rows = self._conn.execute("SELECT fingerprint FROM processed_lines WHERE fingerprint IN ({})"
+                                      .format(",".join("?" * len(batch))), batch).fetchall()
+            processed.update(r[0] for r in rows)
+        return processed
@@ -0,0 +1,85 @@
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Any
+
+LOG = logging.getLogger(__name__)
+
+
+class ResultJournal:
+    """
+    Append-only journal of resolved entities, written as entities are resolved.
+    A resumed run reads the journal of the interrupted run and only resolves the entities missing from it.
+    Every entry is flushed when written, so the journal survives crashes and interrupts of the process.
+    """
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self.stats: Dict[str, int] = {"resumed": 0, "written": 0}
+        if resume:
+            # An entry cut by a crash is dropped, so new entries don't get appended to it
+            self._truncate(self._load())
+        elif os.path.exists(path):
+            LOG.info("Starting a new journal, results of the previous run are dropped: %s", path)
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    @staticmethod
+    def get_key(parsed_obj: Any) -> str:
+        values = json.dumps(dataclasses.asdict(parsed_obj), sort_keys=True, default=str)
+        return hashlib.sha1(values.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Dict[str, Any] or None:
+        result = self._results.get(key)
+        if result is not None:
+            self.stats["resumed"] += 1
+        return result
+
+    def append(self, key: str, result: Dict[str, Any]):
+        with self._lock:
+            self._file.write(json.dumps({"key": key, "result": result}) + "\n")
+            self._file.flush()
+            self._results[key] = result
+            self.stats["written"] += 1
+
+    def get_count(self) -> int:
+        return len(self._results)
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        LOG.info("Result journal stats: %s", self.stats)
+
+    def _load(self) -> int:
+        """
+        Loads the entries of the journal. Returns the size of the journal up to the end of the last complete entry.
+        """
+        if not os.path.exists(self.path):
+            LOG.warning("No journal to resume from, resolving every entity: %s", self.path)
+            return 0
+        size = 0
+        complete_size = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                size += len(line)
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("Entry is not terminated")
+                    entry = json.loads(line)
+                except ValueError:
+                    # The last entry may be cut by a crash
+                    LOG.warning("Skipping incomplete journal entry: %s", line.strip())
+                    continue
+                self._results[entry["key"]] = entry["result"]
+                complete_size = size
+        LOG.info("Loaded %d resolved entities from journal: %s", len(self._results), self.path)
+        return complete_size
+
+    def _truncate(self, size: int):
+        if os.path.exists(self.path) and os.path.getsize(self.path) > size:
+            LOG.info("Truncating incomplete entries at the end of the journal: %s", self.path)
+            os.truncate(self.path, size)
@@ -0,0 +1,224 @@
+import bisect
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from array import array
+from typing import Dict, Iterable, List
+
+from music_manager.net.urls import canonicalize_url
+
+LOG = logging.getLogger(__name__)
+INDEX_MAGIC = b"MMLINKIX"
+INDEX_VERSION = 1
+# Magic, version, number of bloom filter hashes, size of the bloom filter in bytes, number of links, size of sheets JSON
+HEADER_FORMAT = "<8sIIQQQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+# About 1% false positive rate
+BLOOM_BITS_PER_LINK = 10
+BLOOM_HASHES = 7
+MAX_SHEETS = 255
+
+
+def get_link_fingerprint(canonical_link: str) -> int:
+    """
+    64 bit fingerprint of a canonical link. Collisions are negligible below billions of links.
+    """
+    digest = hashlib.blake2b(canonical_link.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _get_bloom_bits(fingerprint: int, bloom_bits: int) -> Iterable[int]:
+    # Double hashing: the k hash functions are derived from the two halves of the fingerprint
+    h1 = fingerprint & 0xFFFFFFFF
+    h2 = (fingerprint >> 32) & 0xFFFFFFFF | 1
+    return ((h1 + i * h2) % bloom_bits for i in range(BLOOM_HASHES))
+
+
+def _pad(size: int) -> int:
+    return -size % 8
+
+
+class LinkIndex:
+    """
+    Index of the canonical links of every configured sheet, used for detecting duplicates across sheets.
+    The persisted index is a bloom filter in front of a sorted array of link fingerprints with the sheet of each link.
+    It is memory-mapped on load: lookups of links not in any sheet are answered by the bloom filter,
+    others by a binary search in the array, without reading the whole file.
+    Links added since the index was loaded are kept in memory until save().
+    The number of indexed rows is kept per sheet, so only rows appended to a sheet since the last run are indexed.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # Sheet names mapped to their id in the index file and their number of indexed rows
+        self._sheet_ids: Dict[str, int] = {}
+        self._row_counts: Dict[str, int] = {}
+        self._added: Dict[int, int] = {}
+        self._removed_sheet_ids = set()
+        self._file = None
+        self._mmap = None
+        self._bloom = b""
+        self._fingerprints: memoryview or List[int] = []
+        self._link_sheet_ids: memoryview or List[int] = []
+        self.stats: Dict[str, int] = {"lookups": 0, "bloom_negatives": 0, "false_positives": 0, "hits": 0}
+        self._load()
+
+    def __len__(self):
+        return len(self._fingerprints) + len(self._added)
+
+    def get_row_count(self, sheet_name: str) -> int:
+        return self._row_counts.get(sheet_name, 0)
+
+    def sync_sheet(self, sheet_name: str, links_by_row: List[Iterable[str]]):
+        """
+        Indexes the rows of the sheet that were appended since the last sync.
+        If the sheet has less rows than indexed, rows were deleted or moved: every row of the sheet is indexed again.
+        """
+        with self._lock:
+            indexed_rows = self._row_counts.get(sheet_name, 0)
+            if len(links_by_row) < indexed_rows:
+                LOG.info("Sheet '%s' has %d rows, less than the %d indexed rows. Indexing every row again.",
+                         sheet_name, len(links_by_row), indexed_rows)
+                self._remove_sheet(sheet_name)
+                indexed_rows = 0
+            for links in links_by_row[indexed_rows:]:
+                self._add_row(sheet_name, links)
+        LOG.info("Indexed %d new rows of sheet '%s'", max(len(links_by_row) - indexed_rows, 0), sheet_name)
+
+    def add_row(self, sheet_name: str, links: Iterable[str]):
+        with self._lock:
+            self._add_row(sheet_name, links)
+
+    def find(self, link: str) -> str or None:
+        """
+        Returns the name of the sheet that has the link, or None if no sheet has it.
+        """
+        fingerprint = get_link_fingerprint(canonicalize_url(link))
+        with self._lock:
+            self.stats["lookups"] += 1
+            sheet_id = self._added.get(fingerprint)
+            if sheet_id is None:
+                sheet_id = self._find_in_file(fingerprint)
+            if sheet_id is None:
+                return None
+            self.stats["hits"] += 1
+            return next(name for name, sid in self._sheet_ids.items() if sid == sheet_id)
+
+    def save(self):
+        with self._lock:
+            entries: Dict[int, int] = {fp: sid for fp, sid in zip(self._fingerprints, self._link_sheet_ids)
+                                       if sid not in self._removed_sheet_ids}
+            entries.update(self._added)
+            fingerprints = array("q", sorted(entries))
+            sheet_ids = array("B", (entries[fp] for fp in fingerprints))
+            bloom_bits = max(len(fingerprints) * BLOOM_BITS_PER_LINK, 64)
+            bloom_bits += _pad(bloom_bits)
+            bloom = bytearray(bloom_bits // 8)
+            for fp in fingerprints:
+                for bit in _get_bloom_bits(fp, bloom_bits):
+                    bloom[bit >> 3] |= 1 << (bit & 7)
+            sheets = json.dumps({name: [sid, self._row_counts.get(name, 0)]
+                                 for name, sid in self._sheet_ids.items()}).encode("utf-8")
+
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(struct.pack(HEADER_FORMAT, INDEX_MAGIC, INDEX_VERSION, BLOOM_HASHES, len(bloom),
+                                        len(fingerprints), len(sheets)))
+                    f.write(sheets + b"\0" * _pad(HEADER_SIZE + len(sheets)))
+                    f.write(bloom)
+                    f.write(fingerprints.tobytes())
+                    f.write(sheet_ids.tobytes())
+                self._close_file()
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            LOG.info("Saved link index with %d links of %d sheets: %s", len(fingerprints), len(self._sheet_ids),
+                     self.path)
+        self._load()
+
+    def close(self):
+        with self._lock:
+            self._close_file()
+
+    def log_stats(self):
+        LOG.info("Link index stats: %s", self.stats)
+
+    def _load(self):
+        with self._lock:
+            self._added = {}
+            self._removed_sheet_ids = set()
+            if not os.path.exists(self.path) or os.path.getsize(self.path) < HEADER_SIZE:
+                return
+            self._file = open(self.path, "rb")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, hashes, bloom_size, count, sheets_size = struct.unpack_from(HEADER_FORMAT, self._mmap)
+            if magic != INDEX_MAGIC or version != INDEX_VERSION or hashes != BLOOM_HASHES:
+                LOG.warning("Ignoring link index with unknown format, links of every sheet are indexed again: %s",
+                            self.path)
+                self._close_file()
+                return
+            offset = HEADER_SIZE
+            sheets = json.loads(self._mmap[offset:offset + sheets_size].decode("utf-8"))
+            self._sheet_ids = {name: sid for name, (sid, _) in sheets.items()}
+            self._row_counts = {name: row_count for name, (_, row_count) in sheets.items()}
+            offset += sheets_size + _pad(offset + sheets_size)
+            view = memoryview(self._mmap)
+            self._bloom = view[offset:offset + bloom_size]
+            offset += bloom_size
+            self._fingerprints = view[offset:offset + count * 8].cast("q")
+            offset += count * 8
+            self._link_sheet_ids = view[offset:offset + count]
+            LOG.info("Loaded link index with %d links of %d sheets: %s", count, len(self._sheet_ids), self.path)
+
+    def _close_file(self):
+        self._bloom = b""
+        self._fingerprints = []
+        self._link_sheet_ids = []
+        if self._mmap:
+            self._mmap.close()
+            self._mmap = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _find_in_file(self, fingerprint: int) -> int or None:
+        if not self._fingerprints:
+            return None
+        bloom_bits = len(self._bloom) * 8
+        for bit in _get_bloom_bits(fingerprint, bloom_bits):
+            if not self._bloom[bit >> 3] & (1 << (bit & 7)):
+                self.stats["bloom_negatives"] += 1
+                return None
+        idx = bisect.bisect_left(self._fingerprints, fingerprint)
+        if idx < len(self._fingerprints) and self._fingerprints[idx] == fingerprint:
+            sheet_id = self._link_sheet_ids[idx]
+            if sheet_id not in self._removed_sheet_ids:
+                return sheet_id
+        self.stats["false_positives"] += 1
+        return None
+
+    def _add_row(self, sheet_name: str, links: Iterable[str]):
+        sheet_id = self._get_sheet_id(sheet_name)
+        for link in links:
+            self._added[get_link_fingerprint(canonicalize_url(link))] = sheet_id
+        self._row_counts[sheet_name] = self._row_counts.get(sheet_name, 0) + 1
+
+    def _remove_sheet(self, sheet_name: str):
+        sheet_id = self._get_sheet_id(sheet_name)
+        self._removed_sheet_ids.add(sheet_id)
+        self._added = {fp: sid for fp, sid in self._added.items() if sid != sheet_id}
+        self._row_counts[sheet_name] = 0
+
+    def _get_sheet_id(self, sheet_name: str) -> int:
+        if sheet_name not in self._sheet_ids:
+            if len(self._sheet_ids) >= MAX_SHEETS:
+                raise ValueError("Link index supports at most {} sheets".format(MAX_SHEETS))
+            self._sheet_ids[sheet_name] = len(self._sheet_ids)
+        return self._sheet_ids[sheet_name]
@@ -1,11 +1,23 @@
 import logging
+import time
+from concurrent.futures import Executor, Future, as_completed
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Iterable, Dict, Any, Set
+from typing import List, Iterable, Dict, Any, Set, Iterator, Tuple
 
 from pythoncommons.string_utils import auto_str
 
+from music_manager.cache.cassette import Cassette
+from music_manager.cache.metadata_cache import MetadataCache, UrlMetadata
+from music_manager.cache.negative_cache import NegativeCache, FailureReason
+from music_manager.cache.results_bundle import ResultsBundle, LinkProvenance, ResultSource
+from music_manager.cache.snapshot_store import SnapshotNotFoundError
+from music_manager.commands.addnewentitiestosheet.journal import ResultJournal
+from music_manager.commands.addnewentitiestosheet.resolver import ResolverConfig, ConcurrentResolutionEngine, \
+    InlineExecutor, get_provider_name
+from music_manager.commands.addnewentitiestosheet.scheduler import CostAwareScheduler
 from music_manager.common import Duration, CLI_LOG
+from music_manager.net.urls import canonicalize_url
 from music_manager.services.services import URLResolutionServices
 
 LOG = logging.getLogger(__name__)
@@ -33,6 +45,20 @@ class MusicEntity:
         # return MusicEntityCreator.get_links_of_parsed_objs(self.data)
         return self.src_url
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "title": self.title,
+            "duration": self.duration.orig_seconds,
+            "url": self.url,
+            "src_url": self.src_url,
+            "entity_type": self.entity_type.value,
+        }
+
+    @staticmethod
+    def from_dict(values: Dict[str, Any]) -> "MusicEntity":
+        return MusicEntity(values["title"], Duration(values["duration"]), values["url"], values["src_url"],
+                           MusicEntityType(values["entity_type"]))
+
 
 @dataclass
 class GroupedMusicEntity:
@@ -46,6 +72,20 @@ class GroupedMusicEntity:
     def add(self, entity):
         self.entities.append(entity)
 
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the resolved entities. The parsed object (data) is serialized separately by the parser.
+        """
+        return {
+            "source_urls": list(self.source_urls),
+            "entities": [e.to_dict() for e in self.entities],
+        }
+
+    @staticmethod
+    def from_dict(data: Any, values: Dict[str, Any]) -> "GroupedMusicEntity":
+        entities = [MusicEntity.from_dict(e) for e in values["entities"]]
+        return GroupedMusicEntity(data, values["source_urls"], entities=entities)
+
     def finalize_and_validate(self):
         self._validate_entity_type()
         self._validate_title()
@@ -80,6 +120,15 @@ class IntermediateMusicEntity:
     def not_found(cls, src_url):
         return IntermediateMusicEntity("N/A", Duration.unknown(), MusicEntityType.NOT_FOUND, "N/A", src_url)
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "title": self.title,
+            "duration": self.duration.orig_seconds,
+            "type": self.type.value,
+            "url": self.url,
+            "src_url": self.src_url,
+        }
+
 
 @dataclass
 class IntermediateMusicEntities:
@@ -110,23 +159,113 @@ class IntermediateMusicEntities:
 
 
 class MusicEntityCreator:
-    def __init__(self, content_providers):
+    def __init__(self, content_providers, resolver_config: ResolverConfig = None,
+                 scheduler: CostAwareScheduler = None, metadata_cache: MetadataCache = None,
+                 negative_cache: NegativeCache = None, use_cached_metadata: bool = True,
+                 results_bundle: ResultsBundle = None, journal: ResultJournal = None,
+                 disabled_providers: Dict[str, List[str]] = None):
         self.content_providers = content_providers
+        # URL fragments of the providers left out from this run by provider name, their links are not failures
+        self.disabled_providers = disabled_providers if disabled_providers else {}
+        self.metadata_cache = metadata_cache
+        # When not set, the metadata cache is only updated, e.g. when metadata is extracted again from snapshots
+        self.use_cached_metadata = use_cached_metadata
+        self.negative_cache = negative_cache
+        self.results_bundle = results_bundle
+        self.journal = journal
+        self.resolver_config = resolver_config if resolver_config else ResolverConfig()
+        self.scheduler = scheduler
+        latency_listener = scheduler.record_latency if scheduler else None
+        self.engine = ConcurrentResolutionEngine(self.resolver_config, latency_listener=latency_listener)
 
     def create_music_entities(self, parsed_objs) -> List[GroupedMusicEntity]:
-        result: List[GroupedMusicEntity] = []
-        for obj in parsed_objs:
-            src_urls = MusicEntityCreator.get_links_of_parsed_objs(obj)
-            LOG.info("Found links from source file: %s", src_urls)
-            entities: IntermediateMusicEntities = IntermediateMusicEntities(src_urls)
-            intermediate_entities: IntermediateMusicEntities = self.check_links_against_providers(entities, src_urls, src_url="unknown", allow_emit=True)
-            # TODO Also group for same title / same URL --> e.g. file with duplicated lines
-            grouped_entity = MusicEntityCreator.create_from_intermediate_entities(obj, intermediate_entities)
-            CLI_LOG.info("Found links for: %s: %s", grouped_entity.source_urls, grouped_entity.entities)
-            result.append(grouped_entity)
+        parsed_objs = list(parsed_objs)
+        # Results are stored by input index so the result keeps the order of the input files
+        result: List[GroupedMusicEntity] = [None] * len(parsed_objs)
+        for idx, grouped_entity in self.iter_music_entities(parsed_objs):
+            result[idx] = grouped_entity
         LOG.debug("Created grouped music entities: %s", result)
         return result
 
+    def iter_music_entities(self, parsed_objs: List[Any]) -> Iterator[Tuple[int, GroupedMusicEntity]]:
+        """
+        Resolves parsed objects and yields (input index, grouped entity) pairs as soon as they are resolved.
+        Objects with a result in the journal are not resolved again, results of resolved objects are journaled.
+        """
+        if not self.journal:
+            yield from self._resolve_music_entities(parsed_objs)
+            return
+
+        keys = [ResultJournal.get_key(obj) for obj in parsed_objs]
+        pending: List[int] = []
+        for idx, obj in enumerate(parsed_objs):
+            result = self.journal.get(keys[idx])
+            if result is None:
+                pending.append(idx)
+            else:
+                yield idx, GroupedMusicEntity.from_dict(obj, result)
+        for pending_idx, grouped_entity in self._resolve_music_entities([parsed_objs[idx] for idx in pending]):
+            idx = pending[pending_idx]
+            self.journal.append(keys[idx], grouped_entity.to_dict())
+            yield idx, grouped_entity
+
+    def _resolve_music_entities(self, parsed_objs: List[Any]) -> Iterator[Tuple[int, GroupedMusicEntity]]:
+        order = self._get_resolution_order(parsed_objs)
+        try:
+            with self.engine.executors() as (entity_pool, link_pool):
+                if not self.resolver_config.concurrent:
+                    for idx in order:
+                        yield idx, self._create_music_entity(parsed_objs[idx], link_pool)
+                    return
+
+                futures: Dict[Future, int] = {entity_pool.submit(self._create_music_entity, parsed_objs[idx], link_pool): idx
+                                              for idx in order}
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+        finally:
+            if self.scheduler:
+                self.scheduler.save()
+
+    def _get_resolution_order(self, parsed_objs: List[Any]) -> List[int]:
+        if not self.scheduler:
+            return list(range(len(parsed_objs)))
+        return self.scheduler.order(parsed_objs, MusicEntityCreator.get_links_of_parsed_objs, self.find_provider)
+
+    def close(self):
+        for provider in self.content_providers:
+            provider.close()
+        for cache in (self.metadata_cache, self.negative_cache):
+            if cache:
+                cache.log_stats()
+                cache.close()
+        if self.results_bundle:
+            self.results_bundle.write()
+        if self.journal:
+            self.journal.close()
+        if Cassette.get_instance():
+            # Recorded cassettes are only complete once closed
+            Cassette.configure(None)
+
+    def find_provider(self, url: str):
+        url = canonicalize_url(url)
+        for provider in self.content_providers:
+            if provider.can_handle_url(url):
+                return provider
+        return None
+
+    def _create_music_entity(self, obj, link_pool: Executor) -> GroupedMusicEntity:
+        src_urls = MusicEntityCreator.get_links_of_parsed_objs(obj)
+        LOG.info("Found links from source file: %s", src_urls)
+        entities: IntermediateMusicEntities = IntermediateMusicEntities(src_urls)
+        intermediate_entities: IntermediateMusicEntities = self.check_links_against_providers(entities, src_urls, src_url="unknown", allow_emit=True, link_pool=link_pool)
+        if not intermediate_entities.entities:
+            # All links were dropped, e.g. their snapshots are missing when re-extracting
+            LOG.warning("None of the links could be resolved: %s", src_urls)
+            intermediate_entities.add(IntermediateMusicEntity.not_found(src_urls[0] if src_urls else None))
+        grouped_entity = MusicEntityCreator.create_from_intermediate_entities(obj, intermediate_entities)
+        CLI_LOG.info("Found links for: %s: %s", grouped_entity.source_urls, grouped_entity.entities)
+        return grouped_entity
+
     @staticmethod
     def create_from_intermediate_entities(obj, intermediate_entities: IntermediateMusicEntities) -> GroupedMusicEntity:
         src_urls = MusicEntityCreator.get_links_of_parsed_objs(obj)
@@ -144,31 +283,136 @@ class MusicEntityCreator:
         links = list(filter(None, links))
         return links
 
-    def check_links_against_providers(self, entities: IntermediateMusicEntities, links: Iterable[str], src_url: str, allow_emit=False) -> IntermediateMusicEntities:
-        for url in links:
+    def resolve_links(self, links: List[str]) -> List[IntermediateMusicEntity]:
+        """
+        Resolves links that are not part of a parsed object, emitting links of non-media providers.
+        Providers are called in the calling thread.
+        """
+        entities = IntermediateMusicEntities(links)
+        self.check_links_against_providers(entities, links, src_url=None, allow_emit=True)
+        return entities.entities
+
+    def check_links_against_providers(self, entities: IntermediateMusicEntities, links: Iterable[str], src_url: str,
+                                      allow_emit=False, link_pool: Executor = None) -> IntermediateMusicEntities:
+        if not link_pool:
+            link_pool = InlineExecutor()
+        futures: List[Future] = self._submit_links(links, src_url, allow_emit, link_pool)
+        for future in futures:
+            entity: IntermediateMusicEntity = future.result()
+            if entity:
+                entities.add(entity)
+        return entities
+
+    def _submit_links(self, links: Iterable[str], src_url: str, allow_emit: bool, link_pool: Executor) -> List[Future]:
+        futures: List[Future] = []
+        # Variants of the same link (short links, mobile hosts, tracking parameters) are routed and resolved as one
+        for url in dict.fromkeys(canonicalize_url(link) for link in links):
             link_handled = False
             for provider in self.content_providers:
                 LOG.debug("Checking if provider '%s' can handle link: %s", provider, url)
                 if provider.can_handle_url(url):
                     link_handled = True
                     if not provider.is_media_provider() and allow_emit:
-                        emitted_links: Dict[str, None] = provider.emit_links(url)
+                        if self._should_skip(url):
+                            futures.append(link_pool.submit(IntermediateMusicEntity.not_found, url))
+                            continue
+                        try:
+                            emitted_links: Dict[str, None] = self.engine.call_provider(provider, provider.emit_links,
+                                                                                       url)
+                        except SnapshotNotFoundError as e:
+                            LOG.warning("Skipping link: %s", e)
+                            continue
                         LOG.debug("Emitted links: %s", emitted_links)
                         for em_link in emitted_links.copy():
                             resolved_url = URLResolutionServices.resolve_url_with_services(em_link)
                             if resolved_url:
                                 emitted_links[resolved_url] = None
                                 del emitted_links[em_link]
-                        res: IntermediateMusicEntities = self.check_links_against_providers(entities, emitted_links, src_url=url, allow_emit=False)
-                        if not res.entities:
+                        # Emitted links of a post are fanned out to the link pool
+                        emitted_futures = self._submit_links(emitted_links, src_url=url, allow_emit=False, link_pool=link_pool)
+                        if not emitted_futures:
                             LOG.error("No valid links found for URL '%s'", url)
+                            self._record_failure(url, FailureReason.NO_LINKS, provider)
+                        else:
+                            self._record_success(url)
+                        futures.extend(emitted_futures)
                     else:
-                        entity: IntermediateMusicEntity = provider.create_intermediate_entity(url)
-                        if entity:
-                            entity.src_url = src_url
-                            entities.add(entity)
+                        futures.append(link_pool.submit(self._create_intermediate_entity, provider, url, src_url))
 
             if not link_handled:
+                disabled_provider = self._find_disabled_provider(url)
+                if disabled_provider:
+                    LOG.warning("Provider '%s' is disabled for this run, not resolving link: %s", disabled_provider, url)
+                    continue
                 # TODO Make a CLI option for this whether to store unknown links
                 LOG.error("Found link that none of the providers can handle: %s", url)
-        return entities
+                self._record_failure(url, FailureReason.UNKNOWN_PROVIDER)
+        return futures
+
+    def _find_disabled_provider(self, url: str) -> str or None:
+        for name, url_fragments in self.disabled_providers.items():
+            if any(fragment in url for fragment in url_fragments):
+                return name
+        return None
+
+    def _create_intermediate_entity(self, provider, url: str, src_url: str) -> IntermediateMusicEntity or None:
+        metadata = None
+        entity: IntermediateMusicEntity = self._get_cached_entity(url)
+        source = ResultSource.METADATA_CACHE
+        if not entity and self._should_skip(url):
+            entity = IntermediateMusicEntity.not_found(src_url)
+            source = ResultSource.NEGATIVE_CACHE
+        elif not entity:
+            try:
+                entity = self.engine.call_provider(provider, provider.create_intermediate_entity, url)
+            except SnapshotNotFoundError as e:
+                LOG.warning("Skipping link: %s", e)
+                return None
+            source = ResultSource.PROVIDER
+            metadata = self._create_metadata(provider, entity)
+            if metadata and self.metadata_cache:
+                self.metadata_cache.put(url, metadata)
+            if entity and entity.type == MusicEntityType.NOT_FOUND:
+                self._record_failure(url, FailureReason.NOT_FOUND, provider)
+            elif entity:
+                self._record_success(url)
+        if entity:
+            entity.src_url = src_url
+            self._add_to_results_bundle(provider, url, entity, source, metadata)
+        return entity
+
+    def _should_skip(self, url: str) -> bool:
+        return self.negative_cache is not None and self.negative_cache.should_skip(url)
+
+    def _record_failure(self, url: str, reason: FailureReason, provider=None):
+        if self.negative_cache:
+            self.negative_cache.record_failure(url, reason, get_provider_name(provider) if provider else None)
+
+    def _record_success(self, url: str):
+        if self.negative_cache:
+            self.negative_cache.record_success(url)
+
+    def _get_cached_entity(self, url: str) -> IntermediateMusicEntity or None:
+        if not self.metadata_cache or not self.use_cached_metadata:
+            return None
+        metadata = self.metadata_cache.get(url)
+        if not metadata:
+            return None
+        LOG.debug("Found cached metadata for URL '%s': %s", url, metadata)
+        return IntermediateMusicEntity(metadata.title, Duration(metadata.duration_seconds),
+                                       MusicEntityType(metadata.entity_type), metadata.url)
+
+    @staticmethod
+    def _create_metadata(provider, entity: IntermediateMusicEntity) -> UrlMetadata or None:
+        # Links that are not found now may become available later, they are not cached
+        if not entity or entity.type == MusicEntityType.NOT_FOUND:
+            return None
+        return UrlMetadata(entity.url, get_provider_name(provider), entity.title, entity.duration.orig_seconds,
+                           entity.type.value, time.time())
+
+    def _add_to_results_bundle(self, provider, url: str, entity: IntermediateMusicEntity, source: ResultSource,
+                               metadata: UrlMetadata):
+        if not self.results_bundle:
+            return
+        provenance = LinkProvenance(url, entity.src_url, get_provider_name(provider), source.value, time.time())
+        self.results_bundle.add(entity.to_dict(), provenance, metadata)
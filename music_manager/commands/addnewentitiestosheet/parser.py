@@ -1,21 +1,36 @@
+import dataclasses
 import logging
 import sys
-from dataclasses import make_dataclass
-from typing import Dict
+from dataclasses import make_dataclass, dataclass
+from pprint import pformat
+from typing import Dict, Any, Tuple
 
 from pythoncommons.file_parser.input_file_parser import DiagnosticConfig, GenericLineByLineParser
-from pythoncommons.file_parser.parser_config_reader import ParserConfigReader
+from pythoncommons.file_parser.parser_config_reader import ParserConfigReader, GenericLineParserConfig
 
 from music_manager.commands.addnewentitiestosheet.config import ParserConfig
+from music_manager.commands.addnewentitiestosheet.parser_config_cache import ParserConfigCache
 
 LOG = logging.getLogger(__name__)
 module = sys.modules[__name__]
 ParsedMusicEntity = None
+SRC_LOCATION_ATTR = "_src_location"
+
+
+@dataclass
+class CompiledParserConfig:
+    """
+    Parser config read, validated and post-initialized by MusicEntityInputFileParser.
+    Has the attributes of ParserConfigReader used by the parser.
+    """
+    config: GenericLineParserConfig
+    extended_config: ParserConfig
 
 
 class MusicEntityInputFileParser:
-    def __init__(self, config_reader: ParserConfigReader):
-        self._validate(config_reader)
+    def __init__(self, config_reader: ParserConfigReader or CompiledParserConfig, validate: bool = True):
+        if validate:
+            self._validate(config_reader)
         diagnostic_config = DiagnosticConfig(print_date_lines=True,
                                              print_multi_line_block_headers=True,
                                              print_multi_line_blocks=True)
@@ -29,6 +44,25 @@ class MusicEntityInputFileParser:
             self.generic_parser_config,
             diagnostic_config=diagnostic_config)
 
+    @staticmethod
+    def create(parser_conf_json: str, cache: ParserConfigCache = None) -> "MusicEntityInputFileParser":
+        """
+        Creates the parser from the compiled parser config of the cache if the config file did not change.
+        """
+        key = ParserConfigCache.get_key(parser_conf_json) if cache else None
+        compiled: CompiledParserConfig = cache.load(key) if cache else None
+        if compiled:
+            return MusicEntityInputFileParser(compiled, validate=False)
+
+        config_reader: ParserConfigReader = ParserConfigReader.read_from_file(filename=parser_conf_json,
+                                                                              obj_data_class=ParserConfig,
+                                                                              config_type=GenericLineParserConfig)
+        LOG.debug("Read project config: %s", pformat(config_reader.config))
+        parser = MusicEntityInputFileParser(config_reader)
+        if cache:
+            cache.save(key, CompiledParserConfig(parser.generic_parser_config, parser.extended_config))
+        return parser
+
     @staticmethod
     def _validate(config_reader):
         # Cross-check fields from parser config vs. Extended config
@@ -53,4 +87,27 @@ class MusicEntityInputFileParser:
                                                       line_to_obj_parser_func=self._create_parsed_entity_from_match_groups)
 
     def _create_parsed_entity_from_match_groups(self, matches: Dict[str, str]):
-        return self.extended_config.fields.create_object_by_matches(obj_type=ParsedMusicEntity, matches=matches)
\ No newline at end of file
+        return self.extended_config.fields.create_object_by_matches(obj_type=ParsedMusicEntity, matches=matches)
+
+
+def parsed_entity_to_dict(obj) -> Dict[str, Any]:
+    return dataclasses.asdict(obj)
+
+
+def set_src_location(obj, src_file: str, line_no: int):
+    # Not a dataclass field, so it is not part of parsed_entity_to_dict or the journal key
+    setattr(obj, SRC_LOCATION_ATTR, (src_file, line_no))
+
+
+def get_src_location(obj) -> Tuple[str, int] or Tuple[None, None]:
+    return getattr(obj, SRC_LOCATION_ATTR, (None, None))
+
+
+def parsed_entity_from_dict(values: Dict[str, Any]):
+    if not ParsedMusicEntity:
+        raise ValueError("ParsedMusicEntity is not created yet, parser config should be read first!")
+    # Fields of the generated dataclass are not init fields
+    obj = ParsedMusicEntity()
+    for k, v in values.items():
+        setattr(obj, k, v)
+    return obj
@@ -0,0 +1,62 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from importlib import metadata
+from typing import Any
+
+LOG = logging.getLogger(__name__)
+# Should be increased whenever the classes of the compiled parser config change
+PARSER_CONFIG_CACHE_VERSION = 1
+
+
+def _get_pythoncommons_version() -> str:
+    try:
+        return metadata.version("python-common-lib")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class ParserConfigCache:
+    """
+    Stores the compiled parser config (decoded, validated and post-initialized) in a pickle file,
+    keyed by the hash of the parser config file, so it is not compiled again by every invocation.
+    """
+    def __init__(self, cache_file: str):
+        self.cache_file = cache_file
+
+    @staticmethod
+    def get_key(parser_conf_json: str) -> str:
+        digest = hashlib.sha256()
+        with open(parser_conf_json, "rb") as f:
+            digest.update(f.read())
+        digest.update("{}:{}".format(PARSER_CONFIG_CACHE_VERSION, _get_pythoncommons_version()).encode("utf-8"))
+        return digest.hexdigest()
+
+    def load(self, key: str) -> Any or None:
+        if not os.path.exists(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file, "rb") as f:
+                cached_key, compiled = pickle.load(f)
+        except Exception:
+            # E.g. classes of the cached config changed, it is compiled again
+            LOG.warning("Failed to load compiled parser config from: %s", self.cache_file, exc_info=True)
+            return None
+        if cached_key != key:
+            LOG.info("Parser config changed, compiling it again")
+            return None
+        LOG.info("Loaded compiled parser config from: %s", self.cache_file)
+        return compiled
+
+    def save(self, key: str, compiled: Any):
+        # Concurrent invocations each write their own temporary file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.cache_file)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((key, compiled), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
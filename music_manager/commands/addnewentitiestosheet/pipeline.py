@@ -0,0 +1,141 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Iterator, List, Tuple, Any, Dict
+
+LOG = logging.getLogger(__name__)
+_END = object()
+POLL_INTERVAL_SECS = 0.5
+
+Stage = Tuple[str, Callable[[Iterator[Any]], Iterator[Any]]]
+
+
+class PipelineError(Exception):
+    pass
+
+
+class StreamingPipeline:
+    """
+    Runs generator stages in their own threads, joined by bounded queues.
+    A stage is a function that takes an iterator of input items and yields output items.
+    When a queue is full, the producing stage blocks (backpressure), so at most queue_size items
+    are buffered between two stages. The sink consumes the output of the last stage in the calling thread.
+    The first failure of any stage stops the whole pipeline and is re-raised from run().
+    Items that already reached the sink queue are still consumed by the sink after a failure.
+    """
+    def __init__(self, queue_size: int = 16):
+        self.queue_size = queue_size
+        self._stop = threading.Event()
+        self._sink_queue: queue.Queue or None = None
+        self._sink_finished = threading.Event()
+        self._error: BaseException or None = None
+        self._error_stage: str or None = None
+
+    def run(self, source: Iterable[Any], stages: List[Stage], sink: Callable[[Iterator[Any]], None]):
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(stages) + 1)]
+        self._sink_queue = queues[-1]
+        threads = [threading.Thread(target=self._feed, args=("source", iter(source), queues[0]),
+                                    name="pipeline-source", daemon=True)]
+        for idx, (name, stage_func) in enumerate(stages):
+            threads.append(threading.Thread(target=self._run_stage, args=(name, stage_func, queues[idx], queues[idx + 1]),
+                                            name="pipeline-" + name, daemon=True))
+        for t in threads:
+            t.start()
+
+        try:
+            sink(self._drain(queues[-1], until_end=True))
+        except BaseException as e:
+            self._fail("sink", e)
+        finally:
+            self._sink_finished.set()
+            for t in threads:
+                t.join()
+
+        if isinstance(self._error, KeyboardInterrupt):
+            # Interrupts are not failures of the pipeline, the caller handles them
+            raise self._error
+        if self._error:
+            raise PipelineError("Pipeline stage '{}' failed".format(self._error_stage)) from self._error
+
+    def _run_stage(self, name, stage_func, in_queue: queue.Queue, out_queue: queue.Queue):
+        self._feed(name, stage_func(self._drain(in_queue)), out_queue)
+
+    def _feed(self, name, items: Iterator[Any], out_queue: queue.Queue):
+        try:
+            for item in items:
+                if not self._put(out_queue, item):
+                    return
+        except BaseException as e:
+            self._fail(name, e)
+        finally:
+            self._put(out_queue, _END, force=True)
+
+    def _drain(self, in_queue: queue.Queue, until_end: bool = False) -> Iterator[Any]:
+        while until_end or not self._stop.is_set():
+            try:
+                item = in_queue.get(timeout=POLL_INTERVAL_SECS)
+            except queue.Empty:
+                continue
+            if item is _END:
+                return
+            yield item
+
+    def _put(self, out_queue: queue.Queue, item, force=False) -> bool:
+        # The sink reads its queue until the end, even after a failure
+        keep_trying = force or out_queue is self._sink_queue
+        while keep_trying or not self._stop.is_set():
+            try:
+                out_queue.put(item, timeout=POLL_INTERVAL_SECS)
+                return True
+            except queue.Full:
+                if self._stop.is_set() and (out_queue is not self._sink_queue or self._sink_finished.is_set()):
+                    # Nobody reads the queue anymore
+                    return False
+        return False
+
+    def _fail(self, stage_name: str, error: BaseException):
+        if not self._error:
+            LOG.error("Pipeline stage '%s' failed", stage_name, exc_info=error)
+            self._error = error
+            self._error_stage = stage_name
+        self._stop.set()
+
+
+class WriteBehindSink:
+    """
+    Collects (key, row) pairs and writes them in small batches per key.
+    A batch is written when it reaches batch_size rows or when flush_interval_secs passed since the last write,
+    and all remaining rows are written when the input is exhausted.
+    """
+    def __init__(self, write_func: Callable[[Any, List[Any]], None], batch_size: int = 20,
+                 flush_interval_secs: float = 30.0):
+        self.write_func = write_func
+        self.batch_size = batch_size
+        self.flush_interval_secs = flush_interval_secs
+        self._buffers: Dict[Any, List[Any]] = {}
+        self._last_flush = time.monotonic()
+        self.written_rows = 0
+
+    def __call__(self, items: Iterator[Tuple[Any, Any]]):
+        for key, row in items:
+            self._buffers.setdefault(key, []).append(row)
+            if len(self._buffers[key]) >= self.batch_size:
+                self._flush(key)
+            elif time.monotonic() - self._last_flush > self.flush_interval_secs:
+                self.flush_all()
+        self.flush_all()
+        LOG.info("Write-behind sink finished, written rows: %d", self.written_rows)
+
+    def flush_all(self):
+        for key in list(self._buffers.keys()):
+            self._flush(key)
+
+    def _flush(self, key):
+        rows = self._buffers.pop(key, [])
+        self._last_flush = time.monotonic()
+        if not rows:
+            return
+        LOG.debug("Writing batch of %d rows for '%s'", len(rows), key)
+        self.write_func(key, rows)
+        self.written_rows += len(rows)
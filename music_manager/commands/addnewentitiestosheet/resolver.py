@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Callable, Any, Iterable, Iterator
+
+LOG = logging.getLogger(__name__)
+
+
+@dataclass
+class ResolverConfig:
+    # Number of parsed objects (input lines) resolved concurrently
+    workers: int = 1
+    # Number of links resolved concurrently across all parsed objects
+    link_workers: int = 8
+    # Concurrency limit per provider, keyed by provider name, e.g. {"youtube": 4}
+    provider_limits: Dict[str, int] = field(default_factory=dict)
+    # Browser-bound providers (Selenium) are limited to one concurrent call unless this is set
+    parallel_browser: bool = False
+
+    def __post_init__(self):
+        if self.workers < 1 or self.link_workers < 1:
+            raise ValueError("Number of workers should be at least 1. Workers: {}, link workers: {}"
+                             .format(self.workers, self.link_workers))
+
+    @property
+    def concurrent(self):
+        return self.workers > 1
+
+    @staticmethod
+    def parse_provider_limits(raw_limits: List[str]) -> Dict[str, int]:
+        limits = {}
+        if not raw_limits:
+            return limits
+        for raw_limit in raw_limits:
+            if "=" not in raw_limit:
+                raise ValueError("Invalid provider concurrency '{}'. Expected format: PROVIDER=N".format(raw_limit))
+            provider_name, limit = raw_limit.split("=", 1)
+            limit = int(limit)
+            if limit < 1:
+                raise ValueError("Provider concurrency should be at least 1, got: {}".format(raw_limit))
+            limits[provider_name.strip().lower()] = limit
+        return limits
+
+
+def get_provider_name(provider) -> str:
+    return type(provider).__name__.lower()
+
+
+class InlineExecutor(Executor):
+    """
+    Executor that runs the submitted callable immediately in the caller's thread.
+    Used for sequential resolution so the same code path serves both sequential and concurrent modes.
+    """
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class ProviderSlots:
+    def __init__(self, config: ResolverConfig):
+        self.config = config
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self, provider):
+        semaphore = self._get_semaphore(provider)
+        with semaphore:
+            yield
+
+    def get_limit(self, provider) -> int:
+        name = get_provider_name(provider)
+        if name in self.config.provider_limits:
+            return self.config.provider_limits[name]
+        if provider.is_browser_bound() and not self.config.parallel_browser:
+            return 1
+        return self.config.link_workers
+
+    def _get_semaphore(self, provider) -> threading.BoundedSemaphore:
+        name = get_provider_name(provider)
+        with self._lock:
+            if name not in self._semaphores:
+                limit = self.get_limit(provider)
+                LOG.debug("Concurrency limit of provider '%s': %d", name, limit)
+                self._semaphores[name] = threading.BoundedSemaphore(limit)
+            return self._semaphores[name]
+
+
+class ConcurrentResolutionEngine:
+    """
+    Resolves parsed objects with two thread pools.
+    The entity pool runs one task per parsed object: it emits links of non-media providers (e.g. Facebook posts)
+    and waits for the link tasks of its object.
+    The link pool runs one task per (media provider, link) pair. Link tasks never wait on other tasks,
+    so entity tasks can't starve the link pool.
+    """
+    def __init__(self, config: ResolverConfig, latency_listener: Callable[[Any, float], None] = None):
+        self.config = config
+        self.slots = ProviderSlots(config)
+        self.latency_listener = latency_listener
+
+    @contextmanager
+    def executors(self):
+        if not self.config.concurrent:
+            inline = InlineExecutor()
+            yield inline, inline
+            return
+
+        entity_pool = ThreadPoolExecutor(max_workers=self.config.workers, thread_name_prefix="entity-resolver")
+        link_pool = ThreadPoolExecutor(max_workers=self.config.link_workers, thread_name_prefix="link-resolver")
+        try:
+            yield entity_pool, link_pool
+        except BaseException:
+            entity_pool.shutdown(wait=False, cancel_futures=True)
+            link_pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        entity_pool.shutdown(wait=True)
+        link_pool.shutdown(wait=True)
+
+    def call_provider(self, provider, func, *args):
+        with self.slots.acquire(provider):
+            # Time spent waiting for the slot is not part of the latency of the provider
+            start = time.monotonic()
+            try:
+                return func(*args)
+            finally:
+                if self.latency_listener:
+                    self.latency_listener(provider, time.monotonic() - start)
+
+
+def map_bounded(executor: Executor, func: Callable[[Any], Any], items: Iterable[Any], max_in_flight: int,
+                preserve_order: bool = False) -> Iterator[Any]:
+    """
+    Like Executor.map, but reads the input lazily and keeps at most max_in_flight calls submitted,
+    so inputs of any length are processed in constant memory.
+    Results are yielded as the calls finish, or in input order with preserve_order.
+    In the latter case a slow call holds back the results behind it, but not more than max_in_flight of them.
+    """
+    if max_in_flight < 1:
+        raise ValueError("Max in-flight calls should be at least 1, got: {}".format(max_in_flight))
+    items = iter(items)
+    exhausted = False
+    pending_in_order = deque()
+    pending = set()
+
+    while True:
+        while not exhausted and len(pending) < max_in_flight:
+            try:
+                item = next(items)
+            except StopIteration:
+                exhausted = True
+                break
+            future = executor.submit(func, item)
+            pending.add(future)
+            if preserve_order:
+                pending_in_order.append(future)
+        if not pending:
+            return
+
+        if preserve_order:
+            future = pending_in_order.popleft()
+            pending.discard(future)
+            yield future.result()
+        else:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                yield future.result()
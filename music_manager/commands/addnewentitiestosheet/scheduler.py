@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, List, Callable, Any, Iterable
+
+from music_manager.commands.addnewentitiestosheet.resolver import get_provider_name
+
+LOG = logging.getLogger(__name__)
+
+# Rough relative cost of resolving one link, used until latencies are learned from previous runs.
+# Beatport and Mixcloud need a single GET, Youtube also calls yt-dlp, SoundCloud needs a JS render,
+# Facebook needs the logged-in Selenium browser and a full page load.
+DEFAULT_PROVIDER_COSTS_SECS: Dict[str, float] = {
+    "beatport": 0.5,
+    "mixcloud": 1.0,
+    "youtube": 2.0,
+    "soundcloud": 8.0,
+    "facebook": 30.0,
+}
+UNKNOWN_PROVIDER_COST_SECS = 0.0
+# Weight of the latest observation in the moving average of provider latencies
+EWMA_ALPHA = 0.2
+
+
+class ProviderCostModel:
+    """
+    Expected latency per provider, learned as an exponentially weighted moving average and persisted as JSON.
+    """
+    def __init__(self, state_file: str = None):
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, float] = dict(DEFAULT_PROVIDER_COSTS_SECS)
+        self.samples: Dict[str, int] = {}
+        self._load()
+
+    def _load(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            LOG.exception("Failed to load provider latencies from file: %s", self.state_file)
+            return
+        self.latencies.update(data.get("latencies", {}))
+        self.samples.update(data.get("samples", {}))
+        LOG.debug("Loaded provider latencies: %s", self.latencies)
+
+    def save(self):
+        if not self.state_file:
+            return
+        with self._lock:
+            data = {"latencies": self.latencies, "samples": self.samples}
+        # Write to a temp file first so an interrupted run can't leave a truncated file behind
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.state_file), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.state_file)
+        LOG.debug("Saved provider latencies: %s", data)
+
+    def record(self, provider_name: str, elapsed_secs: float):
+        with self._lock:
+            if provider_name in self.samples:
+                prev = self.latencies[provider_name]
+                self.latencies[provider_name] = (1 - EWMA_ALPHA) * prev + EWMA_ALPHA * elapsed_secs
+            else:
+                # The first real observation replaces the default estimate
+                self.latencies[provider_name] = elapsed_secs
+            self.samples[provider_name] = self.samples.get(provider_name, 0) + 1
+
+    def get_cost(self, provider) -> float:
+        if provider is None:
+            return UNKNOWN_PROVIDER_COST_SECS
+        with self._lock:
+            return self.latencies.get(get_provider_name(provider), UNKNOWN_PROVIDER_COST_SECS)
+
+
+class CostAwareScheduler:
+    """
+    Decides the order in which parsed objects are resolved.
+    Objects are classified by the providers of their links: cheap objects go first, so their rows are ready early,
+    and all objects needing the browser-bound providers are kept together at the end,
+    so they are processed back to back in one warm browser session.
+    The order of the results is not affected, only the order of the work.
+    """
+    def __init__(self, cost_model: ProviderCostModel):
+        self.cost_model = cost_model
+
+    def order(self, parsed_objs: List[Any], get_links: Callable[[Any], Iterable[str]],
+              find_provider: Callable[[str], Any]) -> List[int]:
+        keys = []
+        for idx, obj in enumerate(parsed_objs):
+            providers = [find_provider(link) for link in get_links(obj)]
+            browser_bound = any(p is not None and p.is_browser_bound() for p in providers)
+            cost = sum(self.cost_model.get_cost(p) for p in providers)
+            keys.append((browser_bound, cost, idx))
+        ordered = [k[2] for k in sorted(keys)]
+        LOG.debug("Scheduled order of parsed objects: %s", ordered)
+        return ordered
+
+    def record_latency(self, provider, elapsed_secs: float):
+        self.cost_model.record(get_provider_name(provider), elapsed_secs)
+
+    def save(self):
+        self.cost_model.save()
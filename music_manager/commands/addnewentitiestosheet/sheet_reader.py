@@ -0,0 +1,183 @@
+import json
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+LOG = logging.getLogger(__name__)
+SNAPSHOT_VERSION = 1
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_READ_WORKERS = 4
+# The first row of a sheet is the header
+FIRST_DATA_ROW = 2
+
+
+def get_column_letter(col_idx: int) -> str:
+    """
+    A1 notation letter of the 0-based column index: 0 -> A, 25 -> Z, 26 -> AA.
+    """
+    letters = ""
+    col_no = col_idx + 1
+    while col_no:
+        col_no, remainder = divmod(col_no - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+class SheetSource(ABC):
+    @abstractmethod
+    def get_modified_time(self) -> str:
+        pass
+
+    @abstractmethod
+    def get_row_count(self) -> int:
+        """
+        Number of rows of the sheet, including the header and empty rows.
+        """
+        pass
+
+    @abstractmethod
+    def read_columns(self, col_indices: List[int], first_row: int, last_row: int) -> List[List[str]]:
+        """
+        Returns the values of the columns between the 1-based first and last rows, one list per column.
+        Trailing empty cells of a column may be missing.
+        """
+        pass
+
+
+class GspreadSheetSource(SheetSource):
+    def __init__(self, client_secret: str, spreadsheet: str, worksheet: str):
+        # Imported here, so the reader can be used without the Google libraries
+        import gspread
+        self._spreadsheet = gspread.service_account(filename=client_secret).open(spreadsheet)
+        self._worksheet = self._spreadsheet.worksheet(worksheet)
+
+    def get_modified_time(self) -> str:
+        return self._spreadsheet.get_lastUpdateTime()
+
+    def get_row_count(self) -> int:
+        return self._worksheet.row_count
+
+    def read_columns(self, col_indices: List[int], first_row: int, last_row: int) -> List[List[str]]:
+        ranges = ["{col}{first}:{col}{last}".format(col=get_column_letter(idx), first=first_row, last=last_row)
+                  for idx in col_indices]
+        value_ranges = self._worksheet.batch_get(ranges, major_dimension="COLUMNS")
+        return [value_range[0] if value_range else [] for value_range in value_ranges]
+
+
+@dataclass
+class SheetSnapshot:
+    modified_time: str
+    columns: Dict[str, int]
+    # Values of the projected columns, in the order of the columns
+    rows: List[List[str]] = field(default_factory=list)
+
+
+class PagedSheetReader:
+    """
+    Reads every data row of a sheet in pages of rows, several pages in parallel, only fetching the given columns.
+    The rows are kept in a local snapshot: if the sheet was not modified since the snapshot, nothing is read,
+    otherwise only the rows from the last known row onward are read.
+    The last known row is read again, if it changed, rows were edited or deleted and every row is read again.
+    Rows are returned with the width of the sheet, columns that are not read are empty.
+    """
+    def __init__(self, source: SheetSource, columns: Dict[str, int], snapshot_path: str = None,
+                 page_size: int = DEFAULT_PAGE_SIZE, workers: int = DEFAULT_READ_WORKERS):
+        self.source = source
+        self.columns = columns
+        self.snapshot_path = snapshot_path
+        self.page_size = page_size
+        self.workers = workers
+        self.stats: Dict[str, int] = {"pages": 0, "rows_read": 0, "rows_from_snapshot": 0}
+
+    def read(self, width: int) -> List[List[str]]:
+        modified_time = self.source.get_modified_time()
+        snapshot = self._load_snapshot()
+        if snapshot and snapshot.modified_time == modified_time:
+            LOG.info("Sheet is not modified since the snapshot, using %d rows of the snapshot", len(snapshot.rows))
+            self.stats["rows_from_snapshot"] = len(snapshot.rows)
+            return self._to_sheet_rows(snapshot.rows, width)
+
+        known_rows = snapshot.rows if snapshot else []
+        rows = None
+        if known_rows:
+            new_rows = self._read_rows(first_idx=len(known_rows) - 1)
+            if new_rows and new_rows[0] == known_rows[-1]:
+                rows = known_rows + new_rows[1:]
+            else:
+                LOG.info("Last known row of the snapshot changed, reading every row of the sheet again")
+                known_rows = []
+        if rows is None:
+            rows = self._read_rows(first_idx=0)
+        self.stats["rows_from_snapshot"] = len(known_rows)
+        LOG.info("Read %d new rows of the sheet, %d rows are from the snapshot. Stats: %s",
+                 len(rows) - len(known_rows), len(known_rows), self.stats)
+        self._save_snapshot(SheetSnapshot(modified_time, self.columns, rows))
+        return self._to_sheet_rows(rows, width)
+
+    def _read_rows(self, first_idx: int) -> List[List[str]]:
+        """
+        Reads the rows from the 0-based data row index up to the last row of the sheet.
+        Empty rows are kept, except at the end of the sheet.
+        """
+        data_row_count = self.source.get_row_count() - (FIRST_DATA_ROW - 1)
+        col_indices = list(self.columns.values())
+        starts = list(range(first_idx, data_row_count, self.page_size))
+        rows: List[List[str]] = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sheet-reader") as pool:
+            pages = pool.map(lambda start: self._read_page(col_indices, start), starts)
+            for start, page in zip(starts, pages):
+                self.stats["pages"] += 1
+                self.stats["rows_read"] += len(page)
+                rows.extend(page)
+                # Empty cells at the end of the page are not returned, the page may end with empty rows
+                page_len = min(self.page_size, data_row_count - start)
+                rows.extend([""] * len(col_indices) for _ in range(page_len - len(page)))
+        while rows and not any(rows[-1]):
+            rows.pop()
+        return rows
+
+    def _read_page(self, col_indices: List[int], start_idx: int) -> List[List[str]]:
+        first_row = FIRST_DATA_ROW + start_idx
+        columns = self.source.read_columns(col_indices, first_row, first_row + self.page_size - 1)
+        page_len = max((len(column) for column in columns), default=0)
+        return [[column[i] if i < len(column) else "" for column in columns] for i in range(page_len)]
+
+    def _to_sheet_rows(self, rows: List[List[str]], width: int) -> List[List[str]]:
+        sheet_rows = []
+        for row in rows:
+            sheet_row = [""] * width
+            for col_idx, value in zip(self.columns.values(), row):
+                sheet_row[col_idx] = value
+            sheet_rows.append(sheet_row)
+        return sheet_rows
+
+    def _load_snapshot(self) -> SheetSnapshot or None:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path) as f:
+                values = json.load(f)
+        except ValueError:
+            LOG.warning("Ignoring corrupt sheet snapshot: %s", self.snapshot_path)
+            return None
+        if values.get("version") != SNAPSHOT_VERSION or values.get("columns") != self.columns:
+            LOG.info("Sheet snapshot has different columns, every row of the sheet is read: %s", self.snapshot_path)
+            return None
+        return SheetSnapshot(values["modified_time"], values["columns"], values["rows"])
+
+    def _save_snapshot(self, snapshot: SheetSnapshot):
+        if not self.snapshot_path:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.snapshot_path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": SNAPSHOT_VERSION, "modified_time": snapshot.modified_time,
+                           "columns": snapshot.columns, "rows": snapshot.rows}, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
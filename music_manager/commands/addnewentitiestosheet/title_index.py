@@ -0,0 +1,97 @@
+import logging
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Set, FrozenSet
+
+LOG = logging.getLogger(__name__)
+DEFAULT_TITLE_SIMILARITY_THRESHOLD = 0.9
+NGRAM_SIZE = 3
+# Dashes, brackets and other punctuation don't tell titles apart: "A - B (2022)" and "A – B [2022]" are the same
+NON_WORD_PATTERN = re.compile(r"[\W_]+")
+
+
+def normalize_title(title: str) -> str:
+    title = unicodedata.normalize("NFKC", title).casefold()
+    return NON_WORD_PATTERN.sub(" ", title).strip()
+
+
+def get_ngrams(normalized_title: str, n: int = NGRAM_SIZE) -> FrozenSet[str]:
+    # Padding makes short titles and the first and last characters count too
+    padded = " {} ".format(normalized_title)
+    if len(padded) <= n:
+        return frozenset([padded])
+    return frozenset(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+@dataclass
+class TitleMatch:
+    title: str
+    matched_title: str
+    similarity: float
+
+
+class TitleIndex:
+    """
+    Index of titles for finding near-duplicates by the Jaccard similarity of the character n-grams of normalized titles.
+    Candidates are looked up from an inverted index of n-grams: a title with at least the threshold similarity
+    must share at least one of the rarest n-grams of the queried title (prefix filtering),
+    so only short posting lists are read and only a few candidates are scored instead of every title.
+    """
+    def __init__(self, threshold: float = DEFAULT_TITLE_SIMILARITY_THRESHOLD):
+        if not 0 < threshold <= 1:
+            raise ValueError("Title similarity threshold should be in (0, 1], got: {}".format(threshold))
+        self.threshold = threshold
+        self.titles: List[str] = []
+        self.ngrams: List[FrozenSet[str]] = []
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        self.exact: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, title: str):
+        normalized = normalize_title(title)
+        if not normalized or normalized in self.exact:
+            return
+        idx = len(self.titles)
+        ngrams = get_ngrams(normalized)
+        self.titles.append(title)
+        self.ngrams.append(ngrams)
+        self.exact[normalized] = idx
+        for ngram in ngrams:
+            self.postings[ngram].append(idx)
+
+    def find(self, title: str) -> TitleMatch or None:
+        """
+        Returns the most similar indexed title if its similarity reaches the threshold.
+        """
+        normalized = normalize_title(title)
+        if not normalized:
+            return None
+        if normalized in self.exact:
+            return TitleMatch(title, self.titles[self.exact[normalized]], 1.0)
+
+        ngrams = get_ngrams(normalized)
+        size = len(ngrams)
+        # If J(x, y) >= t then y contains at least ceil(t * |x|) n-grams of x,
+        # so any |x| - ceil(t * |x|) + 1 n-grams of x contain a shared one
+        prefix_len = size - math.ceil(self.threshold * size) + 1
+        probe = sorted(ngrams, key=lambda ngram: len(self.postings.get(ngram, ())))[:prefix_len]
+        candidates: Set[int] = set()
+        for ngram in probe:
+            candidates.update(self.postings.get(ngram, ()))
+
+        min_size, max_size = self.threshold * size, size / self.threshold
+        best: TitleMatch or None = None
+        for idx in candidates:
+            other = self.ngrams[idx]
+            if not min_size <= len(other) <= max_size:
+                continue
+            common = len(ngrams & other)
+            similarity = common / (size + len(other) - common)
+            if similarity >= self.threshold and (not best or similarity > best.similarity):
+                best = TitleMatch(title, self.titles[idx], similarity)
+        return best
@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, asdict
+from typing import Dict, List
+
+LOG = logging.getLogger(__name__)
+INPUT_FILE_EXTENSION = ".txt"
+
+
+@dataclass
+class WatchedFileState:
+    size: int
+    mtime: float
+    # Byte offset up to which the file is processed, at a line boundary or at the end of the file
+    offset: int
+
+
+@dataclass
+class FileChange:
+    path: str
+    lines: List[str]
+    new_state: WatchedFileState
+
+
+class InputFileWatcher:
+    """
+    Polls a directory for new or changed input files and returns the lines appended since the last poll.
+    Input files are expected to only grow. If a file shrinks, it is treated as rewritten and read from the start.
+    A last line without a trailing newline is returned once the file did not change since the previous poll.
+    The processed offsets are only advanced by commit(), so lines of a failed batch are returned again.
+    """
+    def __init__(self, src_dir: str, state_file: str = None):
+        self.src_dir = src_dir
+        self.state_file = state_file
+        self.states: Dict[str, WatchedFileState] = {}
+        self._pending: List[FileChange] = []
+        self._load()
+
+    def _load(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        with open(self.state_file) as f:
+            self.states = {path: WatchedFileState(**state) for path, state in json.load(f).items()}
+        LOG.info("Loaded state of %d watched files from: %s", len(self.states), self.state_file)
+
+    def _save(self):
+        if not self.state_file:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.state_file), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({path: asdict(state) for path, state in self.states.items()}, f, indent=2)
+        os.replace(tmp_path, self.state_file)
+
+    def find_input_files(self) -> List[str]:
+        found = []
+        for dirpath, _, filenames in os.walk(self.src_dir):
+            for filename in filenames:
+                if filename.endswith(INPUT_FILE_EXTENSION):
+                    found.append(os.path.join(dirpath, filename))
+        return sorted(found)
+
+    def poll(self) -> List[FileChange]:
+        self._pending = []
+        for path in self.find_input_files():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            prev_state = self.states.get(path)
+            unchanged = prev_state is not None and prev_state.size == stat.st_size and prev_state.mtime == stat.st_mtime
+            if unchanged and prev_state.offset >= stat.st_size:
+                continue
+
+            offset = prev_state.offset if prev_state else 0
+            if stat.st_size < offset:
+                LOG.warning("Input file shrank, processing it from the start: %s", path)
+                offset = 0
+            lines, new_offset = self._read_lines(path, offset, include_unterminated=unchanged)
+            change = FileChange(path, lines, WatchedFileState(stat.st_size, stat.st_mtime, new_offset))
+            if lines:
+                LOG.info("Found %d new lines in input file: %s", len(lines), path)
+            self._pending.append(change)
+        return [c for c in self._pending if c.lines]
+
+    def commit(self):
+        for change in self._pending:
+            self.states[change.path] = change.new_state
+        self._pending = []
+        self._save()
+
+    @staticmethod
+    def _read_lines(path: str, offset: int, include_unterminated: bool = False):
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        # A line that may still be being written (no trailing newline yet) is picked up by a later poll
+        last_newline = data.rfind(b"\n")
+        if include_unterminated:
+            complete = data
+        elif last_newline == -1:
+            return [], offset
+        else:
+            complete = data[:last_newline + 1]
+        lines = [line for line in complete.decode("utf-8").splitlines() if line.strip()]
+        return lines, offset + len(complete)
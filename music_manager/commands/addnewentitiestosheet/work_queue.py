@@ -0,0 +1,165 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import List, Dict, Any, Iterable, Tuple
+
+LOG = logging.getLogger(__name__)
+
+
+class WorkItemStatus(Enum):
+    PENDING = "pending"
+    CLAIMED = "claimed"
+    DONE = "done"
+    FAILED = "failed"
+    # Results are written to the sheet, the item is kept so the same input is not resolved again
+    CONSUMED = "consumed"
+
+
+@dataclass
+class WorkItem:
+    id: int
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class SQLiteWorkQueue:
+    """
+    Durable work queue of parsed objects, shared by worker processes through a local SQLite file.
+    Workers claim items with a lease. Items whose lease expired (e.g. the worker was killed) can be claimed again,
+    until max_attempts is reached. Enqueueing the same payload again is a no-op, so an interrupted run can be resumed
+    by running it again with the same input.
+    """
+    def __init__(self, db_path: str, lease_secs: float = 600.0, max_attempts: int = 3):
+        self.db_path = db_path
+        self.lease_secs = lease_secs
+        self.max_attempts = max_attempts
+        self._conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS work_items ("
+                           "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                           "fingerprint TEXT UNIQUE NOT NULL, "
+                           "payload TEXT NOT NULL, "
+                           "status TEXT NOT NULL, "
+                           "attempts INTEGER NOT NULL DEFAULT 0, "
+                           "lease_until REAL, "
+                           "worker TEXT, "
+                           "result TEXT, "
+                           "error TEXT, "
+                           "updated_at REAL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS work_items_status ON work_items(status, lease_until)")
+
+    @staticmethod
+    def fingerprint(payload: Dict[str, Any]) -> str:
+        return hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def enqueue(self, payloads: Iterable[Dict[str, Any]]) -> int:
+        now = time.time()
+        rows = [(self.fingerprint(p), json.dumps(p), WorkItemStatus.PENDING.value, now) for p in payloads]
+        with self._transaction():
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO work_items(fingerprint, payload, status, updated_at) "
+                                   "VALUES (?, ?, ?, ?)", rows)
+            added = self._conn.total_changes - before
+        LOG.info("Enqueued %d new work items, %d were already in the queue", added, len(rows) - added)
+        return added
+
+    def claim(self, worker: str, limit: int = 1) -> List[WorkItem]:
+        now = time.time()
+        with self._transaction():
+            rows = self._conn.execute(
+                "SELECT id, payload, attempts FROM work_items "
+                "WHERE (status = ? OR (status = ? AND lease_until < ?)) AND attempts < ? "
+                "ORDER BY id LIMIT ?",
+                (WorkItemStatus.PENDING.value, WorkItemStatus.CLAIMED.value, now, self.max_attempts, limit)).fetchall()
+            for item_id, _, _ in rows:
+                self._conn.execute("UPDATE work_items SET status = ?, attempts = attempts + 1, lease_until = ?, "
+                                   "worker = ?, updated_at = ? WHERE id = ?",
+                                   (WorkItemStatus.CLAIMED.value, now + self.lease_secs, worker, now, item_id))
+        return [WorkItem(item_id, json.loads(payload), attempts + 1) for item_id, payload, attempts in rows]
+
+    def complete(self, item_id: int, result: Dict[str, Any]):
+        self._conn.execute("UPDATE work_items SET status = ?, result = ?, error = NULL, lease_until = NULL, "
+                           "updated_at = ? WHERE id = ?",
+                           (WorkItemStatus.DONE.value, json.dumps(result), time.time(), item_id))
+
+    def fail(self, item: WorkItem, error: str):
+        status = WorkItemStatus.FAILED if item.attempts >= self.max_attempts else WorkItemStatus.PENDING
+        LOG.warning("Work item %d failed (attempt %d/%d): %s", item.id, item.attempts, self.max_attempts, error)
+        self._conn.execute("UPDATE work_items SET status = ?, error = ?, lease_until = NULL, updated_at = ? "
+                           "WHERE id = ?", (status.value, error, time.time(), item.id))
+
+    def expire_stuck_items(self):
+        """
+        Returns items of dead workers, whose lease expired, to the pending state.
+        Items that used up all attempts are marked as failed.
+        """
+        now = time.time()
+        with self._transaction():
+            self._conn.execute("UPDATE work_items SET status = ?, updated_at = ? "
+                               "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                               (WorkItemStatus.FAILED.value, now, WorkItemStatus.CLAIMED.value, now,
+                                self.max_attempts))
+            self._conn.execute("UPDATE work_items SET status = ?, lease_until = NULL, updated_at = ? "
+                               "WHERE status = ? AND lease_until < ?",
+                               (WorkItemStatus.PENDING.value, now, WorkItemStatus.CLAIMED.value, now))
+
+    def has_unfinished_items(self) -> bool:
+        row = self._conn.execute("SELECT COUNT(*) FROM work_items WHERE status IN (?, ?)",
+                                 (WorkItemStatus.PENDING.value, WorkItemStatus.CLAIMED.value)).fetchone()
+        return row[0] > 0
+
+    def get_results(self) -> List[Tuple[int, Dict[str, Any], Dict[str, Any]]]:
+        """
+        Returns (id, payload, result) of finished items that are not consumed yet, in enqueue order.
+        """
+        rows = self._conn.execute("SELECT id, payload, result FROM work_items WHERE status = ? ORDER BY id",
+                                  (WorkItemStatus.DONE.value,)).fetchall()
+        return [(item_id, json.loads(payload), json.loads(result)) for item_id, payload, result in rows]
+
+    def get_failed_items(self) -> List[Tuple[int, Dict[str, Any], str]]:
+        rows = self._conn.execute("SELECT id, payload, error FROM work_items WHERE status = ? ORDER BY id",
+                                  (WorkItemStatus.FAILED.value,)).fetchall()
+        return [(item_id, json.loads(payload), error) for item_id, payload, error in rows]
+
+    def mark_consumed(self, item_ids: List[int]):
+        with self._transaction():
+            self._conn.executemany("UPDATE work_items SET status = ?, updated_at = ? WHERE id = ?",
+                                   [(WorkItemStatus.CONSUMED.value, time.time(), item_id) for item_id in item_ids])
+
+    def get_counts(self) -> Dict[str, int]:
+        rows = self._conn.execute("SELECT status, COUNT(*) FROM work_items GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self):
+        self._conn.close()
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._conn)
+
+
+class _ImmediateTransaction:
+    """
+    BEGIN IMMEDIATE takes the write lock up front, so two workers can't select the same item to claim.
+    """
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type:
+            self.conn.execute("ROLLBACK")
+        else:
+            self.conn.execute("COMMIT")
+        return False
+
+
+def get_worker_name(worker_id: int) -> str:
+    return "worker-{}-{}".format(worker_id, os.getpid())
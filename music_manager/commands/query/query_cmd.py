@@ -0,0 +1,104 @@
+import dataclasses
+import json
+import logging
+import sys
+from typing import List, TextIO
+
+from music_manager.commands_common import CommandType, CommandAbs
+from music_manager.library.music_library import MusicLibrary, LibraryEntity, LIBRARY_FILE, DEFAULT_SEARCH_LIMIT
+from music_manager.music_manager_config import MusicManagerConfig
+
+LOG = logging.getLogger(__name__)
+ENTITY_TYPES = ["mix", "track", "unknown", "not_found"]
+
+
+class QueryCommandConfig:
+    def __init__(self, args):
+        self.title = args.title
+        self.link = args.link
+        self.entity_type = args.entity_type
+        self.unsynced = args.unsynced
+        self.limit = args.limit
+        self.stats = args.stats
+        self.library_file = args.library_file if args.library_file else MusicManagerConfig.get_state_file(LIBRARY_FILE)
+        if self.title and self.link:
+            raise ValueError("Only one of --title and --link can be specified")
+
+    def __str__(self):
+        return "library: {}, title: {}, link: {}, type: {}, unsynced: {}, limit: {}".format(
+            self.library_file, self.title, self.link, self.entity_type, self.unsynced, self.limit)
+
+
+class QueryCommand(CommandAbs):
+    def __init__(self, args):
+        super().__init__()
+        self.config = QueryCommandConfig(args)
+
+    @staticmethod
+    def create_parser(subparsers):
+        parser = subparsers.add_parser(
+            CommandType.QUERY.name,
+            help="Query the local library of resolved music entities and print one JSON object per entity. "
+                 "Example: music_manager.py QUERY --title 'artist mix' --type mix",
+        )
+        parser.set_defaults(func=QueryCommand.execute)
+        parser.add_argument('--title',
+                            type=str,
+                            help='Full-text search of titles, every word has to match. '
+                                 'The last word also matches as a prefix.',
+                            required=False)
+        parser.add_argument('--link',
+                            type=str,
+                            help='Find the entity of a link, variants of the link are found too',
+                            required=False)
+        parser.add_argument('--type',
+                            dest='entity_type',
+                            choices=ENTITY_TYPES,
+                            help='Only list entities of this type',
+                            required=False)
+        parser.add_argument('--unsynced',
+                            action='store_true',
+                            default=False,
+                            help='Only list entities that are not written to a sheet yet',
+                            required=False)
+        parser.add_argument('--limit',
+                            type=int,
+                            default=DEFAULT_SEARCH_LIMIT,
+                            help='The maximum number of entities to print. Default is {}.'.format(DEFAULT_SEARCH_LIMIT),
+                            required=False)
+        parser.add_argument('--stats',
+                            action='store_true',
+                            default=False,
+                            help='Print the number of entities by type instead of entities',
+                            required=False)
+        parser.add_argument('--library-file',
+                            type=str,
+                            help="Library database. Default is the library in the state directory.",
+                            required=False)
+
+    @staticmethod
+    def execute(args, parser=None):
+        command = QueryCommand(args)
+        command.run(sys.stdout)
+
+    def run(self, out: TextIO):
+        LOG.info("Querying music library. Config: %s", self.config)
+        library = MusicLibrary(self.config.library_file)
+        try:
+            if self.config.stats:
+                out.write(json.dumps(library.get_counts()) + "\n")
+                return
+            for entity in self.query(library):
+                out.write(json.dumps(dataclasses.asdict(entity)) + "\n")
+        finally:
+            library.close()
+
+    def query(self, library: MusicLibrary) -> List[LibraryEntity]:
+        if self.config.link:
+            entity = library.find_by_link(self.config.link)
+            return [entity] if entity else []
+        if self.config.title:
+            return library.search(self.config.title, entity_type=self.config.entity_type,
+                                  unsynced=self.config.unsynced, limit=self.config.limit)
+        return library.get_entities(entity_type=self.config.entity_type, unsynced=self.config.unsynced,
+                                    limit=self.config.limit)
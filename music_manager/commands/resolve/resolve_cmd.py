@@ -0,0 +1,177 @@
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, TextIO
+
+from music_manager.commands.addnewentitiestosheet.resolver import ResolverConfig, map_bounded
+from music_manager.commands_common import CommandType, CommandAbs, HttpArguments, ContentProviderArguments, \
+    CacheArguments
+from music_manager.contentprovider.factory import MusicEntityCreatorFactory, ContentProviderConfig
+from music_manager.services.resolver_service import ResolverService
+
+LOG = logging.getLogger(__name__)
+STDIN = "-"
+COMMENT_PREFIX = "#"
+
+
+class ResolveCommandConfig:
+    def __init__(self, args):
+        self.input_file = args.input_file
+        self.workers = args.workers
+        self.max_in_flight = args.max_in_flight if args.max_in_flight else 4 * args.workers
+        self.preserve_order = args.preserve_order
+        self.result_cache_size = args.result_cache_size
+        self.revalidate_due = args.revalidate_due
+        self.revalidate_limit = args.revalidate_limit
+        if self.revalidate_due and args.no_negative_cache:
+            raise ValueError("--revalidate-due requires the negative cache, it can't be used with --no-negative-cache")
+        if self.revalidate_due and (args.re_extract or MusicEntityCreatorFactory.uses_cassette(args)):
+            raise ValueError("--revalidate-due requires the negative cache, it can't be used with --re-extract, "
+                             "--record-cassette or --replay-cassette")
+        # Each URL is resolved in a single thread, providers are allowed as many concurrent calls as there are workers
+        self.resolver_config = ResolverConfig(workers=1, link_workers=args.workers)
+        self.content_provider_config = ContentProviderConfig(
+            fb_username=args.fbuser,
+            fb_password=args.fbpwd,
+            fb_redirect_link_limit=args.fb_redirect_link_limit,
+            js_renderer=MusicEntityCreatorFactory.choose_js_renderer(args))
+
+    def __str__(self):
+        return "input: {}, workers: {}, max in-flight: {}, preserve order: {}, Facebook enabled: {}".format(
+            self.input_file, self.workers, self.max_in_flight, self.preserve_order,
+            self.content_provider_config.has_facebook_credentials)
+
+
+def read_urls(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith(COMMENT_PREFIX):
+            yield line
+
+
+class ResolveCommand(CommandAbs):
+    def __init__(self, args):
+        super().__init__()
+        self.args = args
+        self.config = ResolveCommandConfig(args)
+
+    @staticmethod
+    def create_parser(subparsers):
+        parser = subparsers.add_parser(
+            CommandType.RESOLVE.name,
+            help="Resolve URLs read from the standard input and print one JSON object per URL. "
+                 "Example: cat links.txt | music_manager.py RESOLVE --workers 16 > resolved.jsonl",
+        )
+        parser.set_defaults(func=ResolveCommand.execute)
+        parser.add_argument('--input-file',
+                            type=str,
+                            default=STDIN,
+                            help='File to read URLs from, one per line. Default is the standard input.',
+                            required=False)
+        parser.add_argument('--workers',
+                            type=int,
+                            default=8,
+                            help='The number of URLs resolved concurrently. Default is 8.',
+                            required=False)
+        parser.add_argument('--max-in-flight',
+                            type=int,
+                            help='The number of URLs read ahead of the output. Default is 4 times the workers.',
+                            required=False)
+        parser.add_argument('--preserve-order',
+                            action='store_true',
+                            default=False,
+                            help='Print results in input order. Otherwise, results are printed as they finish.',
+                            required=False)
+        parser.add_argument('--result-cache-size',
+                            type=int,
+                            default=10000,
+                            help='The number of resolved URLs remembered, repeated URLs are not resolved again. '
+                                 'Default is 10000.',
+                            required=False)
+        parser.add_argument('--revalidate-due',
+                            action='store_true',
+                            default=False,
+                            help='Instead of reading URLs, re-check the links of previous runs that failed '
+                                 'and whose retry backoff expired.',
+                            required=False)
+        parser.add_argument('--revalidate-limit',
+                            type=int,
+                            help='The maximum number of failed links to re-check with --revalidate-due.',
+                            required=False)
+        ContentProviderArguments.add_content_provider_arguments(parser, fb_credentials_required=False)
+        HttpArguments.add_http_arguments(parser)
+        CacheArguments.add_cache_arguments(parser)
+
+    @staticmethod
+    def execute(args, parser=None):
+        command = ResolveCommand(args)
+        command.run()
+
+    def run(self):
+        LOG.info("Starting to resolve URLs. Config: %s", self.config)
+        service = self._create_resolver_service()
+        try:
+            if self.config.revalidate_due:
+                self.revalidate_due_links(service, sys.stdout)
+            elif self.config.input_file == STDIN:
+                self.resolve(service, read_urls(sys.stdin), sys.stdout)
+            else:
+                with open(self.config.input_file) as f:
+                    self.resolve(service, read_urls(f), sys.stdout)
+        finally:
+            service.close()
+
+    def revalidate_due_links(self, service: ResolverService, out: TextIO):
+        """
+        Resolves the links of the negative cache whose retry backoff expired.
+        Links that resolve now are removed from the negative cache, the backoff of the others is increased.
+        """
+        entries = service.music_entity_creator.negative_cache.get_due_entries(self.config.revalidate_limit)
+        LOG.info("Revalidating %d failed links whose retry backoff expired", len(entries))
+        self.resolve(service, (entry.url for entry in entries), out)
+
+    def resolve(self, service: ResolverService, urls: Iterable[str], out: TextIO):
+        pool = ThreadPoolExecutor(max_workers=self.config.workers, thread_name_prefix="url-resolver")
+        start = time.monotonic()
+        count = 0
+        errors = 0
+        try:
+            results = map_bounded(pool, service.resolve_or_error, urls,
+                                  self.config.max_in_flight, preserve_order=self.config.preserve_order)
+            for result in results:
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+                count += 1
+                if "error" in result:
+                    errors += 1
+        except BrokenPipeError:
+            # The reader of the output is gone (e.g. piped to head), there is nothing left to do
+            LOG.info("Output is closed, stopping")
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        LOG.info("Resolved %d URLs in %.1f seconds, errors: %d, stats: %s",
+                 count, time.monotonic() - start, errors, service.get_stats())
+
+    def _create_resolver_service(self) -> ResolverService:
+        cp_config = self.config.content_provider_config
+        if not cp_config.has_facebook_credentials:
+            LOG.info("Facebook credentials are not specified, Facebook links won't be resolved")
+        MusicEntityCreatorFactory.configure_network(self.args, self.config.resolver_config)
+        MusicEntityCreatorFactory.configure_page_cache(self.args)
+        MusicEntityCreatorFactory.configure_snapshot_store(self.args)
+        MusicEntityCreatorFactory.configure_cassette(self.args)
+        metadata_cache = MusicEntityCreatorFactory.create_metadata_cache(self.args)
+        negative_cache = MusicEntityCreatorFactory.create_negative_cache(self.args)
+        results_bundle = MusicEntityCreatorFactory.create_results_bundle(self.args, CommandType.RESOLVE)
+        # URLs are resolved in worker threads, the headless browser can only be launched from the main thread
+        creator = MusicEntityCreatorFactory.create(cp_config, self.config.resolver_config,
+                                                   start_browser=True,
+                                                   include_facebook=cp_config.has_facebook_credentials,
+                                                   metadata_cache=metadata_cache,
+                                                   negative_cache=negative_cache,
+                                                   offline=MusicEntityCreatorFactory.is_offline(self.args),
+                                                   results_bundle=results_bundle)
+        return ResolverService(creator, batch_workers=1, result_cache_size=self.config.result_cache_size,
+                               result_cache_ttl_secs=float("inf"))
@@ -0,0 +1,256 @@
+import json
+import logging
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any
+from urllib.parse import urlparse, parse_qs
+
+from music_manager.commands.addnewentitiestosheet.music_entity_creator import MusicEntityCreator
+from music_manager.commands.addnewentitiestosheet.resolver import ResolverConfig
+from music_manager.commands_common import CommandType, CommandAbs, HttpArguments, ContentProviderArguments, \
+    CacheArguments
+from music_manager.contentprovider.factory import MusicEntityCreatorFactory, ContentProviderConfig
+from music_manager.services.resolver_service import ResolverService
+
+LOG = logging.getLogger(__name__)
+MAX_REQUEST_BODY_BYTES = 1024 * 1024
+
+
+class ServeCommandConfig:
+    def __init__(self, args):
+        self.host = args.host
+        self.port = args.port
+        self.batch_workers = args.batch_workers
+        self.max_batch_size = args.max_batch_size
+        self.result_cache_size = args.result_cache_size
+        self.result_cache_ttl_secs = args.result_cache_ttl_secs
+        self.allow_origin = args.allow_origin
+        self.resolver_config = ResolverConfig(workers=args.workers, link_workers=args.link_workers)
+        self.content_provider_config = ContentProviderConfig(
+            fb_username=args.fbuser,
+            fb_password=args.fbpwd,
+            fb_redirect_link_limit=args.fb_redirect_link_limit,
+            js_renderer=MusicEntityCreatorFactory.choose_js_renderer(args))
+
+    def __str__(self):
+        return "host: {}, port: {}, batch workers: {}, allowed origin: {}, Facebook enabled: {}".format(
+            self.host, self.port, self.batch_workers, self.allow_origin,
+            self.content_provider_config.has_facebook_credentials)
+
+
+class ResolverRequestHandler(BaseHTTPRequestHandler):
+    """
+    Endpoints:
+    GET /health
+    GET /resolve?url=<url>
+    POST /resolve with body {"url": "<url>"}
+    POST /resolve/batch with body {"urls": ["<url>", ...]}
+    """
+    server_version = "MusicManagerResolver/1.0"
+
+    @property
+    def service(self) -> ResolverService:
+        return self.server.service
+
+    def do_OPTIONS(self):
+        self.send_response(HTTPStatus.NO_CONTENT)
+        self._send_cors_headers()
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.end_headers()
+
+    def do_GET(self):
+        parsed_url = urlparse(self.path)
+        if parsed_url.path == "/health":
+            self._send_json(HTTPStatus.OK, {"status": "ok", "stats": self.service.get_stats()})
+        elif parsed_url.path == "/resolve":
+            urls = parse_qs(parsed_url.query).get("url")
+            if not urls:
+                self._send_error(HTTPStatus.BAD_REQUEST, "Missing query parameter: url")
+                return
+            self._handle(lambda: self.service.resolve(urls[0]))
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, "Unknown path: {}".format(parsed_url.path))
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        try:
+            body = self._read_json_body()
+        except ValueError as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+
+        if path == "/resolve":
+            if not isinstance(body.get("url"), str):
+                self._send_error(HTTPStatus.BAD_REQUEST, "Expected a JSON object with 'url'")
+                return
+            self._handle(lambda: self.service.resolve(body["url"]))
+        elif path == "/resolve/batch":
+            urls = body.get("urls")
+            if not isinstance(urls, list) or not all(isinstance(u, str) for u in urls):
+                self._send_error(HTTPStatus.BAD_REQUEST, "Expected a JSON object with a list of 'urls'")
+                return
+            self._handle(lambda: {"results": self.service.resolve_batch(urls)})
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, "Unknown path: {}".format(path))
+
+    def _handle(self, func):
+        try:
+            result = func()
+        except ValueError as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+        except Exception as e:
+            LOG.exception("Failed to handle request: %s", self.path)
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+            return
+        self._send_json(HTTPStatus.OK, result)
+
+    def _read_json_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_BODY_BYTES:
+            raise ValueError("Request body is too large: {} bytes".format(length))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as e:
+            raise ValueError("Invalid JSON body: {}".format(e))
+        if not isinstance(body, dict):
+            raise ValueError("Expected a JSON object as request body")
+        return body
+
+    def _send_error(self, status: HTTPStatus, message: str):
+        self._send_json(status, {"error": message})
+
+    def _send_json(self, status: HTTPStatus, data):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self._send_cors_headers()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_cors_headers(self):
+        # Pages of other origins can only call the service if allowed, e.g. '*' for a bookmarklet running on any page
+        if self.server.allow_origin:
+            self.send_header("Access-Control-Allow-Origin", self.server.allow_origin)
+
+    def log_message(self, format, *args):
+        LOG.debug("%s - %s", self.address_string(), format % args)
+
+
+class ResolverHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address, service: ResolverService, allow_origin: str = None):
+        super().__init__(server_address, ResolverRequestHandler)
+        self.service = service
+        self.allow_origin = allow_origin
+
+
+class ServeCommand(CommandAbs):
+    def __init__(self, args):
+        super().__init__()
+        self.args = args
+        self.config = ServeCommandConfig(args)
+
+    @staticmethod
+    def create_parser(subparsers):
+        parser = subparsers.add_parser(
+            CommandType.SERVE.name,
+            help="Start a local HTTP service that resolves links to music entities. "
+                 "Example: --port 8765",
+        )
+        parser.set_defaults(func=ServeCommand.execute)
+        parser.add_argument('--host',
+                            default='127.0.0.1',
+                            help='Address to listen on. Default is 127.0.0.1.',
+                            required=False)
+        parser.add_argument('--port',
+                            type=int,
+                            default=8765,
+                            help='Port to listen on. Default is 8765.',
+                            required=False)
+        parser.add_argument('--workers',
+                            type=int,
+                            default=1,
+                            help='The number of entities resolved concurrently. Default is 1.',
+                            required=False)
+        parser.add_argument('--link-workers',
+                            type=int,
+                            default=8,
+                            help='The number of links resolved concurrently per provider. Default is 8.',
+                            required=False)
+        parser.add_argument('--batch-workers',
+                            type=int,
+                            default=8,
+                            help='The number of URLs of a batch request resolved concurrently. Default is 8.',
+                            required=False)
+        parser.add_argument('--max-batch-size',
+                            type=int,
+                            default=100,
+                            help='The maximum number of URLs in a batch request. Default is 100.',
+                            required=False)
+        parser.add_argument('--result-cache-size',
+                            type=int,
+                            default=1000,
+                            help='The number of resolved URLs kept in memory. Default is 1000.',
+                            required=False)
+        parser.add_argument('--result-cache-ttl-secs',
+                            type=float,
+                            default=3600,
+                            help='Seconds a resolved URL is kept in memory. Default is 3600.',
+                            required=False)
+        parser.add_argument('--allow-origin',
+                            type=str,
+                            help="Origin of web pages allowed to call the service, sent as "
+                                 "Access-Control-Allow-Origin. Use '*' to allow a bookmarklet on any page. "
+                                 "By default web pages of other origins can't read the responses.",
+                            required=False)
+        ContentProviderArguments.add_content_provider_arguments(parser, fb_credentials_required=False)
+        HttpArguments.add_http_arguments(parser)
+        CacheArguments.add_cache_arguments(parser)
+
+    @staticmethod
+    def execute(args, parser=None):
+        command = ServeCommand(args)
+        command.run()
+
+    def run(self):
+        LOG.info("Starting resolver service. Config: %s", self.config)
+        service = ResolverService(self._create_music_entity_creator(),
+                                  batch_workers=self.config.batch_workers,
+                                  max_batch_size=self.config.max_batch_size,
+                                  result_cache_size=self.config.result_cache_size,
+                                  result_cache_ttl_secs=self.config.result_cache_ttl_secs)
+        server = ResolverHTTPServer((self.config.host, self.config.port), service,
+                                    allow_origin=self.config.allow_origin)
+        LOG.info("Listening on http://%s:%d", self.config.host, self.config.port)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            LOG.info("Stopping resolver service")
+        finally:
+            server.server_close()
+            service.close()
+
+    def _create_music_entity_creator(self) -> MusicEntityCreator:
+        cp_config = self.config.content_provider_config
+        if not cp_config.has_facebook_credentials:
+            LOG.warning("Facebook credentials are not specified, Facebook links won't be resolved")
+        MusicEntityCreatorFactory.configure_network(self.args, self.config.resolver_config)
+        MusicEntityCreatorFactory.configure_page_cache(self.args)
+        MusicEntityCreatorFactory.configure_snapshot_store(self.args)
+        MusicEntityCreatorFactory.configure_cassette(self.args)
+        metadata_cache = MusicEntityCreatorFactory.create_metadata_cache(self.args)
+        negative_cache = MusicEntityCreatorFactory.create_negative_cache(self.args)
+        results_bundle = MusicEntityCreatorFactory.create_results_bundle(self.args, CommandType.SERVE, rotating=True)
+        # Browsers are started up front, so requests never wait for a browser startup
+        return MusicEntityCreatorFactory.create(cp_config, self.config.resolver_config,
+                                                start_browser=True,
+                                                include_facebook=cp_config.has_facebook_credentials,
+                                                login_facebook=True,
+                                                metadata_cache=metadata_cache,
+                                                negative_cache=negative_cache,
+                                                offline=MusicEntityCreatorFactory.is_offline(self.args),
+                                                results_bundle=results_bundle)
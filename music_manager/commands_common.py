@@ -51,8 +51,194 @@ class GSheetArguments:
         return gsheet_group
 
 
+class ContentProviderArguments:
+    @staticmethod
+    def add_content_provider_arguments(parser, fb_credentials_required=False):
+        provider_group = parser.add_argument_group("content-providers", "Arguments for content providers")
+        provider_group.add_argument('--fbpwd',
+                                    help='Facebook password',
+                                    required=fb_credentials_required)
+        provider_group.add_argument('--fbuser',
+                                    help='Facebook username',
+                                    required=fb_credentials_required)
+        provider_group.add_argument('--use-requests-html-for-js',
+                                    action='store_true',
+                                    default=False,
+                                    help='Whether to use requests-html library for JS rendering. '
+                                         'Otherwise, Selenium will be used.',
+                                    required=False)
+        provider_group.add_argument('--fb-redirect-link-limit',
+                                    type=int,
+                                    default=10,
+                                    help='The number of maximum Facebook redirect links to handle per post. '
+                                         'Default is 10.',
+                                    required=False)
+        return provider_group
+
+
+class CacheArguments:
+    @staticmethod
+    def add_cache_arguments(parser):
+        cache_group = parser.add_argument_group("cache", "Arguments for caches of resolved links")
+
+        cache_group.add_argument(
+            "--no-metadata-cache",
+            dest="no_metadata_cache",
+            action="store_true",
+            default=False,
+            required=False,
+            help="Do not use the persistent cache of link titles and durations, resolve every link again",
+        )
+
+        cache_group.add_argument(
+            "--metadata-cache-memory-size",
+            dest="metadata_cache_memory_size",
+            type=int,
+            default=10000,
+            required=False,
+            help="The number of cached links also kept in memory. Default is 10000.",
+        )
+
+        cache_group.add_argument(
+            "--no-negative-cache",
+            dest="no_negative_cache",
+            action="store_true",
+            default=False,
+            required=False,
+            help="Retry links that failed in previous runs even if their retry backoff has not expired yet",
+        )
+
+        cache_group.add_argument(
+            "--page-cache-size-mb",
+            dest="page_cache_size_mb",
+            type=int,
+            default=64,
+            required=False,
+            help="Memory limit of fetched pages kept for reuse while resolving links, in megabytes. Default is 64.",
+        )
+
+        cache_group.add_argument(
+            "--save-snapshots",
+            dest="save_snapshots",
+            action="store_true",
+            default=False,
+            required=False,
+            help="Save every fetched and rendered page to the compressed snapshot store",
+        )
+
+        cache_group.add_argument(
+            "--snapshot-dir",
+            dest="snapshot_dir",
+            type=str,
+            required=False,
+            help="Directory of the snapshot store. Default is the 'snapshots' directory in the state directory.",
+        )
+
+        cache_group.add_argument(
+            "--re-extract",
+            dest="re_extract",
+            action="store_true",
+            default=False,
+            required=False,
+            help="Run the extraction logic of content providers on stored snapshots only, without any network access. "
+                 "Links without a snapshot are skipped.",
+        )
+
+        cache_group.add_argument(
+            "--record-cassette",
+            dest="record_cassette",
+            type=str,
+            required=False,
+            help="Record every page loaded during the run to this cassette file, so the run can be replayed offline",
+        )
+
+        cache_group.add_argument(
+            "--replay-cassette",
+            dest="replay_cassette",
+            type=str,
+            required=False,
+            help="Replay the pages recorded to this cassette file without any network access. "
+                 "The run fails on any page that is not in the cassette.",
+        )
+
+        cache_group.add_argument(
+            "--no-results-bundle",
+            dest="no_results_bundle",
+            action="store_true",
+            default=False,
+            required=False,
+            help="Do not write the resolved links of the run to a command data zip",
+        )
+
+        cache_group.add_argument(
+            "--import-bundle",
+            dest="import_bundles",
+            action="append",
+            type=str,
+            required=False,
+            help="Import the metadata of resolved links from a command data zip of another run into the metadata "
+                 "cache before resolving links. Can be specified multiple times.",
+        )
+        return cache_group
+
+
+class HttpArguments:
+    @staticmethod
+    def add_http_arguments(parser):
+        http_group = parser.add_argument_group("http", "Arguments for the shared HTTP client of content providers")
+
+        http_group.add_argument(
+            "--http-connect-timeout",
+            dest="http_connect_timeout",
+            type=float,
+            default=5.0,
+            required=False,
+            help="Connect timeout of HTTP requests, in seconds. Default is 5.",
+        )
+
+        http_group.add_argument(
+            "--http-read-timeout",
+            dest="http_read_timeout",
+            type=float,
+            default=30.0,
+            required=False,
+            help="Read timeout of HTTP requests, in seconds. Default is 30.",
+        )
+
+        http_group.add_argument(
+            "--disable-rate-limiter",
+            dest="disable_rate_limiter",
+            action="store_true",
+            default=False,
+            required=False,
+            help="Disable the adaptive per-domain rate limiter of HTTP requests and browser page loads",
+        )
+
+        http_group.add_argument(
+            "--no-http-cache",
+            dest="no_http_cache",
+            action="store_true",
+            default=False,
+            required=False,
+            help="Do not cache HTTP responses on disk, always download pages in full",
+        )
+
+        http_group.add_argument(
+            "--http-cache-size-mb",
+            dest="http_cache_size_mb",
+            type=int,
+            default=512,
+            required=False,
+            help="Size limit of the on-disk HTTP cache, in megabytes. Default is 512.",
+        )
+        return http_group
+
+
 class CommandType(Enum):
     ADD_NEW_MUSIC_ENTITY = ("add_new_music_entity", "add-new-music-entity", False)
+    SERVE = ("serve", "serve", False)
+    RESOLVE = ("resolve", "resolve", False)
+    QUERY = ("query", "query", False)
 
     def __init__(self, value, output_dir_name, session_based: bool, session_link_name: str = ""):
         self.real_name = value
@@ -1,17 +1,20 @@
 import logging
 import re
+import threading
 from abc import ABC, abstractmethod
 from enum import Enum
 from typing import Iterable, Dict
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 
-import requests
 from bs4 import BeautifulSoup, Tag
 from requests import Response
 from requests_html import HTMLSession
 
+from music_manager.cache.page_cache import PageCache, PageMode
+from music_manager.cache.page_source import fetch_page
 from music_manager.commands.addnewentitiestosheet.music_entity_creator import IntermediateMusicEntity, MusicEntityType
 from music_manager.common import Duration
+from music_manager.net.http_client import HttpClient
 
 LOG = logging.getLogger(__name__)
 BS4_HTML_PARSER = "html.parser"
@@ -19,6 +22,7 @@ BS4_HTML_PARSER = "html.parser"
 
 class HtmlParser:
     js_renderer = None
+    page_cache = PageCache()
 
     @staticmethod
     def create_bs(html) -> BeautifulSoup:
@@ -26,9 +30,15 @@ class HtmlParser:
 
     @staticmethod
     def create_bs_from_url(url, headers=None):
-        resp = requests.get(url, headers=headers)
-        soup = HtmlParser.create_bs(resp.text)
-        return soup
+        if headers:
+            # Pages fetched with custom headers may differ from the cached ones
+            return HtmlParser._fetch_bs(url, headers)[0]
+        return HtmlParser.page_cache.get_or_load(url, PageMode.PLAIN, lambda: HtmlParser._fetch_bs(url))
+
+    @staticmethod
+    def _fetch_bs(url, headers=None):
+        html = fetch_page(url, PageMode.PLAIN, lambda: HttpClient.get_instance().get(url, headers=headers).text)
+        return HtmlParser.create_bs(html), len(html)
 
     @staticmethod
     def find_divs_with_text(soup: BeautifulSoup, text: str):
@@ -70,9 +80,9 @@ class HtmlParser:
 
     @staticmethod
     def get_link_from_standard_redirect_page(orig_url, src_url):
-        resp = requests.get(src_url)
-        LOG.debug("[orig: %s] Response of link '%s': %s", orig_url, src_url, resp.text)
-        match = re.search(r"document\.location\.replace\(\"(.*)\"\)", resp.text)
+        html = fetch_page(src_url, PageMode.PLAIN, lambda: HttpClient.get_instance().get(src_url).text)
+        LOG.debug("[orig: %s] Response of link '%s': %s", orig_url, src_url, html)
+        match = re.search(r"document\.location\.replace\(\"(.*)\"\)", html)
         # TODO Error handling for not found group(1)
         found_group = match.group(1)
         unescaped_link = found_group.replace("\\/", "/")
@@ -117,6 +127,19 @@ class ContentProviderAbs(ABC):
     def is_media_provider(self):
         pass
 
+    def is_browser_bound(self):
+        """
+        Browser-bound providers drive a single browser session (Selenium), so they are serialized by default
+        when links are resolved concurrently.
+        """
+        return False
+
+    def close(self):
+        """
+        Releases resources kept between links, e.g. browser sessions.
+        """
+        pass
+
     @classmethod
     @abstractmethod
     def url_matchers(cls) -> Iterable[str]:
@@ -142,6 +165,9 @@ class JSRenderer:
         self.use_requests_html = False
         self.use_selenium = False
         self.fb_selenium = selenium
+        # Neither the headless browser of requests-html nor the Selenium driver is thread-safe
+        self._render_lock = threading.Lock()
+        self._html_session = None
 
         if js_renderer_type == JavaScriptRenderer.REQUESTS_HTML:
             self.use_requests_html = True
@@ -149,15 +175,41 @@ class JSRenderer:
             self.use_selenium = True
 
     def render_with_javascript(self, url, force_use_requests=False) -> BeautifulSoup:
-        if self.use_requests_html or force_use_requests:
-            html_content = JSRenderer._render_with_requests_html(url)
-            return HtmlParser.create_bs(html_content)
-        elif self.use_selenium:
-            return self.fb_selenium.load_url_as_soup(url)
-
-    @staticmethod
-    def _render_with_requests_html(url):
-        session = HTMLSession()
+        mode = PageMode.REQUESTS_HTML if self.use_requests_html or force_use_requests else PageMode.SELENIUM
+        return HtmlParser.page_cache.get_or_load(url, mode, lambda: self._render(url, mode))
+
+    def _render(self, url, mode: PageMode):
+        with self._render_lock:
+            if mode == PageMode.REQUESTS_HTML:
+                html_content = fetch_page(url, mode, lambda: self._render_with_requests_html(url))
+            else:
+                # Snapshots of Selenium renders are handled by FacebookSelenium, it is also called directly
+                html_content = self.fb_selenium.load_url_as_html(url)
+            return HtmlParser.create_bs(html_content), len(html_content)
+
+    def start_requests_html_browser(self):
+        """
+        Launches the headless browser of requests-html.
+        Must be called from the main thread before rendering from worker threads:
+        the browser launcher installs signal handlers and binds the event loop of the calling thread.
+        """
+        with self._render_lock:
+            session = self._get_html_session()
+            session.browser
+
+    def close(self):
+        with self._render_lock:
+            if self._html_session:
+                self._html_session.close()
+                self._html_session = None
+
+    def _get_html_session(self) -> HTMLSession:
+        if not self._html_session:
+            self._html_session = HTMLSession()
+        return self._html_session
+
+    def _render_with_requests_html(self, url):
+        session = self._get_html_session()
         resp: Response = session.get(url)
         resp.html.render(timeout=20)
         html_content = resp.html.html
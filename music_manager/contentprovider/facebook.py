@@ -1,6 +1,7 @@
 import logging
 import pickle
 import re
+import threading
 from dataclasses import dataclass
 from enum import Enum
 from typing import Iterable, List, Callable, Dict, Any
@@ -17,9 +18,13 @@ from selenium.webdriver.support import expected_conditions
 from selenium.webdriver.support.wait import WebDriverWait
 from pythoncommons.string_utils import auto_str
 
+from music_manager.cache.page_cache import PageMode
+from music_manager.cache.page_source import fetch_page
 from music_manager.commands.addnewentitiestosheet.music_entity_creator import IntermediateMusicEntity
 from music_manager.common import Duration
 from music_manager.contentprovider.common import ContentProviderAbs, HtmlParser
+from music_manager.net.http_client import HttpClient
+from music_manager.net.rate_limiter import AdaptiveRateLimiter
 from bs4 import BeautifulSoup
 from bs4.element import Comment, Tag
 
@@ -49,7 +54,7 @@ class FacebookLinkEmitter:
         self.js_renderer = js_renderer
 
     def emit_links(self, url) -> Dict[str, None]:
-        soup = HtmlParser.create_bs_from_url(url, headers=Facebook.HEADERS)
+        soup = HtmlParser.create_bs_from_url(url)
         # TODO This is wrong: Selenium will pop up for public Facebook content as well!
         ptws = self._determine_if_private(soup, url)
         if ptws.type in [FacebookPostType.PUBLIC_POST, FacebookPostType.PUBLIC]:
@@ -136,7 +141,10 @@ class Facebook(ContentProviderAbs):
 
     def __init__(self, config, js_renderer, fb_selenium, fb_link_parser):
         self.config = config
+        self.js_renderer = js_renderer
+        self.fb_selenium = fb_selenium
         self.fb_link_emitter = FacebookLinkEmitter(js_renderer, fb_selenium, fb_link_parser)
+        HttpClient.get_instance().add_host_headers(FACEBOOK_URL_FRAGMENT1, Facebook.HEADERS)
 
     @classmethod
     def url_matchers(cls) -> Iterable[str]:
@@ -145,6 +153,9 @@ class Facebook(ContentProviderAbs):
     def is_media_provider(self):
         return False
 
+    def is_browser_bound(self):
+        return True
+
     def can_handle_url(self, url):
         if FACEBOOK_URL_FRAGMENT1 in url:
             return True
@@ -162,6 +173,10 @@ class Facebook(ContentProviderAbs):
     def _determine_duration_by_url(self, url: str) -> Duration:
         return Duration.unknown()
 
+    def close(self):
+        self.js_renderer.close()
+        self.fb_selenium.close()
+
     def emit_links(self, url) -> Dict[str, None]:
         # TODO Introduce new class that ties together the emitting logic: private post, private group post, public post, public group post
         LOG.info("Emitting links from provider '%s'", self)
@@ -177,7 +192,7 @@ class Facebook(ContentProviderAbs):
 
 
 class FacebookSelenium:
-    CHROME_OPT_SELENIUM_PROFILE = "user-data-dir=selenium"
+    CHROME_OPT_USER_DATA_DIR = "user-data-dir="
     COOKIES_FILE = "cookies.pkl"
     FACEBOOK_COM = 'https://www.facebook.com/'
 
@@ -197,6 +212,8 @@ class FacebookSelenium:
         self.chrome_options = None
         self.driver = None
         self.logged_in = False
+        # A single Chrome driver is shared by all callers, page loads must not interleave
+        self._driver_lock = threading.RLock()
         self._init_logging()
 
     def load_links_from_private_content(self, url: str) -> List[str]:
@@ -208,28 +225,43 @@ class FacebookSelenium:
         LOG.info("Loading private Facebook post content...")
         return self.fb_link_parser.find_links_in_soup(soup)
 
+    def start(self):
+        """
+        Launches the browser and logs in, so the first page load does not have to wait for it.
+        """
+        with self._driver_lock:
+            self._init_webdriver()
+            if not self.logged_in:
+                self._login()
+
     def load_url_as_soup(self, url, timeout=25, poll_freq=2) -> BeautifulSoup:
-        self._init_webdriver()
-        if not self.logged_in:
-            self._login()
+        return HtmlParser.create_bs(self.load_url_as_html(url, timeout=timeout, poll_freq=poll_freq))
+
+    def load_url_as_html(self, url, timeout=25, poll_freq=2) -> str:
+        return fetch_page(url, PageMode.SELENIUM, lambda: self._load_url_as_html(url, timeout, poll_freq))
 
-        if self.driver.current_url != url:
-            self._load_url(poll_freq, timeout, url)
-        else:
-            LOG.debug("Current URL matches desired URL '%s', not loading again", url)
-        html = self.driver.page_source
-        return HtmlParser.create_bs(html)
+    def _load_url_as_html(self, url, timeout, poll_freq) -> str:
+        with self._driver_lock:
+            self.start()
+
+            if self.driver.current_url != url:
+                self._load_url(poll_freq, timeout, url)
+            else:
+                LOG.debug("Current URL matches desired URL '%s', not loading again", url)
+            return self.driver.page_source
 
     def _load_url(self, poll_freq, timeout, url):
-        self.driver.get(url)
-        try:
-            wait = WebDriverWait(self.driver, timeout=timeout, poll_frequency=poll_freq,
-                                 ignored_exceptions=[NoSuchElementException, ElementNotVisibleException,
-                                                     ElementNotSelectableException])
-            success = wait.until(expected_conditions.all_of(
-                expected_conditions.element_to_be_clickable((By.XPATH, self.COMMENT_BUTTON_XPATH))))
-        except TimeoutException as e:
-            raise e
+        # Page loads of the logged-in browser count against the same per-domain budget as plain HTTP requests
+        with AdaptiveRateLimiter.get_instance().slot(url):
+            self.driver.get(url)
+            try:
+                wait = WebDriverWait(self.driver, timeout=timeout, poll_frequency=poll_freq,
+                                     ignored_exceptions=[NoSuchElementException, ElementNotVisibleException,
+                                                         ElementNotSelectableException])
+                success = wait.until(expected_conditions.all_of(
+                    expected_conditions.element_to_be_clickable((By.XPATH, self.COMMENT_BUTTON_XPATH))))
+            except TimeoutException as e:
+                raise e
         # TODO Add this to be more resilient for page load issues --> Should not have any of this "loading signs" in page!
         # <div class="..." style="animation-delay: 1000ms;"></div>
 
@@ -240,10 +272,17 @@ class FacebookSelenium:
             self._do_initial_facebook_login()
         self.logged_in = True
 
+    def close(self):
+        with self._driver_lock:
+            if self.driver:
+                self.driver.quit()
+                self.driver = None
+                self.logged_in = False
+
     def _init_webdriver(self):
         if not self.chrome_options:
             self.chrome_options = Options()
-            self.chrome_options.add_argument(self.CHROME_OPT_SELENIUM_PROFILE)
+            self.chrome_options.add_argument(self.CHROME_OPT_USER_DATA_DIR + self.config.selenium_profile)
         if not self.driver:
             self.driver = webdriver.Chrome(chrome_options=self.chrome_options)
 
@@ -0,0 +1,206 @@
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+from music_manager.cache.cassette import Cassette, CassetteMode
+from music_manager.cache.metadata_cache import MetadataCache
+from music_manager.cache.negative_cache import NegativeCache
+from music_manager.cache.page_cache import PageCache
+from music_manager.cache.results_bundle import ResultsBundle, import_bundle, ROTATING_BUNDLE_MAX_ENTITIES
+from music_manager.cache.snapshot_store import SnapshotStore
+from music_manager.commands.addnewentitiestosheet.journal import ResultJournal
+from music_manager.commands.addnewentitiestosheet.music_entity_creator import MusicEntityCreator
+from music_manager.commands.addnewentitiestosheet.resolver import ResolverConfig
+from music_manager.commands.addnewentitiestosheet.scheduler import CostAwareScheduler, ProviderCostModel
+from music_manager.contentprovider.beatport import Beatport
+from music_manager.contentprovider.common import JavaScriptRenderer, JSRenderer, HtmlParser
+from music_manager.contentprovider.facebook import Facebook, FacebookLinkParser, FacebookSelenium, \
+    FACEBOOK_URL_FRAGMENT1
+from music_manager.contentprovider.mixcloud import Mixcloud
+from music_manager.contentprovider.soundcloud import SoundCloud
+from music_manager.contentprovider.youtube import Youtube
+from music_manager.music_manager_config import MusicManagerConfig
+from music_manager.net.http_client import HttpClient, HttpClientConfig
+from music_manager.net.rate_limiter import AdaptiveRateLimiter, RateLimiterStateStore
+
+LOG = logging.getLogger(__name__)
+CONTENT_PROVIDER_CLASSES = [Youtube, Facebook, Beatport, SoundCloud, Mixcloud]
+RATE_LIMITER_STATE_FILE = "rate_limiter.sqlite"
+PROVIDER_LATENCY_STATE_FILE = "provider_latencies.json"
+METADATA_CACHE_FILE = "url_metadata.sqlite"
+NEGATIVE_CACHE_FILE = "negative_cache.sqlite"
+HTTP_CACHE_FILE = "http_cache.sqlite"
+SNAPSHOT_DIR = "snapshots"
+SELENIUM_PROFILE_DIR = "selenium"
+
+
+@dataclass
+class ContentProviderConfig:
+    """
+    Settings of content providers for commands that don't read the parser config or the sheets.
+    """
+    fb_username: str = None
+    fb_password: str = None
+    fb_redirect_link_limit: int = 10
+    js_renderer: JavaScriptRenderer = JavaScriptRenderer.SELENIUM
+    # Concurrently running Chrome instances can't share a profile directory
+    selenium_profile: str = SELENIUM_PROFILE_DIR
+
+    @property
+    def has_facebook_credentials(self):
+        return bool(self.fb_username and self.fb_password)
+
+
+class MusicEntityCreatorFactory:
+    @staticmethod
+    def configure_network(args, resolver_config: ResolverConfig):
+        """
+        Sets up the shared HTTP client and rate limiter from the arguments added by HttpArguments.
+        """
+        HttpClient.configure(MusicEntityCreatorFactory.create_http_client_config(args, resolver_config))
+        if args.disable_rate_limiter:
+            LOG.warning("Rate limiter is disabled")
+            AdaptiveRateLimiter.configure(AdaptiveRateLimiter(enabled=False))
+        else:
+            store = RateLimiterStateStore(MusicManagerConfig.get_state_file(RATE_LIMITER_STATE_FILE))
+            AdaptiveRateLimiter.configure(AdaptiveRateLimiter(store))
+
+    @staticmethod
+    def create_http_client_config(args, resolver_config: ResolverConfig) -> HttpClientConfig:
+        # Every link worker should be able to keep its connection to the same host alive
+        pool_size = max(HttpClientConfig.pool_maxsize, resolver_config.workers + resolver_config.link_workers)
+        cache_file = None if args.no_http_cache else MusicManagerConfig.get_state_file(HTTP_CACHE_FILE)
+        return HttpClientConfig(connect_timeout=args.http_connect_timeout,
+                                read_timeout=args.http_read_timeout,
+                                pool_maxsize=pool_size,
+                                cache_file=cache_file,
+                                cache_max_size_bytes=args.http_cache_size_mb * 1024 * 1024)
+
+    @staticmethod
+    def create_metadata_cache(args) -> MetadataCache or None:
+        """
+        Creates the persistent metadata cache from the arguments added by CacheArguments.
+        """
+        if args.no_metadata_cache:
+            LOG.info("Metadata cache is disabled")
+            return None
+        if MusicEntityCreatorFactory.uses_cassette(args):
+            # Every link should reach the providers when recording, and replays should not change the cache
+            return None
+        cache = MetadataCache(MusicManagerConfig.get_state_file(METADATA_CACHE_FILE),
+                              memory_size=args.metadata_cache_memory_size)
+        for bundle_path in args.import_bundles or []:
+            import_bundle(bundle_path, cache)
+        return cache
+
+    @staticmethod
+    def create_negative_cache(args) -> NegativeCache or None:
+        if args.no_negative_cache:
+            LOG.info("Negative cache is disabled")
+            return None
+        if args.re_extract or MusicEntityCreatorFactory.uses_cassette(args):
+            # Failures of previous runs may be fixed by the new extraction logic, cassettes should cover every link
+            return None
+        return NegativeCache(MusicManagerConfig.get_state_file(NEGATIVE_CACHE_FILE))
+
+    @staticmethod
+    def create_results_bundle(args, command_type, name_suffix: str = "",
+                              rotating: bool = False) -> ResultsBundle or None:
+        """
+        Creates the bundle of resolved links written to the output directory of the command.
+        Only bundles without a name suffix are linked as the latest command data zip.
+        Bundles of long-running commands are rotating, they are written in parts.
+        """
+        if args.no_results_bundle:
+            return None
+        file_name = "command-data-{}{}.zip".format(time.strftime("%Y%m%d_%H%M%S"), name_suffix)
+        path = os.path.join(MusicManagerConfig.get_output_dir(command_type.output_dir_name), file_name)
+        link_path = None
+        if not name_suffix:
+            link_path = os.path.join(MusicManagerConfig.PROJECT_OUT_ROOT, command_type.command_data_zip_name)
+        return ResultsBundle(path, command_type.real_name, link_path=link_path,
+                             max_entities=ROTATING_BUNDLE_MAX_ENTITIES if rotating else None)
+
+    @staticmethod
+    def configure_page_cache(args):
+        HtmlParser.page_cache = PageCache(max_bytes=args.page_cache_size_mb * 1024 * 1024)
+
+    @staticmethod
+    def configure_snapshot_store(args):
+        if not args.save_snapshots and not args.re_extract:
+            return
+        snapshot_dir = args.snapshot_dir
+        if not snapshot_dir:
+            snapshot_dir = os.path.join(MusicManagerConfig.get_state_dir(), SNAPSHOT_DIR)
+        SnapshotStore.configure(SnapshotStore(snapshot_dir, re_extract=args.re_extract))
+
+    @staticmethod
+    def configure_cassette(args):
+        if args.record_cassette and args.replay_cassette:
+            raise ValueError("Only one of --record-cassette and --replay-cassette can be specified")
+        if args.record_cassette:
+            Cassette.configure(Cassette(args.record_cassette, CassetteMode.RECORD))
+        elif args.replay_cassette:
+            Cassette.configure(Cassette(args.replay_cassette, CassetteMode.REPLAY))
+
+    @staticmethod
+    def uses_cassette(args) -> bool:
+        return bool(args.record_cassette or args.replay_cassette)
+
+    @staticmethod
+    def is_offline(args) -> bool:
+        return bool(args.re_extract or args.replay_cassette)
+
+    @staticmethod
+    def choose_js_renderer(args) -> JavaScriptRenderer:
+        if hasattr(args, 'use_requests_html_for_js') and args.use_requests_html_for_js:
+            return JavaScriptRenderer.REQUESTS_HTML
+        return JavaScriptRenderer.SELENIUM
+
+    @staticmethod
+    def create(config, resolver_config: ResolverConfig, cost_scheduling: bool = True,
+               start_browser: bool = None, include_facebook: bool = True,
+               login_facebook: bool = False, metadata_cache: MetadataCache = None,
+               negative_cache: NegativeCache = None, offline: bool = False,
+               results_bundle: ResultsBundle = None, journal: ResultJournal = None) -> MusicEntityCreator:
+        """
+        Creates the content providers and the MusicEntityCreator using them.
+        config should have the attributes of ContentProviderConfig.
+        With login_facebook, the Selenium browser is started and logged in right away instead of on first use.
+        With offline, pages are only read from snapshots or a replayed cassette: no browser is started,
+        all providers are created and cached metadata is not used.
+        """
+        if offline:
+            start_browser, include_facebook, login_facebook = False, True, False
+        urls_to_match = [m for cp in CONTENT_PROVIDER_CLASSES for m in cp.url_matchers()]
+        fb_link_parser = FacebookLinkParser(urls_to_match, config.fb_redirect_link_limit)
+        fb_selenium = FacebookSelenium(config, fb_link_parser)
+        js_renderer = JSRenderer(config.js_renderer, fb_selenium)
+        # TODO dirty hack
+        HtmlParser.js_renderer = js_renderer
+
+        if start_browser is None:
+            start_browser = resolver_config.concurrent
+        if start_browser:
+            # The headless browser can only be launched from the main thread
+            js_renderer.start_requests_html_browser()
+        if include_facebook and login_facebook:
+            fb_selenium.start()
+
+        content_providers = [Youtube()]
+        disabled_providers = {}
+        if include_facebook:
+            content_providers.append(Facebook(config, js_renderer, fb_selenium, fb_link_parser))
+        else:
+            disabled_providers["facebook"] = [FACEBOOK_URL_FRAGMENT1]
+        content_providers.extend([Beatport(), SoundCloud(), Mixcloud()])
+
+        scheduler = None
+        if cost_scheduling:
+            cost_model = ProviderCostModel(MusicManagerConfig.get_state_file(PROVIDER_LATENCY_STATE_FILE))
+            scheduler = CostAwareScheduler(cost_model)
+        return MusicEntityCreator(content_providers, resolver_config, scheduler=scheduler,
+                                  metadata_cache=metadata_cache, negative_cache=negative_cache,
+                                  use_cached_metadata=not offline, results_bundle=results_bundle,
+                                  journal=journal, disabled_providers=disabled_providers)
@@ -22,10 +22,6 @@ SOUNDCLOUD_GOOGLE_URL = "soundcloud.app.goo.gl"
 class SoundCloud(ContentProviderAbs):
     HTML_TITLE_PATTERN = re.compile(r"Stream (.*) by(.*) \| Listen online for free on SoundCloud")
 
-    def __init__(self):
-        # Build a cache of url to title
-        self._title_cache = {}
-
     @classmethod
     def url_matchers(cls) -> Iterable[str]:
         return [SOUNDCLOUD_NORMAL_URL, SOUNDCLOUD_GOOGLE_URL]
@@ -45,7 +41,7 @@ class SoundCloud(ContentProviderAbs):
         title = self._determine_title_by_url(url)
         if not title:
             return IntermediateMusicEntity.not_found(url)
-        duration = self._determine_duration_by_url(url)
+        duration = self._determine_duration_by_url(url, title)
         ent_type = self._determine_entity_type(duration)
         return IntermediateMusicEntity(title, duration, ent_type, url)
 
@@ -63,14 +59,9 @@ class SoundCloud(ContentProviderAbs):
             raise ValueError("Unexpected Soundcloud HTML title: {}".format(html_title))
         title = m.group(1)
         author = m.group(2)
-        self._title_cache[url] = title
         return title
 
-    def _determine_duration_by_url(self, url: str) -> Duration:
-        if self._title_cache[url]:
-            main_title = self._title_cache[url]
-        else:
-            main_title = self._determine_title_by_url(url)
+    def _determine_duration_by_url(self, url: str, main_title: str) -> Duration:
         title_at_bottom_player, soup = self._get_title_of_bottom_player(url)
         if title_at_bottom_player == UNKNOWN_TITLE:
             LOG.error("Cannot determine title from the bottom player for URL: '%s', therefore duration is unknown!", url)
@@ -1,18 +1,29 @@
+import json
 import logging
+import threading
 from datetime import timedelta
 from typing import Iterable
 
 import youtube_dl
 from pythoncommons.string_utils import auto_str
 
+from music_manager.cache.page_cache import PageMode
+from music_manager.cache.page_source import fetch_page
 from music_manager.commands.addnewentitiestosheet.music_entity_creator import IntermediateMusicEntity
 from music_manager.common import Duration
 from music_manager.contentprovider.common import ContentProviderAbs, HtmlParser
+from music_manager.net.rate_limiter import AdaptiveRateLimiter
 
 YOUTUBE_URL_1 = "youtube.com"
 YOUTUBE_URL_2 = "youtu.be"
 YOUTUBE_CHANNEL_URL_FRAGMENT = "channel/"
-YOUTUBE_DL = youtube_dl.YoutubeDL({'outtmpl': '%(id)s.%(ext)s'})
+YOUTUBE_DL_OPTIONS = {'outtmpl': '%(id)s.%(ext)s'}
+# Titles used to be read from the HTML title of the video page, which has this suffix
+YOUTUBE_HTML_TITLE_SUFFIX = " - YouTube"
+# Video infos are small compared to pages, they are accounted with a fixed size in the page cache
+VIDEO_INFO_SIZE_BYTES = 16 * 1024
+# YoutubeDL instances are not safe to share between threads, each resolver thread gets its own
+_YOUTUBE_DL_LOCAL = threading.local()
 LOG = logging.getLogger(__name__)
 
 
@@ -40,7 +51,11 @@ class Youtube(ContentProviderAbs):
         return IntermediateMusicEntity(title, duration, ent_type, url)
 
     def _determine_title_by_url(self, url: str) -> str:
-        return HtmlParser.get_title_from_url(url)
+        if url is None or YOUTUBE_CHANNEL_URL_FRAGMENT in url:
+            return HtmlParser.get_title_from_url(url)
+        # The video info is needed for the duration anyway, so the video page is not fetched separately
+        video_info = Youtube._get_youtube_video_info(url)
+        return video_info['title'] + YOUTUBE_HTML_TITLE_SUFFIX
 
     def _determine_duration_by_url(self, url: str) -> Duration:
         # TODO Move this check elsewhere
@@ -59,10 +74,35 @@ class Youtube(ContentProviderAbs):
         LOG.info("Determined duration of video '%s': %s", url, td)
         return Duration(duration_seconds)
 
+    @staticmethod
+    def _get_youtube_dl():
+        if not hasattr(_YOUTUBE_DL_LOCAL, "instance"):
+            _YOUTUBE_DL_LOCAL.instance = youtube_dl.YoutubeDL(YOUTUBE_DL_OPTIONS)
+        return _YOUTUBE_DL_LOCAL.instance
+
     @staticmethod
     def _get_youtube_video_info(video_link):
-        with YOUTUBE_DL:
-            result = YOUTUBE_DL.extract_info(video_link, download=False)
+        return HtmlParser.page_cache.get_or_load(video_link, PageMode.YOUTUBE_DL_INFO,
+                                                 lambda: (Youtube._load_video_info(video_link), VIDEO_INFO_SIZE_BYTES))
+
+    @staticmethod
+    def _load_video_info(video_link):
+        # Video infos are stored as snapshots in JSON, so durations can be extracted again without youtube-dl
+        raw_info = fetch_page(video_link, PageMode.YOUTUBE_DL_INFO,
+                              lambda: json.dumps(Youtube._extract_video_info(video_link), default=str))
+        return json.loads(raw_info)
+
+    @staticmethod
+    def _extract_video_info(video_link):
+        ydl = Youtube._get_youtube_dl()
+        with AdaptiveRateLimiter.get_instance().slot(video_link) as ticket:
+            try:
+                with ydl:
+                    result = ydl.extract_info(video_link, download=False)
+            except youtube_dl.utils.DownloadError as e:
+                if "HTTP Error 429" in str(e):
+                    ticket.record_status(429)
+                raise
         if 'entries' in result:
             # Can be a playlist or a list of videos
             video_info = result['entries'][0]
@@ -0,0 +1,207 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from music_manager.net.urls import canonicalize_url, get_url_rule
+
+LOG = logging.getLogger(__name__)
+LIBRARY_FILE = "library.sqlite"
+DEFAULT_SEARCH_LIMIT = 20
+# Words of free text queries, FTS operators and quotes in titles are not interpreted
+FTS_WORD_PATTERN = re.compile(r"\w+")
+
+
+def get_link_provider(link: str) -> str:
+    rule = get_url_rule(link)
+    return rule.provider if rule else urlsplit(link).netloc.lower()
+
+
+@dataclass
+class LibraryEntity:
+    title: str
+    entity_type: str
+    links: List[str] = field(default_factory=list)
+    provider: str = None
+    duration_seconds: int = None
+    src_file: str = None
+    src_line: int = None
+    id: int = None
+    added_at: float = None
+    synced_at: float = None
+
+
+class MusicLibrary:
+    """
+    Local database of every resolved music entity: the system of record, Google sheets are synced from it.
+    Entities are looked up by canonical link, by type, or by a full-text search of their titles.
+    An entity is added once, adding an entity with a link of an existing entity returns the existing one.
+    Entities are marked as synced once their rows are written to a sheet.
+    Rows of sheets are imported as synced entities. The number of imported rows is kept per sheet,
+    so only rows appended to a sheet since the last import are imported.
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"added": 0, "existing": 0, "synced": 0, "imported_rows": 0}
+        self._conn = sqlite3.connect(db_path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS entities ("
+                           "id INTEGER PRIMARY KEY, "
+                           "title TEXT, "
+                           "entity_type TEXT NOT NULL, "
+                           "provider TEXT, "
+                           "duration_seconds INTEGER, "
+                           "src_file TEXT, "
+                           "src_line INTEGER, "
+                           "added_at REAL NOT NULL, "
+                           "synced_at REAL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entities_by_type ON entities(entity_type, synced_at)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS links ("
+                           "link TEXT PRIMARY KEY, "
+                           "entity_id INTEGER NOT NULL REFERENCES entities(id))")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS links_by_entity ON links(entity_id)")
+        self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS titles USING fts5("
+                           "title, content='entities', content_rowid='id')")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS sheets (name TEXT PRIMARY KEY, imported_rows INTEGER NOT NULL)")
+
+    def add(self, entity: LibraryEntity, synced: bool = False) -> LibraryEntity:
+        return self.add_all([entity], synced=synced)[0]
+
+    def add_all(self, entities: Iterable[LibraryEntity], synced: bool = False) -> List[LibraryEntity]:
+        """
+        Adds the entities in one transaction. Returns the added entities, or the existing entity with the same link.
+        """
+        result = []
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for entity in entities:
+                    result.append(self._add(entity, synced))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result
+
+    def import_sheet_rows(self, sheet_name: str, rows: List[Optional[LibraryEntity]]) -> int:
+        """
+        Adds the entities of the rows appended to the sheet since the last import, rows without links are None.
+        If the sheet has less rows than imported, rows were deleted or moved: every row of the sheet is imported again.
+        Returns the number of imported rows.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT imported_rows FROM sheets WHERE name = ?", (sheet_name,)).fetchone()
+            imported_rows = row[0] if row else 0
+            if len(rows) < imported_rows:
+                LOG.info("Sheet '%s' has %d rows, less than the %d imported rows. Importing every row again.",
+                         sheet_name, len(rows), imported_rows)
+                imported_rows = 0
+            self._conn.execute("BEGIN")
+            try:
+                for entity in rows[imported_rows:]:
+                    if entity:
+                        self._add(entity, synced=True)
+                self._conn.execute("INSERT OR REPLACE INTO sheets(name, imported_rows) VALUES (?, ?)",
+                                   (sheet_name, len(rows)))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self.stats["imported_rows"] += len(rows) - imported_rows
+        return len(rows) - imported_rows
+
+    def mark_synced(self, entity_ids: Iterable[int]):
+        entity_ids = list(entity_ids)
+        with self._lock:
+            self._conn.executemany("UPDATE entities SET synced_at = ? WHERE id = ?",
+                                   [(time.time(), entity_id) for entity_id in entity_ids])
+            self.stats["synced"] += len(entity_ids)
+
+    def find_by_link(self, link: str) -> LibraryEntity or None:
+        with self._lock:
+            return self._find_by_links([canonicalize_url(link)])
+
+    def search(self, text: str, entity_type: str = None, unsynced: bool = False,
+               limit: int = DEFAULT_SEARCH_LIMIT) -> List[LibraryEntity]:
+        """
+        Full-text search of titles, the best matches first. Every word of the text has to match,
+        the last word also matches as a prefix.
+        """
+        words = FTS_WORD_PATTERN.findall(text)
+        if not words:
+            return []
+        query = " ".join('"{}"'.format(word) for word in words) + "*"
+        sql = ("SELECT e.id FROM titles JOIN entities e ON e.id = titles.rowid WHERE titles MATCH ?" +
+               (" AND e.entity_type = ?" if entity_type else "") + (" AND e.synced_at IS NULL" if unsynced else "") +
+               " ORDER BY titles.rank LIMIT ?")
+        params = [query] + ([entity_type] if entity_type else []) + [limit]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            return [self._get(entity_id) for entity_id, in rows]
+
+    def get_entities(self, entity_type: str = None, unsynced: bool = False,
+                     limit: int = None) -> List[LibraryEntity]:
+        conditions = (["entity_type = ?"] if entity_type else []) + (["synced_at IS NULL"] if unsynced else [])
+        sql = "SELECT id FROM entities" + (" WHERE " + " AND ".join(conditions) if conditions else "") + " ORDER BY id"
+        params = [entity_type] if entity_type else []
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [self._get(entity_id) for entity_id, in self._conn.execute(sql, params).fetchall()]
+
+    def get_counts(self) -> Dict[str, Dict[str, int]]:
+        """
+        Number of entities by type, in total and not synced to a sheet yet.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT entity_type, COUNT(*), SUM(synced_at IS NULL) FROM entities "
+                                      "GROUP BY entity_type").fetchall()
+        return {entity_type: {"total": total, "unsynced": unsynced} for entity_type, total, unsynced in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def log_stats(self):
+        LOG.info("Music library stats: %s", self.stats)
+
+    def _add(self, entity: LibraryEntity, synced: bool) -> LibraryEntity:
+        links = list(dict.fromkeys(canonicalize_url(link) for link in entity.links))
+        existing = self._find_by_links(links)
+        if existing:
+            self.stats["existing"] += 1
+            return existing
+        entity.links = links
+        entity.added_at = time.time()
+        entity.synced_at = entity.added_at if synced else None
+        entity.id = self._conn.execute(
+            "INSERT INTO entities(title, entity_type, provider, duration_seconds, src_file, src_line, added_at, "
+            "synced_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (entity.title, entity.entity_type, entity.provider, entity.duration_seconds, entity.src_file,
+             entity.src_line, entity.added_at, entity.synced_at)).lastrowid
+        self._conn.executemany("INSERT OR IGNORE INTO links(link, entity_id) VALUES (?, ?)",
+                               [(link, entity.id) for link in links])
+        self._conn.execute("INSERT INTO titles(rowid, title) VALUES (?, ?)", (entity.id, entity.title or ""))
+        self.stats["added"] += 1
+        return entity
+
+    def _find_by_links(self, links: List[str]) -> LibraryEntity or None:
+        if not links:
+            return None
+        row = self._conn.execute("SELECT entity_id FROM links WHERE link IN ({}) LIMIT 1"
+                                 .format(",".join("?" * len(links))), links).fetchone()
+        return self._get(row[0]) if row else None
+
+    def _get(self, entity_id: int) -> LibraryEntity:
+        row = self._conn.execute("SELECT title, entity_type, provider, duration_seconds, src_file, src_line, id, "
+                                 "added_at, synced_at FROM entities WHERE id = ?", (entity_id,)).fetchone()
+        entity = LibraryEntity(row[0], row[1], [], *row[2:])
+        entity.links = [link for link, in self._conn.execute("SELECT link FROM links WHERE entity_id = ? ORDER BY link",
+                                                             (entity_id,))]
+        return entity
@@ -3,6 +3,7 @@
 import argparse
 import logging
 import os
+import sys
 import time
 
 from pythoncommons.constants import ExecutionMode
@@ -11,7 +12,10 @@ from pythoncommons.os_utils import OsUtils
 from pythoncommons.project_utils import ProjectUtils, ProjectRootDeterminationStrategy
 
 from music_manager.commands.addnewentitiestosheet.add_new_music_entity_cmd import AddNewMusicEntityCommand
-from music_manager.commands_common import GSheetArguments
+from music_manager.commands.query.query_cmd import QueryCommand
+from music_manager.commands.resolve.resolve_cmd import ResolveCommand
+from music_manager.commands.serve.serve_cmd import ServeCommand
+from music_manager.commands_common import GSheetArguments, CommandType
 from music_manager.common import MusicManagerEnvVar
 from music_manager.constants import PROJECT_NAME
 from music_manager.music_manager_config import MusicManagerConfig
@@ -19,6 +23,8 @@ from music_manager.music_manager_config import MusicManagerConfig
 LOG = logging.getLogger(__name__)
 
 __author__ = 'Szilard Nemeth'
+# Commands that write their results to stdout, their console logs go to stderr
+STDOUT_RESULT_COMMANDS = [CommandType.RESOLVE.name, CommandType.QUERY.name]
 
 
 class ArgParser:
@@ -36,6 +42,9 @@ class ArgParser:
             dest="command",
         )
         AddNewMusicEntityCommand.create_parser(subparsers)
+        ServeCommand.create_parser(subparsers)
+        ResolveCommand.create_parser(subparsers)
+        QueryCommand.create_parser(subparsers)
 
         parser.add_argument('-v', '--verbose',
                             action='store_true',
@@ -54,7 +63,8 @@ class ArgParser:
             help="Turn on console debug level logs",
         )
 
-        exclusive_group = parser.add_mutually_exclusive_group(required=True)
+        # Not every subcommand writes to a sheet, -g is the default
+        exclusive_group = parser.add_mutually_exclusive_group(required=False)
         exclusive_group.add_argument('-dr', '--dry-run', action='store_true',
                                      dest='dry_run',
                                      help='Print row updates only to console',
@@ -115,6 +125,8 @@ if __name__ == '__main__':
         postfix=args.command,
         repos=None,
     )
+    if args.command in STDOUT_RESULT_COMMANDS and logging_config.console_handler:
+        logging_config.console_handler.setStream(sys.stderr)
     LOG.info("Logging to files: %s", logging_config.log_file_paths)
 
     # Call the handler function
@@ -1,2 +1,29 @@
+import os
+
+
 class MusicManagerConfig:
     PROJECT_OUT_ROOT = None
+    STATE_DIR_NAME = "state"
+
+    @classmethod
+    def get_state_dir(cls) -> str:
+        """
+        Directory of state files kept between runs (caches, indexes, learned rate limits).
+        """
+        if not cls.PROJECT_OUT_ROOT:
+            raise ValueError("Project output root directory is not set up yet!")
+        state_dir = os.path.join(cls.PROJECT_OUT_ROOT, cls.STATE_DIR_NAME)
+        os.makedirs(state_dir, exist_ok=True)
+        return state_dir
+
+    @classmethod
+    def get_state_file(cls, file_name: str) -> str:
+        return os.path.join(cls.get_state_dir(), file_name)
+
+    @classmethod
+    def get_output_dir(cls, dir_name: str) -> str:
+        if not cls.PROJECT_OUT_ROOT:
+            raise ValueError("Project output root directory is not set up yet!")
+        output_dir = os.path.join(cls.PROJECT_OUT_ROOT, dir_name)
+        os.makedirs(output_dir, exist_ok=True)
+        return output_dir
@@ -0,0 +1,238 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import requests
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+LOG = logging.getLogger(__name__)
+CACHEABLE_METHODS = {"GET", "HEAD"}
+CACHEABLE_STATUS_CODES = {200, 203, 300, 301, 308, 404, 410}
+PERMANENT_REDIRECT_STATUS_CODES = {301, 308}
+# Freshness of a permanent redirect (e.g. a bit.ly link) without explicit expiration
+PERMANENT_REDIRECT_FRESHNESS_SECS = 30 * 24 * 3600
+# Heuristic freshness is this fraction of the time since the last modification (RFC 7234, 4.2.2)
+HEURISTIC_FRESHNESS_FRACTION = 0.1
+MAX_HEURISTIC_FRESHNESS_SECS = 24 * 3600
+# Headers describing the transferred body, bodies are stored decoded
+HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    directives = {}
+    if not value:
+        return directives
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, arg = part.partition("=")
+        directives[name.strip().lower()] = arg.strip().strip('"') if arg else None
+    return directives
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_freshness_lifetime(headers, status_code: int, now: float) -> float:
+    """
+    Returns the number of seconds the response is fresh for, following RFC 7234, 4.2.1.
+    """
+    cache_control = parse_cache_control(headers.get("Cache-Control"))
+    if "no-cache" in cache_control:
+        return 0
+    # This is a private cache, s-maxage does not apply
+    max_age = _parse_int(cache_control.get("max-age"))
+    if max_age is not None:
+        return max_age
+    date = _parse_http_date(headers.get("Date")) or now
+    expires = headers.get("Expires")
+    if expires is not None:
+        # Invalid dates, e.g. "0", mean already expired
+        expires_at = _parse_http_date(expires)
+        return max(0.0, expires_at - date) if expires_at else 0
+    if status_code in PERMANENT_REDIRECT_STATUS_CODES:
+        return PERMANENT_REDIRECT_FRESHNESS_SECS
+    last_modified = _parse_http_date(headers.get("Last-Modified"))
+    if last_modified:
+        return min(MAX_HEURISTIC_FRESHNESS_SECS, max(0.0, (date - last_modified) * HEURISTIC_FRESHNESS_FRACTION))
+    return 0
+
+
+def is_storable(method: str, resp: Response) -> bool:
+    if method not in CACHEABLE_METHODS or resp.status_code not in CACHEABLE_STATUS_CODES:
+        return False
+    cache_control = parse_cache_control(resp.headers.get("Cache-Control"))
+    if "no-store" in cache_control:
+        return False
+    # Only Accept-Encoding variants are handled: bodies are stored decoded
+    vary = {v.strip().lower() for v in resp.headers.get("Vary", "").split(",") if v.strip()}
+    return not (vary - {"accept-encoding"})
+
+
+@dataclass
+class CachedResponse:
+    method: str
+    url: str
+    final_url: str
+    status_code: int
+    headers: Dict[str, str]
+    body: bytes
+    stored_at: float
+    expires_at: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def get_conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.headers.get("ETag"):
+            headers["If-None-Match"] = self.headers["ETag"]
+        if self.headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = self.headers["Last-Modified"]
+        return headers
+
+    def to_response(self) -> Response:
+        resp = Response()
+        resp.status_code = self.status_code
+        resp.headers = CaseInsensitiveDict(self.headers)
+        resp._content = self.body
+        resp.url = self.final_url
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        resp.reason = "OK (cached)"
+        resp.from_cache = True
+        return resp
+
+
+class HttpCache:
+    """
+    Private HTTP cache of responses, stored in a SQLite file.
+    Fresh responses are served without a request. Stale responses with validators (ETag, Last-Modified)
+    are revalidated with a conditional request, a 304 response refreshes the stored one.
+    The total size of stored bodies is capped, least recently used responses are evicted first.
+    """
+    def __init__(self, db_path: str, max_size_bytes: int = 512 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"fresh_hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "evicted": 0}
+        self._conn = sqlite3.connect(db_path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS http_cache ("
+                           "key TEXT PRIMARY KEY, "
+                           "final_url TEXT NOT NULL, "
+                           "status_code INTEGER NOT NULL, "
+                           "headers TEXT NOT NULL, "
+                           "body BLOB NOT NULL, "
+                           "size INTEGER NOT NULL, "
+                           "stored_at REAL NOT NULL, "
+                           "expires_at REAL NOT NULL, "
+                           "last_access REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS http_cache_last_access ON http_cache(last_access)")
+
+    @staticmethod
+    def _key(method: str, url: str) -> str:
+        return method + " " + url
+
+    def lookup(self, method: str, url: str) -> Optional[CachedResponse]:
+        with self._lock:
+            key = self._key(method, url)
+            row = self._conn.execute("SELECT final_url, status_code, headers, body, stored_at, expires_at "
+                                     "FROM http_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE http_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+        final_url, status_code, headers, body, stored_at, expires_at = row
+        return CachedResponse(method, url, final_url, status_code, json.loads(headers), body, stored_at, expires_at)
+
+    def record_fresh_hit(self):
+        with self._lock:
+            self.stats["fresh_hits"] += 1
+
+    def store(self, method: str, url: str, resp: Response) -> Optional[CachedResponse]:
+        if not is_storable(method, resp):
+            return None
+        # The final response is served for the URL of the first hop, a redirect chain is fresh while every hop is
+        now = time.time()
+        expires_at = min(now + get_freshness_lifetime(hop.headers, hop.status_code, now) -
+                         (_parse_int(hop.headers.get("Age")) or 0) for hop in resp.history + [resp])
+        headers = {k: v for k, v in resp.headers.items() if k.lower() not in HOP_HEADERS}
+        body = resp.content if method == "GET" else b""
+        if len(body) > self.max_size_bytes:
+            return None
+        cached = CachedResponse(method, url, resp.url, resp.status_code, headers, body, now, expires_at)
+        if not cached.is_fresh and not cached.get_conditional_headers():
+            # Could never be used without a full request
+            return None
+        self._write(cached)
+        with self._lock:
+            self.stats["stored"] += 1
+        return cached
+
+    def refresh(self, cached: CachedResponse, not_modified_resp: Response) -> CachedResponse:
+        """
+        Updates the stored response with the headers of a 304 response (RFC 7234, 4.3.4).
+        """
+        now = time.time()
+        cached.headers.update({k: v for k, v in not_modified_resp.headers.items() if k.lower() not in HOP_HEADERS})
+        cached.stored_at = now
+        cached.expires_at = now + get_freshness_lifetime(cached.headers, cached.status_code, now)
+        self._write(cached)
+        with self._lock:
+            self.stats["revalidated"] += 1
+        return cached
+
+    def log_stats(self):
+        LOG.info("HTTP cache stats: %s", self.stats)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, cached: CachedResponse):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO http_cache"
+                               "(key, final_url, status_code, headers, body, size, stored_at, expires_at, last_access) "
+                               "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               (self._key(cached.method, cached.url), cached.final_url, cached.status_code,
+                                json.dumps(cached.headers), cached.body, len(cached.body), cached.stored_at,
+                                cached.expires_at, time.time()))
+            self._evict()
+
+    def _evict(self):
+        total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return
+        # Evict down to 90% of the cap, so eviction does not run on every write
+        to_free = total_size - int(self.max_size_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM http_cache ORDER BY last_access").fetchall()
+        keys = []
+        for key, size in rows:
+            if to_free <= 0:
+                break
+            keys.append((key,))
+            to_free -= size
+        self._conn.executemany("DELETE FROM http_cache WHERE key = ?", keys)
+        self.stats["evicted"] += len(keys)
+        LOG.debug("Evicted %d responses from HTTP cache", len(keys))
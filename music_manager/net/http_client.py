@@ -0,0 +1,169 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict
+from urllib.parse import urlparse
+
+import requests
+from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
+
+from music_manager.cache.cassette import Cassette
+from music_manager.net.http_cache import HttpCache, CACHEABLE_METHODS
+from music_manager.net.rate_limiter import AdaptiveRateLimiter, THROTTLED_STATUS_CODES
+
+LOG = logging.getLogger(__name__)
+DEFAULT_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) " \
+                     "Chrome/120.0 Safari/537.36"
+
+
+def _accept_encoding():
+    # urllib3 only decodes brotli if one of the brotli packages is installed
+    try:
+        import brotli  # noqa: F401
+        return "gzip, deflate, br"
+    except ImportError:
+        return "gzip, deflate"
+
+
+@dataclass
+class HttpClientConfig:
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    # Number of per-host connection pools to keep, and the number of kept-alive connections per host
+    pool_connections: int = 16
+    pool_maxsize: int = 16
+    connect_retries: int = 2
+    # Number of times a request is repeated after a 429 / 503 response, once the rate limiter lets it through
+    throttled_retries: int = 2
+    # SQLite file of the HTTP response cache, responses are not cached if not set
+    cache_file: str = None
+    cache_max_size_bytes: int = 512 * 1024 * 1024
+    headers: Dict[str, str] = field(default_factory=lambda: {
+        "User-Agent": DEFAULT_USER_AGENT,
+        "Accept-Encoding": _accept_encoding(),
+    })
+
+    @property
+    def timeout(self):
+        return self.connect_timeout, self.read_timeout
+
+
+class HttpClient:
+    """
+    Shared HTTP transport of all content providers and URL resolution services.
+    One session is kept for the whole process, so connections (and TLS sessions) to the same host are reused.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, config: HttpClientConfig = None):
+        self.config = config if config else HttpClientConfig()
+        self._host_headers: Dict[str, Dict[str, str]] = {}
+        self.session = self._create_session()
+        self.cache = None
+        if self.config.cache_file:
+            self.cache = HttpCache(self.config.cache_file, max_size_bytes=self.config.cache_max_size_bytes)
+
+    @classmethod
+    def configure(cls, config: HttpClientConfig) -> "HttpClient":
+        """
+        Replaces the shared client. Host headers registered on the previous client are kept.
+        """
+        with cls._instance_lock:
+            host_headers = {}
+            if cls._instance:
+                host_headers = cls._instance._host_headers
+                cls._instance.close()
+            cls._instance = HttpClient(config)
+            cls._instance._host_headers.update(host_headers)
+            LOG.info("Configured shared HTTP client: %s", config)
+            return cls._instance
+
+    @classmethod
+    def get_instance(cls) -> "HttpClient":
+        with cls._instance_lock:
+            if not cls._instance:
+                cls._instance = HttpClient()
+            return cls._instance
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.headers.update(self.config.headers)
+        retry = Retry(total=self.config.connect_retries, connect=self.config.connect_retries, read=0, status=0,
+                      backoff_factor=0.3)
+        adapter = HTTPAdapter(pool_connections=self.config.pool_connections,
+                              pool_maxsize=self.config.pool_maxsize,
+                              max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def add_host_headers(self, host_fragment: str, headers: Dict[str, str]):
+        """
+        Registers headers sent with every request to hosts containing host_fragment, e.g. 'facebook.com'.
+        """
+        self._host_headers[host_fragment] = dict(headers)
+
+    def get(self, url, headers: Dict[str, str] = None, **kwargs) -> Response:
+        return self.request("GET", url, headers=headers, **kwargs)
+
+    def head(self, url, headers: Dict[str, str] = None, allow_redirects=True, **kwargs) -> Response:
+        return self.request("HEAD", url, headers=headers, allow_redirects=allow_redirects, **kwargs)
+
+    def request(self, method: str, url: str, headers: Dict[str, str] = None, **kwargs) -> Response:
+        cassette = Cassette.get_instance()
+        if cassette:
+            cassette.check_network_allowed("{} {}".format(method, url))
+        kwargs.setdefault("timeout", self.config.timeout)
+        final_headers = self._get_headers_for_url(url)
+        if headers:
+            final_headers.update(headers)
+
+        # Requests with caller-specific headers may get different responses, they are not cached
+        if not self.cache or method not in CACHEABLE_METHODS or headers or kwargs.get("stream"):
+            return self._send(method, url, final_headers, **kwargs)
+
+        cached = self.cache.lookup(method, url)
+        if cached and cached.is_fresh:
+            LOG.debug("Serving fresh response from HTTP cache: %s %s", method, url)
+            self.cache.record_fresh_hit()
+            return cached.to_response()
+        if cached and method == "GET":
+            final_headers.update(cached.get_conditional_headers())
+
+        resp = self._send(method, url, final_headers, **kwargs)
+        if cached and resp.status_code == 304:
+            LOG.debug("Cached response is not modified: %s %s", method, url)
+            return self.cache.refresh(cached, resp).to_response()
+        self.cache.store(method, url, resp)
+        return resp
+
+    def _send(self, method: str, url: str, final_headers: Dict[str, str], **kwargs) -> Response:
+        rate_limiter = AdaptiveRateLimiter.get_instance()
+        attempt = 0
+        while True:
+            with rate_limiter.slot(url) as ticket:
+                LOG.debug("%s %s", method, url)
+                resp = self.session.request(method, url, headers=final_headers, **kwargs)
+                ticket.record_response(resp)
+            if resp.status_code not in THROTTLED_STATUS_CODES or attempt >= self.config.throttled_retries:
+                return resp
+            attempt += 1
+            LOG.warning("Request throttled with status %d, retrying (%d/%d): %s",
+                        resp.status_code, attempt, self.config.throttled_retries, url)
+
+    def _get_headers_for_url(self, url) -> Dict[str, str]:
+        host = urlparse(url).netloc
+        headers = {}
+        for host_fragment, host_headers in self._host_headers.items():
+            if host_fragment in host:
+                headers.update(host_headers)
+        return headers
+
+    def close(self):
+        self.session.close()
+        if self.cache:
+            self.cache.log_stats()
+            self.cache.close()
@@ -0,0 +1,278 @@
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Dict
+from urllib.parse import urlparse
+
+LOG = logging.getLogger(__name__)
+THROTTLED_STATUS_CODES = {429, 503}
+
+
+@dataclass
+class DomainPolicy:
+    # Token bucket: sustained requests per second and the maximum burst
+    rate: float = 2.0
+    burst: int = 4
+    min_rate: float = 0.2
+    max_rate: float = 10.0
+    # Number of requests in flight to the domain
+    concurrency: int = 2
+    max_concurrency: int = 8
+    # Responses slower than this are treated as a sign of overload
+    slow_response_secs: float = 10.0
+    # Number of consecutive healthy responses after which rate and concurrency are raised
+    increase_after: int = 10
+    # Pause applied to a domain on 429 / 503 responses without a Retry-After header
+    default_penalty_secs: float = 5.0
+
+
+DEFAULT_POLICIES: Dict[str, DomainPolicy] = {
+    # Facebook blocks accounts that load too many pages, stay well below what it would serve
+    "facebook.com": DomainPolicy(rate=0.5, burst=1, min_rate=0.05, max_rate=1.0, concurrency=1, max_concurrency=2,
+                                 slow_response_secs=20.0, default_penalty_secs=60.0),
+}
+
+
+def get_domain(url: str) -> str:
+    host = urlparse(url).netloc.lower().split(":")[0]
+    labels = host.split(".")
+    if len(labels) <= 2:
+        return host
+    return ".".join(labels[-2:])
+
+
+def parse_retry_after(value: str or None) -> float or None:
+    """
+    Retry-After is either a number of seconds or an HTTP date.
+    Returns the number of seconds to wait, or None if the value is missing or malformed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        LOG.warning("Cannot parse Retry-After header value: %s", value)
+        return None
+
+
+@dataclass
+class DomainState:
+    domain: str
+    policy: DomainPolicy
+    rate: float
+    concurrency: int
+    tokens: float
+    # Wall-clock time, shared between processes via the state store
+    blocked_until: float = 0.0
+    last_refill: float = field(default_factory=time.monotonic)
+    last_sync: float = 0.0
+    in_flight: int = 0
+    healthy_streak: int = 0
+    cond: threading.Condition = field(default_factory=threading.Condition, repr=False)
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.policy.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def increase(self):
+        self.rate = min(self.policy.max_rate, self.rate * 1.25)
+        self.concurrency = min(self.policy.max_concurrency, self.concurrency + 1)
+
+    def decrease(self):
+        self.rate = max(self.policy.min_rate, self.rate / 2)
+        self.concurrency = max(1, self.concurrency // 2)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class RequestTicket:
+    def __init__(self, domain: str):
+        self.domain = domain
+        self.started = time.monotonic()
+        self.status: int or None = None
+        self.retry_after: float or None = None
+
+    def record_response(self, response):
+        self.status = response.status_code
+        self.retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+    def record_status(self, status: int, retry_after: float = None):
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+
+class RateLimiterStateStore:
+    """
+    Persists the learned rate, concurrency and block deadline of each domain, so they survive between runs
+    and are shared by concurrently running processes.
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS domain_state ("
+                           "domain TEXT PRIMARY KEY, rate REAL, concurrency INTEGER, "
+                           "blocked_until REAL, updated_at REAL)")
+
+    def load(self, domain: str):
+        with self._lock:
+            return self._conn.execute("SELECT rate, concurrency, blocked_until, updated_at FROM domain_state "
+                                      "WHERE domain = ?", (domain,)).fetchone()
+
+    def save(self, state: DomainState):
+        with self._lock:
+            # Block deadlines only ever grow, another process may have set a later one
+            self._conn.execute("INSERT INTO domain_state(domain, rate, concurrency, blocked_until, updated_at) "
+                               "VALUES (?, ?, ?, ?, ?) ON CONFLICT(domain) DO UPDATE SET "
+                               "rate = excluded.rate, concurrency = excluded.concurrency, "
+                               "blocked_until = MAX(blocked_until, excluded.blocked_until), "
+                               "updated_at = excluded.updated_at",
+                               (state.domain, state.rate, state.concurrency, state.blocked_until, time.time()))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class AdaptiveRateLimiter:
+    """
+    Per-domain politeness scheduler.
+    Every domain has a token bucket and a concurrency limit. Both are raised additively after a streak of
+    healthy responses and halved on 429 / 5xx responses, errors or slow responses (AIMD).
+    Retry-After pauses the whole domain.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, store: RateLimiterStateStore = None, policies: Dict[str, DomainPolicy] = None,
+                 enabled=True, sync_interval_secs: float = 5.0):
+        self.store = store
+        self.policies = dict(DEFAULT_POLICIES)
+        if policies:
+            self.policies.update(policies)
+        self.enabled = enabled
+        self.sync_interval_secs = sync_interval_secs
+        self._states: Dict[str, DomainState] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, limiter: "AdaptiveRateLimiter") -> "AdaptiveRateLimiter":
+        with cls._instance_lock:
+            cls._instance = limiter
+            return cls._instance
+
+    @classmethod
+    def get_instance(cls) -> "AdaptiveRateLimiter":
+        with cls._instance_lock:
+            if not cls._instance:
+                cls._instance = AdaptiveRateLimiter()
+            return cls._instance
+
+    @contextmanager
+    def slot(self, url: str):
+        ticket = RequestTicket(get_domain(url))
+        if not self.enabled:
+            yield ticket
+            return
+
+        state = self._acquire(ticket.domain)
+        ticket.started = time.monotonic()
+        failed = False
+        try:
+            yield ticket
+        except Exception:
+            failed = True
+            raise
+        finally:
+            # Interrupts and early closes release the slot too, they don't count as failures of the domain
+            self._release(state, ticket, failed=failed)
+
+    def get_state(self, domain: str) -> DomainState:
+        with self._lock:
+            if domain not in self._states:
+                policy = self.policies.get(domain, DomainPolicy())
+                state = DomainState(domain, policy, rate=policy.rate, concurrency=policy.concurrency,
+                                    tokens=float(policy.burst))
+                self._sync_from_store(state)
+                self._states[domain] = state
+            return self._states[domain]
+
+    def _acquire(self, domain: str) -> DomainState:
+        state = self.get_state(domain)
+        with state.cond:
+            while True:
+                if time.monotonic() - state.last_sync > self.sync_interval_secs:
+                    self._sync_from_store(state)
+                state.refill()
+                now = time.time()
+                if state.blocked_until > now:
+                    wait_secs = state.blocked_until - now
+                    LOG.debug("Domain '%s' is paused for %.1f seconds", domain, wait_secs)
+                elif state.in_flight >= state.concurrency:
+                    wait_secs = 1.0
+                elif state.tokens < 1:
+                    wait_secs = (1 - state.tokens) / state.rate
+                else:
+                    state.tokens -= 1
+                    state.in_flight += 1
+                    return state
+                state.cond.wait(timeout=wait_secs)
+
+    def _release(self, state: DomainState, ticket: RequestTicket, failed: bool):
+        with state.cond:
+            state.in_flight -= 1
+            throttled = ticket.status is not None and (ticket.status in THROTTLED_STATUS_CODES or ticket.status >= 500)
+            slow = ticket.elapsed > state.policy.slow_response_secs
+            changed = False
+            if failed or throttled or slow:
+                LOG.info("Slowing down requests to '%s'. Status: %s, elapsed: %.1fs, failed: %s",
+                         state.domain, ticket.status, ticket.elapsed, failed)
+                state.decrease()
+                state.healthy_streak = 0
+                changed = True
+            else:
+                state.healthy_streak += 1
+                if state.healthy_streak >= state.policy.increase_after:
+                    state.increase()
+                    state.healthy_streak = 0
+                    changed = True
+
+            pause_secs = ticket.retry_after
+            if pause_secs is None and ticket.status in THROTTLED_STATUS_CODES:
+                pause_secs = state.policy.default_penalty_secs
+            if pause_secs:
+                LOG.warning("Pausing requests to '%s' for %.1f seconds", state.domain, pause_secs)
+                state.blocked_until = max(state.blocked_until, time.time() + pause_secs)
+                changed = True
+
+            if changed and self.store:
+                self.store.save(state)
+            state.cond.notify_all()
+
+    def _sync_from_store(self, state: DomainState):
+        state.last_sync = time.monotonic()
+        if not self.store:
+            return
+        row = self.store.load(state.domain)
+        if not row:
+            return
+        rate, concurrency, blocked_until, _ = row
+        state.rate = min(max(rate, state.policy.min_rate), state.policy.max_rate)
+        state.concurrency = min(max(concurrency, 1), state.policy.max_concurrency)
+        state.blocked_until = max(state.blocked_until, blocked_until)
+
+    def close(self):
+        if self.store:
+            self.store.close()
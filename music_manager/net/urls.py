@@ -0,0 +1,107 @@
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Iterable, List, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track the source of a click and never change the content
+TRACKING_QUERY_PARAMS = {"fbclid", "gclid", "si"}
+TRACKING_QUERY_PARAM_PREFIXES = ("utm_",)
+# Canonical URLs of links repeated in large inputs are computed once
+CANONICAL_URL_CACHE_SIZE = 256 * 1024
+
+YOUTUBE_VIDEO_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{11}$")
+YOUTUBE_VIDEO_PATH_PATTERN = re.compile(r"^/(?:embed|shorts|live|v)/([A-Za-z0-9_-]{11})")
+
+QueryParams = List[Tuple[str, str]]
+
+
+@dataclass(frozen=True)
+class ProviderUrlRule:
+    """
+    Canonicalization rule of the URLs of a content provider.
+    URLs of any of the hosts are rewritten to the canonical host with https, and only the kept query parameters
+    are preserved. The normalizer can rewrite the path and the query further, e.g. short links to full links.
+    """
+    provider: str
+    hosts: FrozenSet[str]
+    canonical_host: str
+    kept_query_params: FrozenSet[str] = frozenset()
+    normalizer: Callable[[str, QueryParams], Tuple[str, QueryParams]] = field(default=None, compare=False)
+
+
+def _normalize_youtube(path: str, query: QueryParams) -> Tuple[str, QueryParams]:
+    # Short links, embedded players and shorts are all watch pages of the same video
+    match = YOUTUBE_VIDEO_PATH_PATTERN.match(path)
+    if match:
+        return "/watch", [("v", match.group(1))]
+    if path == "/watch":
+        return path, [(k, v) for k, v in query if k == "v"]
+    return path, query
+
+
+def _normalize_youtube_short_link(path: str, query: QueryParams) -> Tuple[str, QueryParams]:
+    video_id = path.lstrip("/")
+    if YOUTUBE_VIDEO_ID_PATTERN.match(video_id):
+        return "/watch", [("v", video_id)]
+    return path, query
+
+
+PROVIDER_URL_RULES: List[ProviderUrlRule] = [
+    ProviderUrlRule("youtube", frozenset({"youtube.com", "www.youtube.com", "m.youtube.com", "music.youtube.com",
+                                          "youtube-nocookie.com", "www.youtube-nocookie.com"}),
+                    "www.youtube.com", frozenset({"v", "list"}), _normalize_youtube),
+    ProviderUrlRule("youtube", frozenset({"youtu.be", "www.youtu.be"}), "www.youtube.com",
+                    normalizer=_normalize_youtube_short_link),
+    # ?in= (the playlist the track was opened from) and ?si= (share tracking) don't change the track
+    ProviderUrlRule("soundcloud", frozenset({"soundcloud.com", "www.soundcloud.com", "m.soundcloud.com"}),
+                    "soundcloud.com"),
+    ProviderUrlRule("mixcloud", frozenset({"mixcloud.com", "www.mixcloud.com", "m.mixcloud.com"}),
+                    "www.mixcloud.com"),
+    ProviderUrlRule("beatport", frozenset({"beatport.com", "www.beatport.com"}), "www.beatport.com"),
+    ProviderUrlRule("facebook", frozenset({"facebook.com", "www.facebook.com", "m.facebook.com", "mbasic.facebook.com",
+                                           "web.facebook.com", "touch.facebook.com"}),
+                    "www.facebook.com", frozenset({"story_fbid", "id", "v", "fbid", "set"})),
+]
+_RULES_BY_HOST: Dict[str, ProviderUrlRule] = {host: rule for rule in PROVIDER_URL_RULES for host in rule.hosts}
+
+
+def get_url_rule(url: str) -> ProviderUrlRule or None:
+    return _RULES_BY_HOST.get(urlsplit(url.strip()).netloc.lower())
+
+
+@lru_cache(maxsize=CANONICAL_URL_CACHE_SIZE)
+def canonicalize_url(url: str) -> str:
+    """
+    Returns a canonical form of the URL, used as the key of caches, for provider routing and duplicate detection.
+    Scheme and host are lowercased, tracking query parameters, the fragment and the trailing slash are removed.
+    URLs of known content providers are rewritten by the rule of the provider, e.g. youtu.be/ID and
+    m.youtube.com/watch?v=ID&feature=share both become https://www.youtube.com/watch?v=ID.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    path = parts.path.rstrip("/") if parts.path != "/" else ""
+    rule = _RULES_BY_HOST.get(host)
+    if not rule:
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                 if k not in TRACKING_QUERY_PARAMS and not k.startswith(TRACKING_QUERY_PARAM_PREFIXES)]
+        return urlunsplit((parts.scheme.lower(), host, path, urlencode(query), ""))
+
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k in rule.kept_query_params]
+    if rule.normalizer:
+        path, query = rule.normalizer(path, query)
+    return urlunsplit(("https", rule.canonical_host, path, urlencode(query), ""))
+
+
+def canonicalize_urls(urls: Iterable[str]) -> List[str]:
+    """
+    Canonicalizes URLs in bulk, URLs repeated in the input are only canonicalized once.
+    """
+    canonical: Dict[str, str] = {}
+    result = []
+    for url in urls:
+        value = canonical.get(url)
+        if value is None:
+            value = canonical[url] = canonicalize_url(url)
+        result.append(value)
+    return result
@@ -0,0 +1,99 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any
+
+from music_manager.cache.single_flight import SingleFlight
+from music_manager.commands.addnewentitiestosheet.music_entity_creator import MusicEntityCreator, MusicEntityType
+
+LOG = logging.getLogger(__name__)
+
+
+class ResolverService:
+    """
+    Resolves links with a long-lived MusicEntityCreator, so browser sessions and connections stay warm.
+    Concurrent requests for the same URL are coalesced into a single resolution and
+    successful results are kept in memory for a while.
+    """
+    def __init__(self, music_entity_creator: MusicEntityCreator, batch_workers: int = 8, max_batch_size: int = 100,
+                 result_cache_size: int = 1000, result_cache_ttl_secs: float = 3600.0):
+        self.music_entity_creator = music_entity_creator
+        self.max_batch_size = max_batch_size
+        self.result_cache_size = result_cache_size
+        self.result_cache_ttl_secs = result_cache_ttl_secs
+        self._single_flight = SingleFlight()
+        self._batch_pool = ThreadPoolExecutor(max_workers=batch_workers, thread_name_prefix="batch-resolver")
+        self._results: OrderedDict = OrderedDict()
+        self._results_lock = threading.Lock()
+        self.resolved_count = 0
+        self.cache_hits = 0
+
+    def resolve(self, url: str) -> Dict[str, Any]:
+        url = url.strip()
+        if not url:
+            raise ValueError("URL should not be empty!")
+        cached = self._get_cached(url)
+        if cached is not None:
+            return {"url": url, "cached": True, "entities": cached}
+        start = time.monotonic()
+        entities = self._single_flight.do(url, lambda: self._resolve_uncached(url))
+        LOG.info("Resolved URL '%s' in %.2f seconds", url, time.monotonic() - start)
+        return {"url": url, "cached": False, "entities": entities}
+
+    def resolve_batch(self, urls: List[str]) -> List[Dict[str, Any]]:
+        if len(urls) > self.max_batch_size:
+            raise ValueError("Too many URLs in batch: {}, maximum is: {}".format(len(urls), self.max_batch_size))
+        futures = [self._batch_pool.submit(self.resolve_or_error, url) for url in urls]
+        return [f.result() for f in futures]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._results_lock:
+            cached_urls = len(self._results)
+        return {
+            "resolved": self.resolved_count,
+            "cache_hits": self.cache_hits,
+            "cached_urls": cached_urls,
+            "coalesced_calls": self._single_flight.coalesced_calls,
+        }
+
+    def close(self):
+        self._batch_pool.shutdown(wait=True)
+        self.music_entity_creator.close()
+
+    def resolve_or_error(self, url: str) -> Dict[str, Any]:
+        try:
+            return self.resolve(url)
+        except Exception as e:
+            LOG.exception("Failed to resolve URL: %s", url)
+            return {"url": url, "error": str(e)}
+
+    def _resolve_uncached(self, url: str) -> List[Dict[str, Any]]:
+        entities = [e.to_dict() for e in self.music_entity_creator.resolve_links([url])]
+        with self._results_lock:
+            self.resolved_count += 1
+        # Not found results are not kept, the link may work when it is submitted again
+        if entities and all(e["type"] != MusicEntityType.NOT_FOUND.value for e in entities):
+            self._put_cached(url, entities)
+        return entities
+
+    def _get_cached(self, url: str) -> List[Dict[str, Any]] or None:
+        with self._results_lock:
+            entry = self._results.get(url)
+            if entry is None:
+                return None
+            stored_at, entities = entry
+            if time.monotonic() - stored_at > self.result_cache_ttl_secs:
+                del self._results[url]
+                return None
+            self._results.move_to_end(url)
+            self.cache_hits += 1
+            return entities
+
+    def _put_cached(self, url: str, entities: List[Dict[str, Any]]):
+        with self._results_lock:
+            self._results[url] = (time.monotonic(), entities)
+            self._results.move_to_end(url)
+            while len(self._results) > self.result_cache_size:
+                self._results.popitem(last=False)
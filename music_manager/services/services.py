@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
 from typing import Iterable
 
-import requests
+from music_manager.cache.page_cache import PageMode
+from music_manager.cache.page_source import fetch_page
+from music_manager.net.http_client import HttpClient
 
 
 class URLResolutionServiceAbs(ABC):
@@ -37,9 +39,7 @@ class BitLyURLResolutionService(URLResolutionServiceAbs):
         return False
 
     def resolve(self, url):
-        session = requests.Session()  # so connections are recycled
-        resp = session.head(url, allow_redirects=True)
-        return resp.url
+        return fetch_page(url, PageMode.REDIRECT, lambda: HttpClient.get_instance().head(url, allow_redirects=True).url)
 
 
 class URLResolutionServices:
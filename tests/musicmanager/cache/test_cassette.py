@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from music_manager.cache.cassette import Cassette, CassetteMode, CassetteMissError
+from music_manager.cache.page_cache import PageMode
+from music_manager.cache.page_source import fetch_page
+
+
+def fail_loader():
+    raise AssertionError("Network should not be used while replaying")
+
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "run.cassette.gz")
+
+    def tearDown(self):
+        Cassette.configure(None)
+        self.tmp_dir.cleanup()
+
+    def test_replays_recorded_pages_in_order(self):
+        url = "https://www.mixcloud.com/someone/show/"
+        Cassette.configure(Cassette(self.path, CassetteMode.RECORD))
+        fetch_page(url, PageMode.PLAIN, lambda: "<html>v1</html>")
+        fetch_page(url, PageMode.PLAIN, lambda: "<html>v2</html>")
+        fetch_page(url, PageMode.SELENIUM, lambda: "<html>rendered</html>")
+        Cassette.configure(None)
+
+        Cassette.configure(Cassette(self.path, CassetteMode.REPLAY))
+        self.assertEqual("<html>v1</html>", fetch_page(url, PageMode.PLAIN, fail_loader))
+        self.assertEqual("<html>v2</html>", fetch_page(url, PageMode.PLAIN, fail_loader))
+        self.assertEqual("<html>v2</html>", fetch_page(url, PageMode.PLAIN, fail_loader))
+        self.assertEqual("<html>rendered</html>", fetch_page(url, PageMode.SELENIUM, fail_loader))
+
+    def test_replay_fails_on_miss(self):
+        Cassette(self.path, CassetteMode.RECORD).close()
+        cassette = Cassette(self.path, CassetteMode.REPLAY)
+        with self.assertRaises(CassetteMissError):
+            cassette.fetch("https://soundcloud.com/someone/track", PageMode.PLAIN, fail_loader)
+        with self.assertRaises(CassetteMissError):
+            cassette.check_network_allowed("GET https://soundcloud.com/someone/track")
+
+    def test_unclosed_cassette_can_be_replayed(self):
+        cassette = Cassette(self.path, CassetteMode.RECORD)
+        cassette.fetch("https://youtu.be/abc", PageMode.YOUTUBE_DL_INFO, lambda: '{"duration": 3600}')
+
+        replayed = Cassette(self.path, CassetteMode.REPLAY)
+        self.assertEqual('{"duration": 3600}', replayed.fetch("https://youtu.be/abc", PageMode.YOUTUBE_DL_INFO,
+                                                             fail_loader))
+        cassette.close()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import time
+import unittest
+
+from music_manager.cache.metadata_cache import MetadataCache, UrlMetadata
+
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "metadata.sqlite")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def _metadata(url, provider="youtube", stored_at=None):
+        return UrlMetadata(url, provider, "Some mix", 3600, "mix", stored_at if stored_at else time.time())
+
+    def test_entries_are_persisted_and_keyed_by_canonical_url(self):
+        cache = MetadataCache(self.db_path)
+        cache.put("https://www.youtube.com/watch?v=abc&fbclid=123", self._metadata("https://www.youtube.com/watch?v=abc"))
+        cache.close()
+
+        cache = MetadataCache(self.db_path)
+        metadata = cache.get("HTTPS://www.YouTube.com/watch?v=abc#t=10")
+        self.assertEqual("Some mix", metadata.title)
+        self.assertEqual(3600, metadata.duration_seconds)
+        self.assertEqual(1, cache.stats["disk_hits"])
+        cache.get("https://www.youtube.com/watch?v=abc")
+        self.assertEqual(1, cache.stats["memory_hits"])
+        cache.close()
+
+    def test_expired_entries_are_misses(self):
+        cache = MetadataCache(self.db_path, ttls={"youtube": 60})
+        cache.put("https://youtu.be/old", self._metadata("https://youtu.be/old", stored_at=time.time() - 120))
+        cache.put("https://soundcloud.com/old", self._metadata("https://soundcloud.com/old", provider="soundcloud",
+                                                               stored_at=time.time() - 120))
+        self.assertIsNone(cache.get("https://youtu.be/old"))
+        # Default TTL applies to providers without a TTL
+        self.assertIsNotNone(cache.get("https://soundcloud.com/old"))
+        self.assertEqual(1, cache.stats["expired"])
+        self.assertEqual(1, cache.purge_expired())
+        cache.close()
+
+    def test_memory_tier_is_bounded(self):
+        cache = MetadataCache(self.db_path, memory_size=2)
+        for i in range(5):
+            url = "https://youtu.be/{}".format(i)
+            cache.put(url, self._metadata(url))
+        self.assertEqual(2, len(cache._memory))
+        self.assertIsNotNone(cache.get("https://youtu.be/0"))
+        self.assertEqual(1, cache.stats["disk_hits"])
+        cache.close()
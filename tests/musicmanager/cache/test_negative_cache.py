@@ -0,0 +1,44 @@
+import os
+import tempfile
+import time
+import unittest
+
+from music_manager.cache.negative_cache import NegativeCache, FailureReason
+
+HOUR_SECS = 3600
+
+
+class TestNegativeCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = NegativeCache(os.path.join(self.tmp_dir.name, "negative.sqlite"),
+                                   base_backoff_secs=HOUR_SECS, max_backoff_secs=5 * HOUR_SECS)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_backoff_doubles_up_to_max(self):
+        self.assertEqual([1, 2, 4, 5, 5], [self.cache.get_backoff_secs(f) / HOUR_SECS for f in range(1, 6)])
+
+    def test_failed_link_is_skipped_until_backoff_expires(self):
+        url = "https://soundcloud.com/blocked"
+        self.assertFalse(self.cache.should_skip(url))
+        self.cache.record_failure(url, FailureReason.NOT_FOUND, "soundcloud")
+        entry = self.cache.record_failure(url + "/", FailureReason.NOT_FOUND, "soundcloud")
+        self.assertEqual(2, entry.failures)
+        self.assertAlmostEqual(time.time() + 2 * HOUR_SECS, entry.next_retry_at, delta=5)
+        self.assertTrue(self.cache.should_skip(url))
+        self.assertEqual([], self.cache.get_due_entries())
+
+    def test_due_entries_and_success(self):
+        self.cache.base_backoff_secs = 0
+        self.cache.record_failure("https://unknown.com/a", FailureReason.UNKNOWN_PROVIDER)
+        due = self.cache.get_due_entries()
+        self.assertEqual(["https://unknown.com/a"], [e.url for e in due])
+        self.assertEqual(FailureReason.UNKNOWN_PROVIDER, due[0].reason)
+        self.assertFalse(self.cache.should_skip("https://unknown.com/a"))
+
+        self.cache.record_success("https://unknown.com/a")
+        self.assertIsNone(self.cache.get("https://unknown.com/a"))
+        self.assertEqual(1, self.cache.stats["recovered"])
@@ -0,0 +1,41 @@
+import unittest
+
+from music_manager.cache.page_cache import PageCache, PageMode
+
+
+class TestPageCache(unittest.TestCase):
+    def test_page_is_loaded_once_per_mode(self):
+        cache = PageCache()
+        loads = []
+
+        def loader(value):
+            def load():
+                loads.append(value)
+                return value, 10
+            return load
+
+        self.assertEqual("plain", cache.get_or_load("https://soundcloud.com/a", PageMode.PLAIN, loader("plain")))
+        self.assertEqual("plain", cache.get_or_load("https://soundcloud.com/a", PageMode.PLAIN, loader("other")))
+        self.assertEqual("js", cache.get_or_load("https://soundcloud.com/a", PageMode.REQUESTS_HTML, loader("js")))
+        self.assertEqual(["plain", "js"], loads)
+        self.assertEqual({"hits": 1, "misses": 2, "evictions": 0}, cache.stats)
+
+    def test_least_recently_used_pages_are_evicted(self):
+        cache = PageCache(max_bytes=25)
+        for url in ["a", "b"]:
+            cache.get_or_load(url, PageMode.PLAIN, lambda: (url, 10))
+        # Touch 'a', so 'b' is evicted by 'c'
+        cache.get_or_load("a", PageMode.PLAIN, lambda: ("new", 10))
+        cache.get_or_load("c", PageMode.PLAIN, lambda: ("c", 10))
+        self.assertEqual("a", cache.get_or_load("a", PageMode.PLAIN, lambda: ("new", 10)))
+        self.assertEqual("new", cache.get_or_load("b", PageMode.PLAIN, lambda: ("new", 10)))
+        self.assertEqual(2, cache.stats["evictions"])
+
+    def test_failed_loads_are_not_cached(self):
+        cache = PageCache()
+
+        def failing_loader():
+            raise IOError("Connection reset")
+
+        self.assertRaises(IOError, cache.get_or_load, "a", PageMode.PLAIN, failing_loader)
+        self.assertEqual("page", cache.get_or_load("a", PageMode.PLAIN, lambda: ("page", 1)))
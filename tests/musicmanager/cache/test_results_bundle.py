@@ -0,0 +1,67 @@
+import os
+import tempfile
+import time
+import unittest
+
+from music_manager.cache.metadata_cache import MetadataCache, UrlMetadata
+from music_manager.cache.results_bundle import ResultsBundle, LinkProvenance, ResultSource, import_bundle
+
+
+class TestResultsBundle(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.bundle_path = os.path.join(self.tmp_dir.name, "out", "command-data.zip")
+        self.link_path = os.path.join(self.tmp_dir.name, "latest-command-data-zip-resolve")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write_bundle(self, link, metadata: UrlMetadata):
+        bundle = ResultsBundle(self.bundle_path, "resolve", link_path=self.link_path)
+        entity = {"title": metadata.title, "duration": metadata.duration_seconds, "type": metadata.entity_type,
+                  "url": metadata.url, "src_url": None}
+        bundle.add(entity, LinkProvenance(link, None, metadata.provider, ResultSource.PROVIDER.value, time.time()),
+                   metadata)
+        return bundle.write()
+
+    def test_import_warms_metadata_cache(self):
+        link = "https://www.youtube.com/watch?v=abc&utm_source=fb"
+        metadata = UrlMetadata("https://www.youtube.com/watch?v=abc", "youtube", "Some mix", 3600, "mix", time.time())
+        self.assertEqual(self.bundle_path, self._write_bundle(link, metadata))
+        self.assertEqual(os.path.realpath(self.bundle_path), os.path.realpath(self.link_path))
+
+        cache = MetadataCache(os.path.join(self.tmp_dir.name, "metadata.sqlite"))
+        self.assertEqual(1, import_bundle(self.link_path, cache))
+        self.assertEqual(metadata, cache.get("https://www.youtube.com/watch?v=abc"))
+        cache.close()
+
+    def test_import_keeps_newer_entries(self):
+        link = "https://soundcloud.com/someone/track"
+        old = UrlMetadata(link, "soundcloud", "Old title", 300, "track", time.time() - 100)
+        self._write_bundle(link, old)
+
+        cache = MetadataCache(os.path.join(self.tmp_dir.name, "metadata.sqlite"))
+        new = UrlMetadata(link, "soundcloud", "New title", 300, "track", time.time())
+        cache.put(link, new)
+        self.assertEqual(0, import_bundle(self.bundle_path, cache))
+        self.assertEqual("New title", cache.get(link).title)
+        cache.close()
+
+    def test_bundle_is_not_written_without_links(self):
+        self.assertIsNone(ResultsBundle(self.bundle_path, "resolve").write())
+        self.assertFalse(os.path.exists(self.bundle_path))
+
+    def test_rotating_bundle_is_written_in_parts(self):
+        bundle = ResultsBundle(self.bundle_path, "serve", link_path=self.link_path, max_entities=2)
+        for i in range(5):
+            link = "https://soundcloud.com/someone/track-{}".format(i)
+            bundle.add({"title": "Track {}".format(i)},
+                       LinkProvenance(link, None, "soundcloud", ResultSource.PROVIDER.value, time.time()))
+        part_2 = os.path.join(self.tmp_dir.name, "out", "command-data-2.zip")
+        self.assertEqual(os.path.realpath(part_2), os.path.realpath(self.link_path))
+
+        part_3 = os.path.join(self.tmp_dir.name, "out", "command-data-3.zip")
+        self.assertEqual(part_3, bundle.write())
+        self.assertEqual(["command-data-1.zip", "command-data-2.zip", "command-data-3.zip"],
+                         sorted(os.listdir(os.path.dirname(self.bundle_path))))
+        self.assertIsNone(bundle.write())
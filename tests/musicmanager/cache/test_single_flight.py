@@ -0,0 +1,51 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from music_manager.cache.single_flight import SingleFlight
+
+
+def wait_until(condition, timeout: float, interval: float = 0.01) -> bool:
+    deadline = time.monotonic() + timeout
+    waiter = threading.Event()
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        waiter.wait(interval)
+    return True
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_with_same_key_are_coalesced(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_func():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            leader = pool.submit(single_flight.do, "key", slow_func)
+            started.wait(5)
+            followers = [pool.submit(single_flight.do, "key", slow_func) for _ in range(3)]
+            self.assertTrue(wait_until(lambda: single_flight.coalesced_calls == 3, timeout=5))
+            release.set()
+            results = [leader.result()] + [f.result() for f in followers]
+
+        self.assertEqual(["result"] * 4, results)
+        self.assertEqual(1, len(calls))
+
+    def test_exception_is_shared_and_key_is_released(self):
+        single_flight = SingleFlight()
+
+        def failing_func():
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            single_flight.do("key", failing_func)
+        self.assertEqual(2, single_flight.do("key", lambda: 2))
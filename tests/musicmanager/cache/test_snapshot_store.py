@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+from music_manager.cache.page_cache import PageMode
+from music_manager.cache.snapshot_store import SnapshotStore, SnapshotNotFoundError, OBJECTS_DIR
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _count_objects(self):
+        return sum(len(files) for _, _, files in os.walk(os.path.join(self.tmp_dir.name, OBJECTS_DIR)))
+
+    def test_pages_are_saved_and_deduplicated(self):
+        store = SnapshotStore(self.tmp_dir.name)
+        url = "https://www.mixcloud.com/someone/show/"
+        self.assertEqual("<html>v1</html>", store.fetch(url, PageMode.PLAIN, lambda: "<html>v1</html>"))
+        store.fetch(url, PageMode.PLAIN, lambda: "<html>v1</html>")
+        store.fetch(url, PageMode.REQUESTS_HTML, lambda: "<html>rendered</html>")
+        self.assertEqual(2, self._count_objects())
+        self.assertEqual(1, store.stats["deduplicated"])
+        store.close()
+
+    def test_re_extract_reads_latest_snapshot_only(self):
+        store = SnapshotStore(self.tmp_dir.name)
+        url = "https://soundcloud.com/someone/track"
+        store.save(url, PageMode.PLAIN, "<html>old</html>")
+        store.save(url, PageMode.PLAIN, "<html>new</html>")
+        store.close()
+
+        store = SnapshotStore(self.tmp_dir.name, re_extract=True)
+
+        def loader():
+            raise AssertionError("Network should not be used in re-extract mode")
+
+        self.assertEqual("<html>new</html>", store.fetch(url + "?utm_source=x", PageMode.PLAIN, loader))
+        self.assertRaises(SnapshotNotFoundError, store.fetch, url, PageMode.SELENIUM, loader)
+        store.close()
@@ -0,0 +1,146 @@
+import os
+import tempfile
+import unittest
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+from pythoncommons.file_parser.parser_config_reader import ParserConfigReader, GenericLineParserConfig
+
+from music_manager.commands.addnewentitiestosheet.add_new_music_entity_cmd import AddNewMusicEntityCommand, \
+    AddNewMusicEntityCommandConfig, OperationMode
+from music_manager.commands.addnewentitiestosheet.config import ParserConfig
+from music_manager.commands.addnewentitiestosheet.music_entity_creator import GroupedMusicEntity, MusicEntity, \
+    MusicEntityType
+from music_manager.commands.addnewentitiestosheet.parser import MusicEntityInputFileParser, get_src_location, \
+    parsed_entity_to_dict
+from music_manager.common import Duration
+from music_manager.library.music_library import MusicLibrary
+
+
+@dataclass
+class ParsedEntity:
+    title: str = None
+    link_1: str = None
+    link_2: str = None
+    link_3: str = None
+
+
+class FakeParser:
+    def __init__(self, objs_by_file):
+        self.objs_by_file = objs_by_file
+
+    def parse(self, src_file):
+        return self.objs_by_file[src_file]
+
+PARSER_CONFIG = {
+    "genericParserSettings": {
+        "dateFormats": ["%m.%d"],
+        "fields": {"title": {"parseType": "regexSmartParse", "optional": True, "parsePrefix": "title"},
+                   "link_1": {"parseType": "regex", "optional": True, "value": "https?://[^ ]+"}}
+    },
+    "parserSettings": {
+        "sheetSettings": {"sheets": []},
+        "fields": {"title": {"nameInSheet": "Title", "humanReadableName": "Title"},
+                   "link_1": {"nameInSheet": "Link 1", "humanReadableName": "Link 1"}}
+    }
+}
+
+
+def create_grouped_entity(obj: ParsedEntity) -> GroupedMusicEntity:
+    entity = GroupedMusicEntity(obj, [obj.link_1])
+    entity.add(MusicEntity(obj.title, Duration(3600), obj.link_1, obj.link_1, MusicEntityType.MIX))
+    entity.finalize_and_validate()
+    return entity
+
+
+class AddNewMusicEntityCommandLibraryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.library = MusicLibrary(os.path.join(self.tmp_dir.name, "library.sqlite"))
+        self.parser = FakeParser({
+            "mixes.txt": [ParsedEntity("Mix 1", "https://www.mixcloud.com/artist/mix-1"),
+                          ParsedEntity("Mix 2", "https://www.mixcloud.com/artist/mix-2")],
+            "more_mixes.txt": [ParsedEntity("Mix 3", "https://www.mixcloud.com/artist/mix-3")],
+        })
+
+    def tearDown(self):
+        self.library.close()
+        self.tmp_dir.cleanup()
+
+    def create_command(self, operation_mode: OperationMode) -> AddNewMusicEntityCommand:
+        # The command is created without parsing arguments, only the state used by the library is set up
+        command = AddNewMusicEntityCommand.__new__(AddNewMusicEntityCommand)
+        command.config = SimpleNamespace(operation_mode=operation_mode, src_files=["mixes.txt", "more_mixes.txt"])
+        command.library = self.library
+        return command
+
+    def test_added_entities_have_source_locations_and_are_synced_after_write(self):
+        command = self.create_command(OperationMode.GSHEET)
+        entities = [create_grouped_entity(obj) for obj in command._iter_all_src_lines(self.parser)]
+
+        library_ids = command._add_to_library(entities)
+        self.assertEqual({"mix": {"total": 3, "unsynced": 3}}, self.library.get_counts())
+        mix_3 = self.library.find_by_link("https://mixcloud.com/artist/mix-3")
+        self.assertEqual(("Mix 3", "more_mixes.txt", 1, 3600),
+                         (mix_3.title, mix_3.src_file, mix_3.src_line, mix_3.duration_seconds))
+        mix_2 = self.library.find_by_link("https://www.mixcloud.com/artist/mix-2")
+        self.assertEqual(("mixes.txt", 2), (mix_2.src_file, mix_2.src_line))
+
+        command._mark_synced_in_library(library_ids)
+        self.assertEqual({"mix": {"total": 3, "unsynced": 0}}, self.library.get_counts())
+
+    def test_source_locations_are_not_fields_of_parsed_objects(self):
+        command = self.create_command(OperationMode.GSHEET)
+        obj = list(command._iter_all_src_lines(self.parser))[1]
+        self.assertEqual(("mixes.txt", 2), get_src_location(obj))
+        self.assertEqual({"title": "Mix 2", "link_1": "https://www.mixcloud.com/artist/mix-2", "link_2": None,
+                          "link_3": None}, parsed_entity_to_dict(obj))
+        self.assertEqual((None, None), get_src_location(ParsedEntity("Mix 4")))
+
+    def test_entities_of_dry_runs_are_not_synced(self):
+        command = self.create_command(OperationMode.DRY_RUN)
+        entities = [create_grouped_entity(obj) for obj in command._iter_all_src_lines(self.parser)]
+
+        command._mark_synced_in_library(command._add_to_library(entities))
+        self.assertEqual({"mix": {"total": 3, "unsynced": 3}}, self.library.get_counts())
+
+    def test_parse_lines_of_watched_files(self):
+        parser = MusicEntityInputFileParser(ParserConfigReader(PARSER_CONFIG, ParserConfig, GenericLineParserConfig))
+        parsed_objs = AddNewMusicEntityCommand._parse_lines(parser, ["title:Mix1 https://www.mixcloud.com/artist/mix-1",
+                                                                     "title:Mix2 https://soundcloud.com/artist/mix-2"])
+        self.assertEqual([("Mix1", "https://www.mixcloud.com/artist/mix-1"),
+                          ("Mix2", "https://soundcloud.com/artist/mix-2")],
+                         [(obj.title, obj.link_1) for obj in parsed_objs])
+
+    def test_entities_without_source_location_are_added(self):
+        command = self.create_command(OperationMode.GSHEET)
+        entity = create_grouped_entity(ParsedEntity("Mix 4", "https://soundcloud.com/artist/mix-4"))
+
+        command._add_to_library([entity])
+        mix_4 = self.library.find_by_link("https://soundcloud.com/artist/mix-4")
+        self.assertEqual(("Mix 4", None, None), (mix_4.title, mix_4.src_file, mix_4.src_line))
+
+
+class AddNewMusicEntityCommandConfigTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def create_config(self, content: str) -> AddNewMusicEntityCommandConfig:
+        src_file = os.path.join(self.tmp_dir.name, "mixes.txt")
+        with open(src_file, "w") as f:
+            f.write(content)
+        config = AddNewMusicEntityCommandConfig.__new__(AddNewMusicEntityCommandConfig)
+        config.src_files = [src_file]
+        return config
+
+    def test_facebook_links_require_credentials(self):
+        config = self.create_config("Mix 1 https://www.mixcloud.com/artist/mix-1\n"
+                                    "Mix 2 https://www.facebook.com/groups/mixes/posts/2\n")
+        with self.assertRaisesRegex(ValueError, "mixes.txt:2"):
+            config._validate_no_facebook_links()
+
+        config = self.create_config("Mix 1 https://www.mixcloud.com/artist/mix-1\n")
+        config._validate_no_facebook_links()
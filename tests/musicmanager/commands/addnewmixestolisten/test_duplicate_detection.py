@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+from dataclasses import dataclass
+
+from music_manager.commands.addnewentitiestosheet.duplicate_detection import InputDuplicateFilter, DuplicateDetector
+from music_manager.commands.addnewentitiestosheet.music_entity_creator import GroupedMusicEntity, MusicEntity, \
+    MusicEntityType
+from music_manager.common import Duration
+from music_manager.library.music_library import MusicLibrary, LibraryEntity
+
+
+@dataclass
+class ParsedEntity:
+    title: str = None
+    link_1: str = None
+    link_2: str = None
+    link_3: str = None
+
+
+class InputDuplicateFilterTest(unittest.TestCase):
+    def test_known_and_repeated_entities_are_dropped(self):
+        objs_from_sheets = [ParsedEntity("Known mix", "https://www.mixcloud.com/someone/known/"),
+                            ParsedEntity(None, "https://youtu.be/abc")]
+        input_filter = InputDuplicateFilter(objs_from_sheets)
+        parsed_objs = [
+            ParsedEntity(" known MIX ", "https://soundcloud.com/someone/other"),
+            ParsedEntity("New mix", "https://www.mixcloud.com/someone/known?utm_source=fb"),
+            ParsedEntity("Another mix", "https://soundcloud.com/someone/new", "https://youtu.be/xyz"),
+            ParsedEntity(None, "https://YOUTU.BE/xyz"),
+            ParsedEntity("Without known links", "https://soundcloud.com/someone/new2"),
+        ]
+
+        filtered = list(input_filter.filter(parsed_objs))
+        self.assertEqual([parsed_objs[2], parsed_objs[4]], filtered)
+        self.assertEqual({"sheet": 2, "input": 1}, input_filter.dropped)
+
+
+def create_grouped_entity(title: str, url: str, resolved_title: str = "Resolved title") -> GroupedMusicEntity:
+    entity = GroupedMusicEntity(ParsedEntity(title, url), [url])
+    entity.add(MusicEntity(resolved_title, Duration(3600), url, url, MusicEntityType.MIX))
+    entity.finalize_and_validate()
+    return entity
+
+
+class DuplicateDetectorTest(unittest.TestCase):
+    def test_duplicates_by_title_similar_title_and_link(self):
+        objs_from_sheet = [ParsedEntity("Artist - Mix Name (2022-02-04)", "https://www.mixcloud.com/artist/mix"),
+                           ParsedEntity("Other Artist - Live", "https://youtu.be/dQw4w9WgXcQ")]
+        detector = DuplicateDetector(objs_from_sheet, title_similarity_threshold=0.9)
+        by_title = create_grouped_entity("Other Artist - Live", "https://soundcloud.com/other/live")
+        by_similar_title = create_grouped_entity("Artist – Mix Name [2022-02-04]", "https://soundcloud.com/artist/mix")
+        by_link = create_grouped_entity("New title", "https://m.youtube.com/watch?v=dQw4w9WgXcQ&feature=share")
+        new = create_grouped_entity("Brand new mix", "https://soundcloud.com/artist/new")
+
+        self.assertEqual([new], detector.filter([by_title, by_similar_title, by_link, new]))
+        self.assertEqual([by_title, by_similar_title], detector.duplicates_by_title)
+        self.assertEqual([by_link], detector.duplicates_by_link)
+
+        detector.add(new)
+        self.assertTrue(detector.is_duplicate(create_grouped_entity("Brand new mix", "https://soundcloud.com/x/y")))
+
+    def test_resolved_title_is_used_without_parsed_title(self):
+        detector = DuplicateDetector([ParsedEntity("Resolved title", "https://soundcloud.com/a/b")])
+        self.assertTrue(detector.is_duplicate(create_grouped_entity(None, "https://soundcloud.com/c/d")))
+
+    def test_synced_entities_of_the_library_are_duplicates(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            library = MusicLibrary(os.path.join(tmp_dir, "library.sqlite"))
+            try:
+                library.add(LibraryEntity("Synced mix", "mix", ["https://www.mixcloud.com/artist/synced"]), synced=True)
+                library.add(LibraryEntity("Unsynced mix", "mix", ["https://www.mixcloud.com/artist/unsynced"]))
+                detector = DuplicateDetector([], library=library)
+
+                self.assertTrue(detector.is_duplicate(
+                    create_grouped_entity("Other title", "https://mixcloud.com/artist/synced/")))
+                self.assertFalse(detector.is_duplicate(
+                    create_grouped_entity("Unsynced mix", "https://www.mixcloud.com/artist/unsynced")))
+            finally:
+                library.close()
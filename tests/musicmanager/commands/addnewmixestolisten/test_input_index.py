@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+from music_manager.commands.addnewentitiestosheet.input_index import InputFileIndex
+
+
+class InputFileIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "input_index.sqlite")
+        self.input_file = os.path.join(self.tmp_dir.name, "mixes.txt")
+        self.other_file = os.path.join(self.tmp_dir.name, "tracks.txt")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write(self, path, text, mode="a"):
+        with open(path, mode) as f:
+            f.write(text)
+
+    def _new_lines(self, index, *paths):
+        return [line for delta in index.get_new_lines(paths) for line in delta.lines]
+
+    def test_only_new_lines_are_returned_after_commit(self):
+        self._write(self.input_file, "line1\nline2\n\n")
+        index = InputFileIndex(self.db_path)
+        self.assertEqual(["line1", "line2"], self._new_lines(index, self.input_file))
+        index.commit()
+        index.close()
+
+        index = InputFileIndex(self.db_path)
+        self.assertEqual([], self._new_lines(index, self.input_file))
+        self.assertEqual(1, index.stats["unchanged_files"])
+        self._write(self.input_file, "line3\n")
+        self._write(self.other_file, "line1\nline3\n")
+        self.assertEqual(["line3"], self._new_lines(index, self.input_file, self.other_file))
+        index.close()
+
+    def test_lines_are_returned_again_without_commit(self):
+        self._write(self.input_file, "line1\n")
+        index = InputFileIndex(self.db_path)
+        self.assertEqual(["line1"], self._new_lines(index, self.input_file))
+        self.assertEqual(["line1"], self._new_lines(index, self.input_file))
+        index.close()
+
+    def test_touched_file_is_not_read_again(self):
+        self._write(self.input_file, "line1\n")
+        index = InputFileIndex(self.db_path)
+        self._new_lines(index, self.input_file)
+        index.commit()
+        os.utime(self.input_file, (0, 0))
+        self.assertEqual([], self._new_lines(index, self.input_file))
+        self.assertEqual(1, index.stats["touched_files"])
+        index.close()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from dataclasses import dataclass
+
+from music_manager.commands.addnewentitiestosheet.journal import ResultJournal
+from music_manager.commands.addnewentitiestosheet.music_entity_creator import MusicEntityCreator, \
+    IntermediateMusicEntity, MusicEntityType
+from music_manager.common import Duration
+
+
+@dataclass
+class ParsedEntity:
+    link_1: str
+    link_2: str = None
+    link_3: str = None
+
+
+class Youtube:
+    def __init__(self, failing_url=None):
+        self.failing_url = failing_url
+        self.calls = []
+
+    def can_handle_url(self, url):
+        return True
+
+    def is_media_provider(self):
+        return True
+
+    def is_browser_bound(self):
+        return False
+
+    def create_intermediate_entity(self, url):
+        self.calls.append(url)
+        if url == self.failing_url:
+            raise ValueError("Failed to resolve: " + url)
+        return IntermediateMusicEntity("Mix of " + url, Duration(3600), MusicEntityType.MIX, url)
+
+    def close(self):
+        pass
+
+
+class ResultJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "journal.jsonl")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_resume_reads_complete_entries_only(self):
+        journal = ResultJournal(self.path)
+        journal.append("a", {"entities": []})
+        journal.close()
+        with open(self.path, "a") as f:
+            f.write('{"key": "b", "res')
+
+        journal = ResultJournal(self.path, resume=True)
+        self.assertEqual({"entities": []}, journal.get("a"))
+        self.assertIsNone(journal.get("b"))
+        journal.append("c", {"entities": []})
+        journal.close()
+
+        journal = ResultJournal(self.path, resume=True)
+        self.assertEqual({"entities": []}, journal.get("a"))
+        self.assertEqual({"entities": []}, journal.get("c"))
+        journal.close()
+
+        journal = ResultJournal(self.path)
+        self.assertIsNone(journal.get("a"))
+        journal.close()
+
+    def test_resumed_run_only_resolves_missing_entities(self):
+        objs = [ParsedEntity("https://youtu.be/aaaaaaaaaa1"), ParsedEntity("https://youtu.be/aaaaaaaaaa2"),
+                ParsedEntity("https://youtu.be/aaaaaaaaaa3")]
+        # Links are canonicalized before they are resolved
+        canonical_urls = ["https://www.youtube.com/watch?v=aaaaaaaaaa{}".format(i) for i in range(1, 4)]
+        provider = Youtube(failing_url=canonical_urls[1])
+        creator = MusicEntityCreator([provider], journal=ResultJournal(self.path))
+        with self.assertRaises(ValueError):
+            creator.create_music_entities(objs)
+        creator.close()
+
+        provider = Youtube()
+        creator = MusicEntityCreator([provider], journal=ResultJournal(self.path, resume=True))
+        entities = creator.create_music_entities(objs)
+        creator.close()
+        self.assertEqual(canonical_urls[1:], provider.calls)
+        self.assertEqual(["Mix of " + url for url in canonical_urls], [e.entities[0].title for e in entities])
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from music_manager.commands.addnewentitiestosheet.link_index import LinkIndex
+
+
+class LinkIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "link_index.bin")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_links_are_found_across_sheets_after_reload(self):
+        index = LinkIndex(self.path)
+        index.sync_sheet("mixes", [["https://www.mixcloud.com/someone/mix-1/"], []])
+        index.sync_sheet("tracks", [["https://youtu.be/dQw4w9WgXcQ", "https://soundcloud.com/someone/track"]])
+        self.assertEqual("tracks", index.find("https://www.youtube.com/watch?v=dQw4w9WgXcQ"))
+        index.save()
+        index.close()
+
+        index = LinkIndex(self.path)
+        self.assertEqual(2, index.get_row_count("mixes"))
+        self.assertEqual("mixes", index.find("https://mixcloud.com/someone/mix-1"))
+        self.assertEqual("tracks", index.find("https://m.youtube.com/watch?v=dQw4w9WgXcQ&feature=share"))
+        self.assertIsNone(index.find("https://soundcloud.com/someone/other"))
+
+        # Only appended rows are indexed
+        index.sync_sheet("mixes", [["https://www.mixcloud.com/someone/ignored"], [],
+                                   ["https://www.mixcloud.com/someone/mix-2"]])
+        index.add_row("tracks", ["https://soundcloud.com/someone/new"])
+        self.assertIsNone(index.find("https://www.mixcloud.com/someone/ignored"))
+        self.assertEqual("mixes", index.find("https://www.mixcloud.com/someone/mix-2"))
+        index.save()
+        self.assertEqual(5, len(index))
+        self.assertEqual("tracks", index.find("https://soundcloud.com/someone/new"))
+        index.close()
+
+    def test_sheet_with_less_rows_is_indexed_again(self):
+        index = LinkIndex(self.path)
+        index.sync_sheet("mixes", [["https://www.mixcloud.com/someone/mix-1"],
+                                   ["https://www.mixcloud.com/someone/mix-2"]])
+        index.save()
+
+        index.sync_sheet("mixes", [["https://www.mixcloud.com/someone/mix-2"]])
+        self.assertIsNone(index.find("https://www.mixcloud.com/someone/mix-1"))
+        self.assertEqual("mixes", index.find("https://www.mixcloud.com/someone/mix-2"))
+        index.save()
+        self.assertEqual(1, len(index))
+        self.assertEqual(1, index.get_row_count("mixes"))
+        index.close()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from dataclasses import dataclass
+
+from music_manager.cache.negative_cache import NegativeCache, FailureReason
+from music_manager.cache.snapshot_store import SnapshotNotFoundError
+from music_manager.commands.addnewentitiestosheet.music_entity_creator import MusicEntityCreator, \
+    IntermediateMusicEntity, MusicEntityType
+from music_manager.common import Duration
+
+FB_POST = "https://www.facebook.com/groups/mixes/posts/1"
+MIX_URL = "https://www.mixcloud.com/artist/mix-1"
+
+
+@dataclass
+class ParsedEntity:
+    link_1: str
+    link_2: str = None
+    link_3: str = None
+
+
+class Mixcloud:
+    def __init__(self, missing_snapshots=()):
+        self.missing_snapshots = missing_snapshots
+
+    def can_handle_url(self, url):
+        return "mixcloud.com" in url
+
+    def is_media_provider(self):
+        return True
+
+    def is_browser_bound(self):
+        return False
+
+    def create_intermediate_entity(self, url):
+        if url in self.missing_snapshots:
+            raise SnapshotNotFoundError("No snapshot of URL: " + url)
+        return IntermediateMusicEntity("Mix of " + url, Duration(3600), MusicEntityType.MIX, url)
+
+    def close(self):
+        pass
+
+
+class Facebook:
+    def __init__(self):
+        self.calls = []
+
+    def can_handle_url(self, url):
+        return "facebook.com" in url
+
+    def is_media_provider(self):
+        return False
+
+    def is_browser_bound(self):
+        return False
+
+    def emit_links(self, url):
+        self.calls.append(url)
+        return {MIX_URL: None}
+
+    def close(self):
+        pass
+
+
+class MusicEntityCreatorTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.negative_cache = NegativeCache(os.path.join(self.tmp_dir.name, "negative.sqlite"))
+
+    def tearDown(self):
+        self.negative_cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_links_of_disabled_providers_are_not_negative_cached(self):
+        creator = MusicEntityCreator([Mixcloud()], negative_cache=self.negative_cache,
+                                     disabled_providers={"facebook": ["facebook.com"]})
+        self.assertEqual([], creator.resolve_links([FB_POST, "https://example.com/mix"]))
+        self.assertIsNone(self.negative_cache.get(FB_POST))
+        self.assertEqual(FailureReason.UNKNOWN_PROVIDER, self.negative_cache.get("https://example.com/mix").reason)
+
+    def test_skipped_post_is_not_found(self):
+        self.negative_cache.record_failure(FB_POST, FailureReason.NO_LINKS, "facebook")
+        facebook = Facebook()
+        creator = MusicEntityCreator([facebook, Mixcloud()], negative_cache=self.negative_cache)
+        grouped_entity, = creator.create_music_entities([ParsedEntity(FB_POST)])
+        grouped_entity.finalize_and_validate()
+        self.assertEqual([], facebook.calls)
+        self.assertEqual([MusicEntityType.NOT_FOUND], [e.entity_type for e in grouped_entity.entities])
+
+    def test_links_without_snapshot_are_not_found(self):
+        missing_url = "https://www.mixcloud.com/artist/mix-2"
+        creator = MusicEntityCreator([Mixcloud(missing_snapshots=[missing_url])])
+        found, missing = creator.create_music_entities([ParsedEntity(MIX_URL, missing_url), ParsedEntity(missing_url)])
+        found.finalize_and_validate()
+        missing.finalize_and_validate()
+        self.assertEqual([MusicEntityType.MIX], [e.entity_type for e in found.entities])
+        self.assertEqual([(MusicEntityType.NOT_FOUND, missing_url)],
+                         [(e.entity_type, e.src_url) for e in missing.entities])
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+from music_manager.commands.addnewentitiestosheet.parser_config_cache import ParserConfigCache
+
+
+class ParserConfigCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config_file = os.path.join(self.tmp_dir.name, "parserconfig.json")
+        self.cache = ParserConfigCache(os.path.join(self.tmp_dir.name, "parser_config.pickle"))
+        self._write_config('{"fields": {"title": {}}}')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write_config(self, content):
+        with open(self.config_file, "w") as f:
+            f.write(content)
+
+    def test_compiled_config_is_loaded_until_config_changes(self):
+        key = ParserConfigCache.get_key(self.config_file)
+        self.assertIsNone(self.cache.load(key))
+        self.cache.save(key, {"compiled": ["title"]})
+        self.assertEqual({"compiled": ["title"]}, self.cache.load(ParserConfigCache.get_key(self.config_file)))
+
+        self._write_config('{"fields": {"title": {}, "genre": {}}}')
+        self.assertIsNone(self.cache.load(ParserConfigCache.get_key(self.config_file)))
+
+    def test_corrupt_cache_is_ignored(self):
+        with open(self.cache.cache_file, "wb") as f:
+            f.write(b"not a pickle")
+        self.assertIsNone(self.cache.load(ParserConfigCache.get_key(self.config_file)))
+
+    def test_failed_save_keeps_the_cached_config(self):
+        key = ParserConfigCache.get_key(self.config_file)
+        self.cache.save(key, {"compiled": ["title"]})
+        with self.assertRaises(Exception):
+            # Lambdas can't be pickled
+            self.cache.save(key, {"compiled": lambda: None})
+        self.assertEqual({"compiled": ["title"]}, self.cache.load(key))
+        self.assertEqual(["parser_config.pickle", "parserconfig.json"], sorted(os.listdir(self.tmp_dir.name)))
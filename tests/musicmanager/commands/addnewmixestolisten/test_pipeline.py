@@ -0,0 +1,66 @@
+import time
+import unittest
+
+from music_manager.commands.addnewentitiestosheet.pipeline import StreamingPipeline, WriteBehindSink, PipelineError
+
+
+def double(items):
+    for item in items:
+        yield item * 2
+
+
+def keep_even_keys(items):
+    for item in items:
+        yield ("even" if item % 4 == 0 else "odd"), item
+
+
+class StreamingPipelineTest(unittest.TestCase):
+    def test_stages_and_batched_sink(self):
+        batches = []
+        sink = WriteBehindSink(lambda key, rows: batches.append((key, rows)), batch_size=3)
+        StreamingPipeline(queue_size=2).run(range(10), [("double", double), ("route", keep_even_keys)], sink)
+
+        self.assertEqual(10, sink.written_rows)
+        self.assertEqual(("even", [0, 4, 8]), batches[0])
+        self.assertEqual(sorted(i * 2 for i in range(10)), sorted(r for _, rows in batches for r in rows))
+        self.assertTrue(all(len(rows) <= 3 for _, rows in batches))
+
+    def test_failing_stage_flushes_finished_rows_and_raises(self):
+        def fail_at_five(items):
+            for item in items:
+                if item == 5:
+                    raise ValueError("boom")
+                yield "key", item
+
+        written = []
+        sink = WriteBehindSink(lambda key, rows: written.extend(rows), batch_size=100)
+        with self.assertRaises(PipelineError) as ctx:
+            StreamingPipeline(queue_size=1).run(range(10), [("fail", fail_at_five)], sink)
+        self.assertIsInstance(ctx.exception.__cause__, ValueError)
+        self.assertEqual([0, 1, 2, 3, 4], written)
+
+    def test_slow_sink_writes_queued_rows_after_failure(self):
+        def fail_at_five(items):
+            for item in items:
+                if item == 5:
+                    raise ValueError("boom")
+                yield "key", item
+
+        written = []
+
+        def slow_write(key, rows):
+            time.sleep(0.1)
+            written.extend(rows)
+
+        sink = WriteBehindSink(slow_write, batch_size=1)
+        with self.assertRaises(PipelineError):
+            StreamingPipeline(queue_size=8).run(range(10), [("fail", fail_at_five)], sink)
+        self.assertEqual([0, 1, 2, 3, 4], written)
+
+    def test_interrupt_of_sink_is_not_wrapped(self):
+        def interrupt(items):
+            for _ in items:
+                raise KeyboardInterrupt()
+
+        with self.assertRaises(KeyboardInterrupt):
+            StreamingPipeline(queue_size=1).run(range(10), [("key", keep_even_keys)], interrupt)
@@ -0,0 +1,95 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from music_manager.commands.addnewentitiestosheet.resolver import ResolverConfig, ConcurrentResolutionEngine, \
+    InlineExecutor, map_bounded
+
+
+class Youtube:
+    def is_browser_bound(self):
+        return False
+
+
+class Facebook:
+    def is_browser_bound(self):
+        return True
+
+
+class ConcurrentResolutionEngineTest(unittest.TestCase):
+    def test_parse_provider_limits(self):
+        limits = ResolverConfig.parse_provider_limits(["youtube=4", " SoundCloud =2"])
+        self.assertEqual({"youtube": 4, "soundcloud": 2}, limits)
+
+    def test_parse_provider_limits_invalid(self):
+        self.assertRaises(ValueError, ResolverConfig.parse_provider_limits, ["youtube"])
+        self.assertRaises(ValueError, ResolverConfig.parse_provider_limits, ["youtube=0"])
+
+    def test_browser_bound_provider_is_serialized_by_default(self):
+        engine = ConcurrentResolutionEngine(ResolverConfig(workers=4, link_workers=6))
+        self.assertEqual(1, engine.slots.get_limit(Facebook()))
+        self.assertEqual(6, engine.slots.get_limit(Youtube()))
+
+        engine = ConcurrentResolutionEngine(ResolverConfig(workers=4, link_workers=6, parallel_browser=True,
+                                                           provider_limits={"youtube": 2}))
+        self.assertEqual(6, engine.slots.get_limit(Facebook()))
+        self.assertEqual(2, engine.slots.get_limit(Youtube()))
+
+    def test_inline_executor_when_not_concurrent(self):
+        engine = ConcurrentResolutionEngine(ResolverConfig())
+        with engine.executors() as (entity_pool, link_pool):
+            self.assertIsInstance(entity_pool, InlineExecutor)
+            future = link_pool.submit(lambda: 1 / 0)
+            self.assertRaises(ZeroDivisionError, future.result)
+
+    def test_provider_limit_is_respected(self):
+        engine = ConcurrentResolutionEngine(ResolverConfig(workers=2, link_workers=8))
+        provider = Facebook()
+        lock = threading.Lock()
+        state = {"running": 0, "max_running": 0}
+
+        def call():
+            with lock:
+                state["running"] += 1
+                state["max_running"] = max(state["max_running"], state["running"])
+            time.sleep(0.01)
+            with lock:
+                state["running"] -= 1
+
+        with engine.executors() as (_, link_pool):
+            futures = [link_pool.submit(engine.call_provider, provider, call) for _ in range(8)]
+            for f in futures:
+                f.result()
+        self.assertEqual(1, state["max_running"])
+
+
+class MapBoundedTest(unittest.TestCase):
+    @staticmethod
+    def _slow_identity(value):
+        # Earlier items finish later
+        time.sleep(0.01 * (5 - value % 5))
+        return value
+
+    def test_preserve_order(self):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(map_bounded(pool, self._slow_identity, range(20), max_in_flight=4, preserve_order=True))
+        self.assertEqual(list(range(20)), results)
+
+    def test_unordered_returns_all_results(self):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(map_bounded(pool, self._slow_identity, range(20), max_in_flight=4))
+        self.assertEqual(list(range(20)), sorted(results))
+
+    def test_input_is_read_lazily(self):
+        consumed = []
+
+        def items():
+            for i in range(1000):
+                consumed.append(i)
+                yield i
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            results = map_bounded(pool, lambda x: x, items(), max_in_flight=3, preserve_order=True)
+            self.assertEqual(0, next(results))
+            self.assertLessEqual(len(consumed), 4)
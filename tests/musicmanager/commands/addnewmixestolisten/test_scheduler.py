@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from music_manager.commands.addnewentitiestosheet.scheduler import CostAwareScheduler, ProviderCostModel
+
+
+class Youtube:
+    def is_browser_bound(self):
+        return False
+
+
+class Beatport:
+    def is_browser_bound(self):
+        return False
+
+
+class Facebook:
+    def is_browser_bound(self):
+        return True
+
+
+PROVIDERS = {"youtube": Youtube(), "beatport": Beatport(), "facebook": Facebook()}
+
+
+def find_provider(url):
+    for name, provider in PROVIDERS.items():
+        if name in url:
+            return provider
+    return None
+
+
+def get_links(obj):
+    return obj.links
+
+
+class CostAwareSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.state_file = os.path.join(self.tmp_dir.name, "latencies.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_cheap_first_and_browser_bound_last(self):
+        objs = [SimpleNamespace(links=["https://facebook.com/post/1"]),
+                SimpleNamespace(links=["https://youtube.com/watch?v=1"]),
+                SimpleNamespace(links=["https://beatport.com/track/1"]),
+                SimpleNamespace(links=["https://unknown.com/1"]),
+                SimpleNamespace(links=["https://facebook.com/post/2"])]
+        scheduler = CostAwareScheduler(ProviderCostModel())
+        self.assertEqual([3, 2, 1, 0, 4], scheduler.order(objs, get_links, find_provider))
+
+    def test_learned_latency_changes_order_and_is_persisted(self):
+        cost_model = ProviderCostModel(self.state_file)
+        scheduler = CostAwareScheduler(cost_model)
+        scheduler.record_latency(Beatport(), 10.0)
+        scheduler.record_latency(Beatport(), 20.0)
+        self.assertEqual(12.0, cost_model.latencies["beatport"])
+        scheduler.save()
+
+        with open(self.state_file) as f:
+            self.assertEqual(2, json.load(f)["samples"]["beatport"])
+        objs = [SimpleNamespace(links=["https://beatport.com/track/1"]),
+                SimpleNamespace(links=["https://youtube.com/watch?v=1"])]
+        scheduler = CostAwareScheduler(ProviderCostModel(self.state_file))
+        self.assertEqual([1, 0], scheduler.order(objs, get_links, find_provider))
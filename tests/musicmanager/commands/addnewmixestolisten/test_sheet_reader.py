@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from typing import List
+
+from music_manager.commands.addnewentitiestosheet.sheet_reader import PagedSheetReader, SheetSource, \
+    get_column_letter
+
+
+class FakeSheetSource(SheetSource):
+    def __init__(self, rows: List[List[str]]):
+        self.rows = rows
+        self.modified_time = "1"
+        self.requests = []
+
+    def get_modified_time(self) -> str:
+        return self.modified_time
+
+    def get_row_count(self) -> int:
+        # Header and a few empty rows at the end of the sheet
+        return len(self.rows) + 1 + 3
+
+    def read_columns(self, col_indices: List[int], first_row: int, last_row: int) -> List[List[str]]:
+        self.requests.append((tuple(col_indices), first_row, last_row))
+        # Header is the first row of the sheet
+        rows = self.rows[first_row - 2:last_row - 1]
+        columns = []
+        for idx in col_indices:
+            column = [row[idx] for row in rows]
+            while column and not column[-1]:
+                column.pop()
+            columns.append(column)
+        return columns
+
+
+class PagedSheetReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.snapshot_path = os.path.join(self.tmp_dir.name, "snapshot.json")
+        self.source = FakeSheetSource([["title-{}".format(i), "other", "link-{}".format(i)] for i in range(25)])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _create_reader(self):
+        return PagedSheetReader(self.source, {"Title": 0, "Link": 2}, self.snapshot_path, page_size=4, workers=3)
+
+    def test_reads_every_page_of_projected_columns(self):
+        rows = self._create_reader().read(width=3)
+        self.assertEqual(25, len(rows))
+        self.assertEqual(["title-24", "", "link-24"], rows[24])
+        self.assertTrue(all(cols == (0, 2) for cols, _, _ in self.source.requests))
+        self.assertEqual(("A", "C", "AA"), (get_column_letter(0), get_column_letter(2), get_column_letter(26)))
+
+    def test_empty_rows_inside_the_sheet_are_kept(self):
+        self.source.rows = [["title-{}".format(i), "", "link-{}".format(i)] for i in range(12)]
+        self.source.rows[3] = ["", "other", ""]
+        self.source.rows[4] = ["", "", ""]
+        rows = self._create_reader().read(width=3)
+        self.assertEqual(12, len(rows))
+        self.assertEqual(["", "", ""], rows[3])
+        self.assertEqual(["title-11", "", "link-11"], rows[11])
+
+    def test_snapshot_is_used_and_refreshed_from_last_known_row(self):
+        self._create_reader().read(width=3)
+
+        self.source.requests = []
+        self.assertEqual(25, len(self._create_reader().read(width=3)))
+        self.assertEqual([], self.source.requests)
+
+        self.source.rows.append(["title-25", "", "link-25"])
+        self.source.modified_time = "2"
+        rows = self._create_reader().read(width=3)
+        self.assertEqual(26, len(rows))
+        self.assertEqual(["title-25", "", "link-25"], rows[25])
+        self.assertEqual(26, min(first_row for _, first_row, _ in self.source.requests))
+
+        # An edited last row means the rows of the snapshot can't be trusted
+        self.source.rows[25][0] = "edited"
+        self.source.modified_time = "3"
+        self.source.requests = []
+        rows = self._create_reader().read(width=3)
+        self.assertEqual("edited", rows[25][0])
+        self.assertIn(2, [first_row for _, first_row, _ in self.source.requests])
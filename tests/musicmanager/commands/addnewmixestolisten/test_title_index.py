@@ -0,0 +1,29 @@
+import unittest
+
+from music_manager.commands.addnewentitiestosheet.title_index import TitleIndex, normalize_title
+
+
+class TitleIndexTest(unittest.TestCase):
+    def test_normalize_title(self):
+        self.assertEqual(normalize_title("Artist - Mix Name (2022-02-04)"),
+                         normalize_title("artist – Mix Name [2022-02-04]"))
+
+    def test_find_near_duplicates(self):
+        index = TitleIndex(threshold=0.8)
+        for title in ["Artist - Mix Name (2022-02-04)", "Other Artist - Live at the Club", "Artist - Mix Name 2"]:
+            index.add(title)
+
+        match = index.find("Artist – Mix Name [2022-02-04]")
+        self.assertEqual("Artist - Mix Name (2022-02-04)", match.matched_title)
+        self.assertEqual(1.0, match.similarity)
+
+        match = index.find("Other Artist - Live at the Clubb")
+        self.assertEqual("Other Artist - Live at the Club", match.matched_title)
+        self.assertGreaterEqual(match.similarity, 0.8)
+        self.assertLess(match.similarity, 1.0)
+
+        self.assertIsNone(index.find("Artist - Another Mix (2023-01-01)"))
+        self.assertIsNone(index.find(" - "))
+
+    def test_invalid_threshold(self):
+        self.assertRaises(ValueError, TitleIndex, 0)
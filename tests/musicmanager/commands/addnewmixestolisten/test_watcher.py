@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from music_manager.commands.addnewentitiestosheet.watcher import InputFileWatcher
+
+
+class InputFileWatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.src_dir = os.path.join(self.tmp_dir.name, "input")
+        os.makedirs(os.path.join(self.src_dir, "sub"))
+        self.state_file = os.path.join(self.tmp_dir.name, "state.json")
+        self.input_file = os.path.join(self.src_dir, "sub", "mixes.txt")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _append(self, text, path=None):
+        with open(path if path else self.input_file, "a") as f:
+            f.write(text)
+
+    def test_only_appended_complete_lines_are_returned(self):
+        self._append("line1\nline2\n")
+        self._append("ignored\n", path=os.path.join(self.src_dir, "notes.md"))
+        watcher = InputFileWatcher(self.src_dir, self.state_file)
+        changes = watcher.poll()
+        self.assertEqual([(self.input_file, ["line1", "line2"])], [(c.path, c.lines) for c in changes])
+        watcher.commit()
+        self.assertEqual([], watcher.poll())
+
+        self._append("line3\npartial")
+        self.assertEqual(["line3"], watcher.poll()[0].lines)
+        watcher.commit()
+        self._append(" line4\n")
+        self.assertEqual(["partial line4"], watcher.poll()[0].lines)
+
+    def test_last_line_without_newline_is_returned_when_file_is_unchanged(self):
+        self._append("line1\nlast")
+        watcher = InputFileWatcher(self.src_dir, self.state_file)
+        self.assertEqual(["line1"], watcher.poll()[0].lines)
+        watcher.commit()
+        self.assertEqual(["last"], watcher.poll()[0].lines)
+        watcher.commit()
+        self.assertEqual([], watcher.poll())
+
+    def test_lines_are_returned_again_without_commit_and_state_is_persisted(self):
+        self._append("line1\n")
+        watcher = InputFileWatcher(self.src_dir, self.state_file)
+        self.assertEqual(["line1"], watcher.poll()[0].lines)
+        self.assertEqual(["line1"], watcher.poll()[0].lines)
+        watcher.commit()
+
+        self._append("line2\n")
+        restarted_watcher = InputFileWatcher(self.src_dir, self.state_file)
+        self.assertEqual(["line2"], restarted_watcher.poll()[0].lines)
+
+    def test_shrunk_file_is_read_from_start(self):
+        self._append("line1\nline2\n")
+        watcher = InputFileWatcher(self.src_dir)
+        watcher.poll()
+        watcher.commit()
+        with open(self.input_file, "w") as f:
+            f.write("new\n")
+        self.assertEqual(["new"], watcher.poll()[0].lines)
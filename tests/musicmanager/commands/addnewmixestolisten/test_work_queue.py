@@ -0,0 +1,57 @@
+import os
+import tempfile
+import time
+import unittest
+
+from music_manager.commands.addnewentitiestosheet.work_queue import SQLiteWorkQueue
+
+
+class SQLiteWorkQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "queue.sqlite")
+        self.queue = SQLiteWorkQueue(self.db_path, lease_secs=60, max_attempts=2)
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmp_dir.cleanup()
+
+    def test_enqueue_is_idempotent(self):
+        self.assertEqual(2, self.queue.enqueue([{"title": "a"}, {"title": "b"}]))
+        self.assertEqual(1, self.queue.enqueue([{"title": "a"}, {"title": "c"}]))
+        self.assertEqual({"pending": 3}, self.queue.get_counts())
+
+    def test_claim_complete_and_consume(self):
+        self.queue.enqueue([{"title": "a"}, {"title": "b"}])
+        other_queue = SQLiteWorkQueue(self.db_path)
+        first = self.queue.claim("w1")
+        second = other_queue.claim("w2")
+        self.assertEqual({"title": "a"}, first[0].payload)
+        self.assertEqual({"title": "b"}, second[0].payload)
+        self.assertEqual([], other_queue.claim("w2"))
+        other_queue.close()
+
+        self.queue.complete(first[0].id, {"entities": []})
+        self.assertEqual([(first[0].id, {"title": "a"}, {"entities": []})], self.queue.get_results())
+        self.queue.mark_consumed([first[0].id])
+        self.assertEqual([], self.queue.get_results())
+        self.assertTrue(self.queue.has_unfinished_items())
+
+    def test_expired_lease_is_claimed_again_until_max_attempts(self):
+        self.queue.enqueue([{"title": "a"}])
+        self.queue.lease_secs = -1
+        self.assertEqual(1, self.queue.claim("w1")[0].attempts)
+        item = self.queue.claim("w2")[0]
+        self.assertEqual(2, item.attempts)
+        self.assertEqual([], self.queue.claim("w3"))
+
+        time.sleep(0.01)
+        self.queue.expire_stuck_items()
+        self.assertEqual({"failed": 1}, self.queue.get_counts())
+
+    def test_failed_item_is_retried(self):
+        self.queue.enqueue([{"title": "a"}])
+        self.queue.fail(self.queue.claim("w1")[0], "timeout")
+        self.assertEqual({"pending": 1}, self.queue.get_counts())
+        self.queue.fail(self.queue.claim("w1")[0], "timeout")
+        self.assertEqual([(1, {"title": "a"}, "timeout")], self.queue.get_failed_items())
@@ -0,0 +1,53 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from argparse import Namespace
+
+from music_manager.commands.query.query_cmd import QueryCommand
+from music_manager.library.music_library import MusicLibrary, LibraryEntity
+
+
+class QueryCommandTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.library_file = os.path.join(self.tmp_dir.name, "library.sqlite")
+        library = MusicLibrary(self.library_file)
+        entities = library.add_all([LibraryEntity("Artist - Mix {}".format(i), "mix",
+                                                  ["https://www.mixcloud.com/artist/mix-{}".format(i)])
+                                    for i in range(5)])
+        library.add(LibraryEntity("Artist - Track", "track", ["https://soundcloud.com/artist/track"]))
+        # The best matches of the search are synced
+        library.mark_synced([e.id for e in entities[:3]])
+        library.close()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def query(self, **kwargs) -> list:
+        args = dict(title=None, link=None, entity_type=None, unsynced=False, limit=3, stats=False,
+                    library_file=self.library_file)
+        args.update(kwargs)
+        out = io.StringIO()
+        QueryCommand(Namespace(**args)).run(out)
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_unsynced_filter_is_applied_before_limit(self):
+        results = self.query(title="artist mix", unsynced=True)
+        self.assertEqual(["Artist - Mix 3", "Artist - Mix 4"], sorted(r["title"] for r in results))
+        self.assertTrue(all(r["synced_at"] is None for r in results))
+
+    def test_find_by_link_and_type(self):
+        results = self.query(link="https://mixcloud.com/artist/mix-1/")
+        self.assertEqual(["Artist - Mix 1"], [r["title"] for r in results])
+        results = self.query(entity_type="track")
+        self.assertEqual(["Artist - Track"], [r["title"] for r in results])
+
+    def test_stats(self):
+        self.assertEqual([{"mix": {"total": 5, "unsynced": 2}, "track": {"total": 1, "unsynced": 1}}],
+                         self.query(stats=True))
+
+    def test_title_and_link_are_exclusive(self):
+        with self.assertRaises(ValueError):
+            self.query(title="artist", link="https://soundcloud.com/artist/track")
@@ -0,0 +1,19 @@
+import unittest
+from argparse import Namespace
+
+from music_manager.commands.resolve.resolve_cmd import ResolveCommandConfig
+
+
+class ResolveCommandConfigTest(unittest.TestCase):
+    def create_config(self, **kwargs) -> ResolveCommandConfig:
+        args = dict(input_file="-", workers=8, max_in_flight=None, preserve_order=False, result_cache_size=1000,
+                    revalidate_due=True, revalidate_limit=None, no_negative_cache=False, re_extract=False,
+                    record_cassette=None, replay_cassette=None)
+        args.update(kwargs)
+        return ResolveCommandConfig(Namespace(**args))
+
+    def test_revalidate_due_requires_the_negative_cache(self):
+        for kwargs in [dict(no_negative_cache=True), dict(re_extract=True), dict(record_cassette="links.cassette"),
+                       dict(replay_cassette="links.cassette")]:
+            with self.subTest(**kwargs), self.assertRaises(ValueError):
+                self.create_config(**kwargs)
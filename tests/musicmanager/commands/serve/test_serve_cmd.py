@@ -0,0 +1,48 @@
+import json
+import threading
+import unittest
+from http.client import HTTPConnection
+
+from music_manager.commands.serve.serve_cmd import ResolverHTTPServer
+
+
+class FakeResolverService:
+    def get_stats(self):
+        return {"resolved": 0}
+
+    def resolve(self, url):
+        return {"url": url, "title": "Mix of " + url}
+
+
+class ResolverHTTPServerTest(unittest.TestCase):
+    def start_server(self, allow_origin=None) -> HTTPConnection:
+        server = ResolverHTTPServer(("127.0.0.1", 0), FakeResolverService(), allow_origin=allow_origin)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        conn = HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+        self.addCleanup(conn.close)
+        return conn
+
+    def test_cors_headers_are_not_sent_by_default(self):
+        conn = self.start_server()
+        conn.request("GET", "/resolve?url=https://youtu.be/abc")
+        resp = conn.getresponse()
+        self.assertEqual({"url": "https://youtu.be/abc", "title": "Mix of https://youtu.be/abc"},
+                         json.loads(resp.read()))
+        self.assertIsNone(resp.getheader("Access-Control-Allow-Origin"))
+
+    def test_cors_headers_of_allowed_origin(self):
+        conn = self.start_server(allow_origin="*")
+        conn.request("OPTIONS", "/resolve")
+        resp = conn.getresponse()
+        resp.read()
+        self.assertEqual(204, resp.status)
+        self.assertEqual("*", resp.getheader("Access-Control-Allow-Origin"))
+
+        conn.request("GET", "/health")
+        resp = conn.getresponse()
+        self.assertEqual({"status": "ok", "stats": {"resolved": 0}}, json.loads(resp.read()))
+        self.assertEqual("*", resp.getheader("Access-Control-Allow-Origin"))
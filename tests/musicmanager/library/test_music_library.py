@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from music_manager.library.music_library import MusicLibrary, LibraryEntity
+
+
+class MusicLibraryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.library = MusicLibrary(os.path.join(self.tmp_dir.name, "library.sqlite"))
+
+    def tearDown(self):
+        self.library.close()
+        self.tmp_dir.cleanup()
+
+    def test_add_and_find_by_link(self):
+        mix = self.library.add(LibraryEntity("Artist - Mix Name (2022-02-04)", "mix",
+                                             ["https://youtu.be/dQw4w9WgXcQ", "https://www.facebook.com/post/1"],
+                                             provider="youtube", duration_seconds=3600, src_file="in.txt",
+                                             src_line=3))
+        existing = self.library.add(LibraryEntity("Other title", "track",
+                                                  ["https://m.youtube.com/watch?v=dQw4w9WgXcQ&feature=share"]))
+        self.assertEqual(mix.id, existing.id)
+        self.assertEqual({"added": 1, "existing": 1, "synced": 0, "imported_rows": 0}, self.library.stats)
+
+        found = self.library.find_by_link("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        self.assertEqual("Artist - Mix Name (2022-02-04)", found.title)
+        self.assertEqual(["https://www.facebook.com/post/1", "https://www.youtube.com/watch?v=dQw4w9WgXcQ"],
+                         found.links)
+        self.assertEqual(("in.txt", 3, 3600), (found.src_file, found.src_line, found.duration_seconds))
+        self.assertIsNone(self.library.find_by_link("https://soundcloud.com/someone/track"))
+
+    def test_search_and_sync_state(self):
+        entities = self.library.add_all([
+            LibraryEntity("Artist - Mix Name (2022-02-04)", "mix", ["https://www.mixcloud.com/artist/mix-name"]),
+            LibraryEntity("Artist - Track Name", "track", ["https://soundcloud.com/artist/track-name"]),
+            LibraryEntity("Someone Else - Mixtape", "mix", ["https://www.mixcloud.com/someone/mixtape"]),
+        ])
+        self.library.mark_synced([entities[0].id])
+
+        self.assertEqual(["Artist - Mix Name (2022-02-04)"],
+                         [e.title for e in self.library.search("artist mix")])
+        self.assertEqual(["Artist - Track Name"], [e.title for e in self.library.search("ARTIST", entity_type="track")])
+        self.assertEqual(2, len(self.library.search("artist")))
+        self.assertEqual([], self.library.search("\"*"))
+        self.assertEqual(["Artist - Track Name"], [e.title for e in self.library.search("artist", unsynced=True)])
+        self.assertEqual(["Someone Else - Mixtape"],
+                         [e.title for e in self.library.get_entities(entity_type="mix", unsynced=True)])
+        self.assertEqual({"mix": {"total": 2, "unsynced": 1}, "track": {"total": 1, "unsynced": 1}},
+                         self.library.get_counts())
+
+    def test_only_appended_sheet_rows_are_imported(self):
+        rows = [LibraryEntity("Mix 1", "mix", ["https://www.mixcloud.com/artist/mix-1"]), None,
+                LibraryEntity("Mix 2", "mix", ["https://www.mixcloud.com/artist/mix-2"])]
+        self.assertEqual(3, self.library.import_sheet_rows("mixes", rows))
+        rows.append(LibraryEntity("Mix 3", "mix", ["https://www.mixcloud.com/artist/mix-3"]))
+        self.assertEqual(1, self.library.import_sheet_rows("mixes", rows))
+        self.assertEqual(0, self.library.import_sheet_rows("mixes", rows))
+        self.assertEqual({"mix": {"total": 3, "unsynced": 0}}, self.library.get_counts())
+
+        # Rows were deleted from the sheet
+        self.assertEqual(2, self.library.import_sheet_rows("mixes", rows[2:]))
+        self.assertEqual({"added": 3, "existing": 2, "synced": 0, "imported_rows": 6}, self.library.stats)
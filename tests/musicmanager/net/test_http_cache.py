@@ -0,0 +1,87 @@
+import os
+import tempfile
+import time
+import unittest
+from email.utils import formatdate
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from music_manager.net.http_cache import HttpCache, get_freshness_lifetime, parse_cache_control
+
+
+def create_response(url, status_code=200, headers=None, body=b"<html></html>"):
+    resp = Response()
+    resp.status_code = status_code
+    resp.headers = CaseInsensitiveDict(headers or {})
+    resp._content = body
+    resp.url = url
+    return resp
+
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = HttpCache(os.path.join(self.tmp_dir.name, "http.sqlite"), max_size_bytes=100)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_parse_cache_control(self):
+        self.assertEqual({"public": None, "max-age": "60", "no-cache": None},
+                         parse_cache_control('public, max-age="60", no-cache'))
+
+    def test_freshness_lifetime(self):
+        now = time.time()
+        self.assertEqual(60, get_freshness_lifetime({"Cache-Control": "max-age=60"}, 200, now))
+        self.assertEqual(0, get_freshness_lifetime({"Cache-Control": "no-cache, max-age=60"}, 200, now))
+        self.assertEqual(0, get_freshness_lifetime({"Expires": "0"}, 200, now))
+        headers = {"Date": formatdate(now), "Last-Modified": formatdate(now - 10 * 3600)}
+        self.assertAlmostEqual(3600, get_freshness_lifetime(headers, 200, now), delta=1)
+
+    def test_fresh_response_is_served_from_cache(self):
+        url = "https://www.beatport.com/track/a/1"
+        self.cache.store("GET", url, create_response(url, headers={"Cache-Control": "max-age=60"}))
+        cached = self.cache.lookup("GET", url)
+        self.assertTrue(cached.is_fresh)
+        self.assertEqual(b"<html></html>", cached.to_response().content)
+
+    def test_stale_response_is_revalidated(self):
+        url = "https://www.mixcloud.com/show/"
+        self.cache.store("GET", url, create_response(url, headers={"ETag": '"v1"', "Cache-Control": "no-cache"}))
+        cached = self.cache.lookup("GET", url)
+        self.assertFalse(cached.is_fresh)
+        self.assertEqual({"If-None-Match": '"v1"'}, cached.get_conditional_headers())
+
+        refreshed = self.cache.refresh(cached, create_response(url, 304, {"Cache-Control": "max-age=60"}, b""))
+        self.assertTrue(refreshed.is_fresh)
+        self.assertEqual(b"<html></html>", self.cache.lookup("GET", url).body)
+
+    def test_freshness_of_redirect_chain_is_the_freshness_of_its_least_fresh_hop(self):
+        url = "https://bit.ly/abc"
+        final_url = "https://www.mixcloud.com/show/"
+        resp = create_response(final_url, headers={"Cache-Control": "max-age=60"})
+        resp.history = [create_response(url, 301, {"Location": final_url}, b"")]
+        cached = self.cache.store("GET", url, resp)
+        self.assertTrue(cached.is_fresh)
+        self.assertAlmostEqual(time.time() + 60, cached.expires_at, delta=1)
+        self.assertEqual(final_url, self.cache.lookup("GET", url).final_url)
+
+        resp = create_response(final_url, headers={"ETag": '"v1"', "Cache-Control": "no-cache"})
+        resp.history = [create_response(url, 301, {"Location": final_url}, b"")]
+        self.assertFalse(self.cache.store("GET", url, resp).is_fresh)
+
+    def test_not_storable_responses(self):
+        url = "https://youtu.be/a"
+        self.assertIsNone(self.cache.store("GET", url, create_response(url, headers={"Cache-Control": "no-store"})))
+        self.assertIsNone(self.cache.store("GET", url, create_response(url, headers={"Vary": "Cookie"})))
+        # Stale without validators, it could never be used
+        self.assertIsNone(self.cache.store("GET", url, create_response(url)))
+
+    def test_least_recently_used_responses_are_evicted(self):
+        for i in range(4):
+            url = "https://www.beatport.com/{}".format(i)
+            self.cache.store("GET", url, create_response(url, headers={"Cache-Control": "max-age=60"}, body=b"x" * 40))
+        self.assertIsNone(self.cache.lookup("GET", "https://www.beatport.com/0"))
+        self.assertIsNotNone(self.cache.lookup("GET", "https://www.beatport.com/3"))
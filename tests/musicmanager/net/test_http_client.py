@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from music_manager.net.http_client import HttpClient, HttpClientConfig
+
+
+class FakeAdapter(BaseAdapter):
+    def __init__(self, headers=None):
+        super().__init__()
+        self.headers = headers or {}
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        resp = Response()
+        resp.status_code = 200
+        resp.headers = CaseInsensitiveDict(self.headers)
+        resp._content = b"<html></html>"
+        resp.url = request.url
+        resp.request = request
+        return resp
+
+    def close(self):
+        pass
+
+
+def mount_fake_adapter(client: HttpClient, headers=None) -> FakeAdapter:
+    adapter = FakeAdapter(headers)
+    client.session.mount("https://", adapter)
+    return adapter
+
+
+class HttpClientTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        with HttpClient._instance_lock:
+            if HttpClient._instance:
+                HttpClient._instance.close()
+            HttpClient._instance = None
+        self.tmp_dir.cleanup()
+
+    def test_shared_client_keeps_one_pooled_session(self):
+        config = HttpClientConfig(pool_connections=4, pool_maxsize=8)
+        client = HttpClient.configure(config)
+        self.assertIs(client, HttpClient.get_instance())
+        self.assertIs(client.session, HttpClient.get_instance().session)
+        adapter = client.session.get_adapter("https://www.mixcloud.com/")
+        self.assertEqual((4, 8), (adapter._pool_connections, adapter._pool_maxsize))
+        self.assertIs(adapter, client.session.get_adapter("http://soundcloud.com/"))
+
+    def test_default_host_and_request_headers(self):
+        client = HttpClient.configure(HttpClientConfig())
+        client.add_host_headers("facebook.com", {"Accept-Language": "en-US", "User-Agent": "facebook-agent"})
+        adapter = mount_fake_adapter(client)
+
+        client.get("https://www.facebook.com/post/1")
+        client.get("https://www.mixcloud.com/show/", headers={"Accept-Language": "hu-HU"})
+        facebook, mixcloud = adapter.requests
+        self.assertEqual(("en-US", "facebook-agent"), (facebook.headers["Accept-Language"],
+                                                       facebook.headers["User-Agent"]))
+        self.assertEqual("hu-HU", mixcloud.headers["Accept-Language"])
+        self.assertEqual(HttpClientConfig().headers["User-Agent"], mixcloud.headers["User-Agent"])
+
+    def test_host_headers_are_kept_on_reconfiguration(self):
+        HttpClient.get_instance().add_host_headers("facebook.com", {"Accept-Language": "en-US"})
+        client = HttpClient.configure(HttpClientConfig(read_timeout=10.0))
+        adapter = mount_fake_adapter(client)
+
+        client.get("https://www.facebook.com/post/1")
+        self.assertEqual("en-US", adapter.requests[0].headers["Accept-Language"])
+        self.assertEqual(10.0, client.config.read_timeout)
+
+    def test_fresh_responses_are_served_from_cache(self):
+        client = HttpClient.configure(HttpClientConfig(cache_file=os.path.join(self.tmp_dir.name, "http.sqlite")))
+        adapter = mount_fake_adapter(client, headers={"Cache-Control": "max-age=60"})
+
+        for _ in range(2):
+            self.assertEqual(b"<html></html>", client.get("https://www.beatport.com/track/a/1").content)
+        self.assertEqual(1, len(adapter.requests))
+        self.assertEqual(1, client.cache.stats["fresh_hits"])
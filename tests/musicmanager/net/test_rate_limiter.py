@@ -0,0 +1,87 @@
+import os
+import tempfile
+import time
+import unittest
+
+from music_manager.net.rate_limiter import AdaptiveRateLimiter, DomainPolicy, RateLimiterStateStore, get_domain, \
+    parse_retry_after
+
+URL = "https://www.youtube.com/watch?v=abc"
+
+
+class AdaptiveRateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "rate_limiter.sqlite")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_domain(self):
+        self.assertEqual("youtube.com", get_domain(URL))
+        self.assertEqual("facebook.com", get_domain("https://l.facebook.com/l.php?u=x"))
+        self.assertEqual("youtu.be", get_domain("https://youtu.be/abc"))
+
+    def test_parse_retry_after(self):
+        self.assertEqual(120.0, parse_retry_after("120"))
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("garbage"))
+        self.assertEqual(0.0, parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"))
+
+    def test_healthy_responses_increase_and_throttling_decreases(self):
+        policy = DomainPolicy(rate=100.0, burst=100, max_rate=1000.0, concurrency=2, increase_after=2,
+                              default_penalty_secs=0.0)
+        limiter = AdaptiveRateLimiter(policies={"youtube.com": policy})
+        for _ in range(2):
+            with limiter.slot(URL) as ticket:
+                ticket.record_status(200)
+        state = limiter.get_state("youtube.com")
+        self.assertEqual(3, state.concurrency)
+        self.assertEqual(125.0, state.rate)
+
+        with limiter.slot(URL) as ticket:
+            ticket.record_status(429)
+        self.assertEqual(1, state.concurrency)
+        self.assertEqual(62.5, state.rate)
+
+    def test_retry_after_pauses_domain_and_is_persisted(self):
+        store = RateLimiterStateStore(self.db_path)
+        limiter = AdaptiveRateLimiter(store)
+        with limiter.slot(URL) as ticket:
+            ticket.record_status(429, retry_after=60)
+        self.assertGreater(limiter.get_state("youtube.com").blocked_until, time.time() + 50)
+        store.close()
+
+        # A new process sees the pause
+        store = RateLimiterStateStore(self.db_path)
+        other_limiter = AdaptiveRateLimiter(store)
+        self.assertGreater(other_limiter.get_state("youtube.com").blocked_until, time.time() + 50)
+        store.close()
+
+    def test_exception_is_treated_as_failure(self):
+        limiter = AdaptiveRateLimiter(policies={"youtube.com": DomainPolicy(concurrency=4)})
+        with self.assertRaises(IOError):
+            with limiter.slot(URL):
+                raise IOError("timeout")
+        state = limiter.get_state("youtube.com")
+        self.assertEqual(2, state.concurrency)
+        self.assertEqual(0, state.in_flight)
+
+    def test_slot_is_released_on_interrupt_and_early_close(self):
+        limiter = AdaptiveRateLimiter(policies={"youtube.com": DomainPolicy(concurrency=4)})
+        with self.assertRaises(KeyboardInterrupt):
+            with limiter.slot(URL):
+                raise KeyboardInterrupt()
+        slot = limiter.slot(URL)
+        slot.__enter__()
+        # Closing the generator of the context manager without exiting it
+        slot.gen.close()
+        state = limiter.get_state("youtube.com")
+        self.assertEqual(0, state.in_flight)
+        self.assertEqual(4, state.concurrency)
+
+    def test_disabled_limiter(self):
+        limiter = AdaptiveRateLimiter(enabled=False)
+        with limiter.slot(URL) as ticket:
+            ticket.record_status(429, retry_after=600)
+        self.assertEqual({}, limiter._states)
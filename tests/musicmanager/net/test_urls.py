@@ -0,0 +1,36 @@
+import unittest
+
+from music_manager.net.urls import canonicalize_url, canonicalize_urls
+
+VIDEO_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+class CanonicalizeUrlTest(unittest.TestCase):
+    def test_youtube_variants(self):
+        for url in ["https://youtu.be/dQw4w9WgXcQ",
+                    "https://youtu.be/dQw4w9WgXcQ?si=abc&t=60",
+                    "http://m.youtube.com/watch?v=dQw4w9WgXcQ&feature=share",
+                    "https://www.youtube.com/watch?feature=youtu.be&v=dQw4w9WgXcQ&list=PL123#t=10",
+                    "https://www.youtube.com/embed/dQw4w9WgXcQ",
+                    "https://youtube.com/shorts/dQw4w9WgXcQ/"]:
+            self.assertEqual(VIDEO_URL, canonicalize_url(url), url)
+        self.assertEqual("https://www.youtube.com/playlist?list=PL123",
+                         canonicalize_url("https://m.youtube.com/playlist?list=PL123&si=x"))
+        self.assertEqual("https://www.youtube.com/channel/UC123",
+                         canonicalize_url("https://www.youtube.com/channel/UC123/"))
+
+    def test_provider_hosts_and_query_params(self):
+        self.assertEqual("https://soundcloud.com/someone/track",
+                         canonicalize_url("https://m.soundcloud.com/someone/track?in=someone/sets/radio&si=123"))
+        self.assertEqual("https://www.mixcloud.com/someone/show",
+                         canonicalize_url("http://mixcloud.com/someone/show/?utm_source=widget"))
+        self.assertEqual("https://www.facebook.com/permalink.php?story_fbid=1&id=2",
+                         canonicalize_url("https://m.facebook.com/permalink.php?story_fbid=1&id=2&fbclid=xyz"))
+
+    def test_unknown_hosts_only_lose_tracking_params(self):
+        self.assertEqual("https://example.com/Some/Path?a=1",
+                         canonicalize_url("https://EXAMPLE.com/Some/Path/?a=1&fbclid=xyz&utm_medium=social#top"))
+
+    def test_bulk(self):
+        urls = ["https://youtu.be/dQw4w9WgXcQ", "https://youtu.be/dQw4w9WgXcQ", "https://soundcloud.com/a/b?in=x"]
+        self.assertEqual([VIDEO_URL, VIDEO_URL, "https://soundcloud.com/a/b"], canonicalize_urls(urls))